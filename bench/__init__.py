@@ -0,0 +1,14 @@
+"""
+Benchmarks for the site generator.
+
+Run a benchmark from the repository root, e.g. ``python3 -m bench.incremental``.
+``python3 -m bench`` runs the per-stage suite (bench.suite) and
+``python3 -m bench.compare base.json new.json`` checks two of its result files
+for regressions.
+"""
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,42 @@
+"""
+Times the block stage (scanning and classifying blocks) on documents of
+increasing size to check that it scales linearly.
+
+    python3 -m bench.blocks [--max-mb 8]
+"""
+import argparse
+import random
+import time
+
+from bench.corpus import PageSpec, make_page
+from markdown_blocks import iter_blocks
+
+
+def make_document(size, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        page = make_page(rng, "Section", PageSpec(code_every=3))
+        parts.append(page + "\n\n")
+        total += len(page)
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-mb", type=int, default=8)
+    args = parser.parse_args()
+
+    mb = 1
+    while mb <= args.max_mb:
+        markdown = make_document(mb * 1024 * 1024)
+        start = time.perf_counter()
+        count = sum(1 for _ in iter_blocks(markdown.split("\n")))
+        elapsed = time.perf_counter() - start
+        print(f"{mb:3d} MB  {count:8d} blocks  {elapsed * 1000:9.1f} ms  {elapsed * 1000 / mb:7.1f} ms/MB")
+        mb *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compares two bench.suite result files and fails on regressions.
+
+    python3 -m bench.compare base.json new.json [--threshold 0.10]
+
+Exits with status 1 if any stage got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(base, new, threshold):
+    """
+    Returns a list of (stage, base seconds, new seconds, change, regressed) rows
+    for every stage present in both results.
+    """
+    rows = []
+    for name, result in new["results"].items():
+        if name not in base["results"]:
+            continue
+        before = base["results"][name]["seconds"]
+        after = result["seconds"]
+        change = after / before - 1 if before else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, as a fraction")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+
+    print(f"base {base['meta'].get('commit')}  new {new['meta'].get('commit')}")
+    rows = compare(base, new, args.threshold)
+    for name, before, after, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:26s} {before * 1000:9.2f} ms -> {after * 1000:9.2f} ms  {change:+7.1%}  {flag}")
+    if any(row[4] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
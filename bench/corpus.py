@@ -0,0 +1,118 @@
+"""
+Deterministic synthetic content for the benchmarks.
+
+The same seed and PageSpec always produce byte-identical markdown, so results
+from two commits are measured on the same input.
+"""
+import os
+import random
+
+WORDS = (
+    "hobbit ring shire elf dwarf wizard mountain river forest road king "
+    "sword song light shadow tower gate bridge horse journey friend"
+).split()
+
+TEMPLATE = (
+    "<!DOCTYPE html>\n<html>\n  <head>\n    <title>{{ Title }}</title>\n"
+    '    <link href="/index.css" rel="stylesheet" />\n  </head>\n'
+    "  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n"
+)
+
+
+class PageSpec:
+    """
+    Describes the shape of a synthetic page.
+
+    Attributes:
+        paragraphs (int): Paragraph blocks per page.
+        words (int): Words per paragraph.
+        inline_density (float): Fraction of words wrapped in bold, italic or code.
+        link_density (float): Fraction of words turned into links.
+        image_density (float): Fraction of words replaced by images.
+        list_every (int): Add a list after every N paragraphs (0 for none).
+        list_length (int): Items per list.
+        code_every (int): Add a fenced code block after every N paragraphs (0 for none).
+    """
+
+    def __init__(self, paragraphs=6, words=40, inline_density=0.08, link_density=0.025,
+                 image_density=0.0, list_every=3, list_length=5, code_every=0):
+        self.paragraphs = paragraphs
+        self.words = words
+        self.inline_density = inline_density
+        self.link_density = link_density
+        self.image_density = image_density
+        self.list_every = list_every
+        self.list_length = list_length
+        self.code_every = code_every
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def make_paragraph(rng, spec):
+    """
+    Returns one paragraph of inline markdown shaped by spec.
+    """
+    words = []
+    for _ in range(spec.words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < spec.image_density:
+            word = f"![{word}](/images/{word}.png)"
+        elif roll < spec.image_density + spec.link_density:
+            word = f"[{word}](/blog/{rng.choice(WORDS)})"
+        elif roll < spec.image_density + spec.link_density + spec.inline_density:
+            word = rng.choice(("**{}**", "_{}_", "`{}`")).format(word)
+        words.append(word)
+    return " ".join(words)
+
+
+def make_page(rng, title, spec=None):
+    """
+    Returns the markdown for one synthetic page.
+    """
+    spec = spec or PageSpec()
+    lines = [f"# {title}", ""]
+    for i in range(1, spec.paragraphs + 1):
+        lines.append(make_paragraph(rng, spec))
+        lines.append("")
+        if spec.list_every and i % spec.list_every == 0:
+            ordered = (i // spec.list_every) % 2 == 0
+            for item in range(1, spec.list_length + 1):
+                marker = f"{item}." if ordered else "-"
+                lines.append(f"{marker} {rng.choice(WORDS)} {rng.choice(WORDS)}")
+            lines.append("")
+        if spec.code_every and i % spec.code_every == 0:
+            lines.extend(["```", f"for {rng.choice(WORDS)} in range(3):", "", "    print(x)", "```", ""])
+    return "\n".join(lines)
+
+
+def make_pages(count, spec=None, seed=0):
+    """
+    Returns `count` page markdown strings.
+    """
+    rng = random.Random(seed)
+    return [make_page(rng, f"Page {i}", spec) for i in range(count)]
+
+
+def write_site(root, pages, per_dir=100, seed=0, spec=None):
+    """
+    Writes a deterministic synthetic site into root.
+
+    Creates root/content with `pages` markdown files spread over directories of
+    `per_dir` pages each, and a root/template.html.
+
+    Returns:
+        tuple: (content_dir, template_path)
+    """
+    content_dir = os.path.join(root, "content")
+    for i, markdown in enumerate(make_pages(pages, spec, seed)):
+        dir_path = os.path.join(content_dir, f"section{i // per_dir}", f"page{i}")
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, "index.md"), "w") as file:
+            file.write(markdown)
+
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as file:
+        file.write(TEMPLATE)
+    return content_dir, template_path
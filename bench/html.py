@@ -0,0 +1,72 @@
+"""
+Compares writing a page to disk on wide lists and long documents: the
+original recursive string concatenation, to_html() followed by a single
+write, and streaming write_html() into the buffered file.
+
+    python3 -m bench.html [--items 100000] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import timeit
+
+from bench.corpus import make_pages
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+
+
+def concat_to_html(node):
+    """
+    The original implementation: every level builds its children with +=.
+    """
+    if isinstance(node, LeafNode):
+        return node.to_html()
+    html_children = ""
+    for child in node.children:
+        html_children += concat_to_html(child)
+    props_str = f" {node.props_to_html()}" if node.props else ""
+    return f"<{node.tag}{props_str}>{html_children}</{node.tag}>"
+
+
+def wide_list(items):
+    return ParentNode("ul", [ParentNode("li", [LeafNode("a", f"item {i}", {"href": f"/item/{i}"})]) for i in range(items)])
+
+
+def long_document(pages):
+    return markdown_to_html_node("\n\n".join(make_pages(pages)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "out.html")
+
+        def concat_then_write(node):
+            with open(path, "w") as file:
+                file.write(concat_to_html(node))
+
+        def to_html_then_write(node):
+            with open(path, "w") as file:
+                file.write(node.to_html())
+
+        def write_html(node):
+            with open(path, "w") as file:
+                node.write_html(file)
+
+        for name, node in (("wide list", wide_list(args.items)), ("long document", long_document(args.items // 50))):
+            print(f"{name}: {len(node.to_html()) / 1e6:.1f} MB")
+            for label, function in (
+                ("concatenation", concat_then_write),
+                ("to_html", to_html_then_write),
+                ("write_html", write_html),
+            ):
+                best = min(timeit.repeat(lambda: function(node), number=1, repeat=args.repeat))
+                print(f"  {label:14s} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compares a full build of a synthetic site with a no-op rebuild driven by the
+build manifest.
+
+    python3 -m bench.incremental [--pages 10000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from bench.corpus import write_site
+from generate_page import generate_pages_recursive
+from manifest import BuildManifest
+
+
+def timed_build(content_dir, template_path, dest_dir):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        manifest = BuildManifest.load(dest_dir)
+        generate_pages_recursive(content_dir, template_path, dest_dir, "/", manifest)
+        manifest.prune()
+        manifest.save()
+    return time.perf_counter() - start, manifest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, template_path = write_site(root, args.pages)
+        dest_dir = os.path.join(root, "docs")
+
+        full, manifest = timed_build(content_dir, template_path, dest_dir)
+        print(f"full build:   {full:8.3f}s ({manifest.generated} generated)")
+
+        noop, manifest = timed_build(content_dir, template_path, dest_dir)
+        print(f"no-op build:  {noop:8.3f}s ({manifest.skipped} up to date)")
+
+        with open(os.path.join(content_dir, "section0", "page0", "index.md"), "a") as file:
+            file.write("\nOne more paragraph.\n")
+        one, manifest = timed_build(content_dir, template_path, dest_dir)
+        print(f"one edit:     {one:8.3f}s ({manifest.generated} generated)")
+
+        print(f"no-op / full: {noop / full:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
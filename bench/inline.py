@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of inline tokenization on paragraph-heavy content: the
+single-pass text_to_textnodes against the original five split passes.
+
+    python3 -m bench.inline [--paragraphs 5000] [--repeat 5]
+"""
+import argparse
+import random
+import timeit
+
+from bench.corpus import PageSpec, make_paragraph
+from inline_markdown import split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+from textnode import TextNode, TextType
+
+
+def pipeline_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def make_paragraphs(count, seed=0):
+    rng = random.Random(seed)
+    spec = PageSpec(words=60, inline_density=0.25, link_density=0.08, image_density=0.02)
+    return [make_paragraph(rng, spec) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paragraphs = make_paragraphs(args.paragraphs)
+    for name, function in (("pipeline", pipeline_text_to_textnodes), ("tokenizer", text_to_textnodes)):
+        best = min(timeit.repeat(lambda: [function(p) for p in paragraphs], number=1, repeat=args.repeat))
+        print(f"{name:10s} {best * 1000:8.1f} ms  {best * 1e6 / len(paragraphs):6.1f} us/paragraph")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmarks image/link splitting on link-dense text, such as index and
+sitemap-style pages: the original findall + re-split implementation against
+the offset-based splitters.
+
+    python3 -m bench.links [--links 1000 2000 4000]
+"""
+import argparse
+import re
+import timeit
+
+from inline_markdown import split_nodes_image, split_nodes_images_and_links, split_nodes_link
+from textnode import TextNode, TextType
+
+
+def resplit_nodes(old_nodes, pattern, text_type, template):
+    """
+    The original algorithm: findall, then split the remaining text on each
+    match's rebuilt markdown.
+    """
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        original_text = old_node.text
+        matches = re.findall(pattern, original_text)
+        if len(matches) == 0:
+            new_nodes.append(old_node)
+            continue
+        for text, url in matches:
+            sections = original_text.split(template.format(text, url), 1)
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+            new_nodes.append(TextNode(text, text_type, url))
+            original_text = sections[1]
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, TextType.TEXT))
+    return new_nodes
+
+
+IMAGE = r"!\[((?:[^\[\]]|(?:\[[^\[\]]*\]))*)\]\(([^()]*(?:\([^()]*\)[^()]*)*)\)"
+LINK = r"(?<!!)\[((?:[^\[\]]|(?:\[[^\[\]]*\]))*)\]\(([^()]*(?:\([^()]*\)[^()]*)*)\)"
+
+
+def original(nodes):
+    nodes = resplit_nodes(nodes, IMAGE, TextType.IMAGE, "![{}]({})")
+    return resplit_nodes(nodes, LINK, TextType.LINK, "[{}]({})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--links", type=int, nargs="+", default=[1000, 2000, 4000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for count in args.links:
+        sitemap = " | ".join(f"[Page number {i}](/section/{i % 50}/page-{i})" for i in range(count))
+        gallery = " | ".join(
+            f"![icon](/images/{i}.png) [Page number {i}](/section/{i % 50}/page-{i})" if i % 10 == 0
+            else f"[Page number {i}](/section/{i % 50}/page-{i})"
+            for i in range(count)
+        )
+        for label, text in (("links only", sitemap), ("links and images", gallery)):
+            nodes = [TextNode(text, TextType.TEXT)]
+            print(f"{count} {label} in one paragraph ({len(text) / 1024:.0f} KiB)")
+            for name, function in (
+                ("findall + re-split", original),
+                ("two offset passes", lambda n: split_nodes_link(split_nodes_image(n))),
+                ("single scan", split_nodes_images_and_links),
+            ):
+                best = min(timeit.repeat(lambda: function(nodes), number=1, repeat=args.repeat))
+                print(f"  {name:20s} {best * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
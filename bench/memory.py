@@ -0,0 +1,87 @@
+"""
+Reports memory per page for a large synthetic corpus with tracemalloc.
+
+For each page it measures the peak allocated while converting the markdown to
+an HTML node tree. It then copies the page's HTML node tree and TextNodes
+twice, sharing the strings, once into the real __slots__ classes and once into
+plain classes with a per-instance __dict__ (how the node classes were laid out
+before), and reports the memory each copy retains.
+
+    python3 -m bench.memory [--pages 200]
+"""
+import argparse
+import tracemalloc
+
+from bench.corpus import PageSpec, make_pages
+from htmlnode import HTMLNode, ParentNode
+from inline_markdown import text_to_textnodes
+from markdown_blocks import iter_blocks, markdown_to_html_node
+from textnode import TextNode
+
+
+class DictHTMLNode:
+    def __init__(self, tag, value, children, props):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def copy_tree(node, cls):
+    children = [copy_tree(child, cls) for child in node.children] if isinstance(node, ParentNode) else None
+    return cls(node.tag, node.value, children, None if node.props is None else dict(node.props))
+
+
+def measure(function, *args):
+    """
+    Returns (result, bytes retained by the result, peak bytes while computing it).
+    """
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = function(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak
+
+
+def page_textnodes(markdown):
+    return [text_to_textnodes(" ".join(block.lines)) for block in iter_blocks(markdown.split("\n"))]
+
+
+def copy_textnodes(lists, cls):
+    return [[cls(node.text, node.text_type, node.url) for node in nodes] for nodes in lists]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=60)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, PageSpec(paragraphs=args.paragraphs))
+    totals = {"peak": 0, "tree": 0, "tree_dict": 0, "text": 0, "text_dict": 0}
+    for markdown in pages:
+        tree, _, peak = measure(markdown_to_html_node, markdown)
+        totals["peak"] += peak
+        totals["tree"] += measure(copy_tree, tree, HTMLNode)[1]
+        totals["tree_dict"] += measure(copy_tree, tree, DictHTMLNode)[1]
+        nodes = page_textnodes(markdown)
+        totals["text"] += measure(copy_textnodes, nodes, TextNode)[1]
+        totals["text_dict"] += measure(copy_textnodes, nodes, DictTextNode)[1]
+
+    per_page = {key: value / len(pages) / 1024 for key, value in totals.items()}
+    print(f"pages: {len(pages)}, markdown per page: {sum(map(len, pages)) / len(pages) / 1024:.1f} KiB")
+    print(f"peak while rendering:     {per_page['peak']:8.1f} KiB/page")
+    print(f"HTML node tree, __slots__:{per_page['tree']:8.1f} KiB/page (with __dict__: {per_page['tree_dict']:.1f})")
+    print(f"TextNodes, __slots__:     {per_page['text']:8.1f} KiB/page (with __dict__: {per_page['text_dict']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
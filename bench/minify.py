@@ -0,0 +1,55 @@
+"""
+Measures what --minify saves and costs: the size of the rendered pages, raw
+and gzipped, and the time spent filling the template with each page's node
+tree, with and without minification.
+
+    python3 -m bench.minify [--pages 500] [--repeat 5]
+"""
+import argparse
+import gzip
+import io
+import timeit
+
+from bench.corpus import TEMPLATE, PageSpec, make_pages
+from markdown_blocks import markdown_to_html_node
+from template import compile_template
+from url_resolver import UrlResolver
+
+
+def render_all(template, trees):
+    pages = []
+    for tree in trees:
+        buffer = io.StringIO()
+        template.write(buffer, {"Title": "Title", "Content": tree})
+        pages.append(buffer.getvalue())
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    spec = PageSpec(image_density=0.01, code_every=2)
+    resolver = UrlResolver("/site/")
+    trees = [markdown_to_html_node(markdown, resolver) for markdown in make_pages(args.pages, spec)]
+    print(f"{args.pages} pages, best of {args.repeat}")
+
+    baseline = None
+    for minify in (False, True):
+        template = compile_template(TEMPLATE, resolver=resolver, minify=minify)
+        pages = render_all(template, trees)
+        raw = sum(len(page.encode()) for page in pages)
+        compressed = sum(len(gzip.compress(page.encode(), mtime=0)) for page in pages)
+        seconds = min(timeit.repeat(lambda: render_all(template, trees), number=1, repeat=args.repeat))
+        baseline = baseline or (raw, compressed, seconds)
+        print(
+            f"  {'minified' if minify else 'plain':9s} {raw:10,d} bytes ({raw / baseline[0]:6.1%})"
+            f"  gzip {compressed:9,d} bytes ({compressed / baseline[1]:6.1%})"
+            f"  render {seconds * 1000:8.1f} ms ({seconds / baseline[2]:5.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
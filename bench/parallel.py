@@ -0,0 +1,45 @@
+"""
+Measures how a full build of a synthetic site scales with the number of
+worker processes.
+
+    python3 -m bench.parallel [--pages 5000] [--max-jobs N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from bench.corpus import write_site
+from generate_page import generate_pages_recursive
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    jobs_list = []
+    jobs = 1
+    while jobs < args.max_jobs:
+        jobs_list.append(jobs)
+        jobs *= 2
+    jobs_list.append(args.max_jobs)
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, template_path = write_site(root, args.pages)
+        baseline = None
+        for jobs in jobs_list:
+            dest_dir = os.path.join(root, f"docs-{jobs}")
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_dir, template_path, dest_dir, "/", jobs=jobs)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"jobs={jobs:3d}  {elapsed:8.3f}s  speedup {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
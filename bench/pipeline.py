@@ -0,0 +1,68 @@
+"""
+Compares sequential page generation with the pipelined generator while
+simulating filesystem latency, as on network filesystems or slow CI disks.
+
+Every markdown read and page write first sleeps for the given latency, which
+blocks the calling thread without holding the GIL, like a slow syscall does.
+Both generators write every page through generate_page.open_page, so both pay
+the same latency per write.
+
+    python3 -m bench.pipeline [--pages 1000] [--latency-ms 0 1 5] [--io-threads 4]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from unittest import mock
+
+import generate_page
+from bench.corpus import write_site
+from generate_page import find_pages, generate_pages, generate_pages_pipelined
+from template import load_template
+from url_resolver import UrlResolver
+
+
+def with_latency(function, seconds):
+    def slow(*args):
+        time.sleep(seconds)
+        return function(*args)
+    return slow
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0, 1, 5])
+    parser.add_argument("--io-threads", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, template_path = write_site(root, args.pages)
+        template = load_template(template_path)
+        resolver = UrlResolver("/")
+        pages = find_pages(content_dir, os.path.join(root, "docs"))
+
+        for latency_ms in args.latency_ms:
+            print(f"{args.pages} pages, {latency_ms:g} ms per read and per write")
+            runs = [("sequential", lambda: generate_pages(pages, template, resolver))]
+            for io_threads in args.io_threads:
+                runs.append((
+                    f"pipelined, {io_threads} I/O threads",
+                    lambda io_threads=io_threads: generate_pages_pipelined(pages, template, resolver, io_threads=io_threads),
+                ))
+            with mock.patch.object(generate_page, "read_markdown", with_latency(generate_page.read_markdown, latency_ms / 1000)), \
+                    mock.patch.object(generate_page, "open_page", with_latency(generate_page.open_page, latency_ms / 1000)):
+                baseline = None
+                for name, run in runs:
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        run()
+                    elapsed = time.perf_counter() - start
+                    baseline = baseline or elapsed
+                    print(f"  {name:28s} {elapsed:8.3f}s  speedup {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
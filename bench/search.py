@@ -0,0 +1,109 @@
+"""
+Measures building the search index for a large synthetic site: the time of a
+full build, of an update after one page changed and of an update after one
+page was deleted. With --memory it also reports the tracemalloc peak of each,
+which makes the times several times slower. Postings are spilled to disk
+every --spill postings, so the peak is bounded by that and the largest shard
+rather than by the number of pages.
+
+Pages are recorded in the manifest directly and their terms are gathered by
+parsing them once up front instead of rendering them, so only the indexing is
+measured; a build gathers the same terms while it renders each page.
+
+    python3 -m bench.search [--pages 1000 10000 50000] [--spill 200000] [--memory]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from bench.corpus import write_site
+from manifest import BuildManifest
+from markdown_blocks import parse_markdown
+from search_index import SPILL_POSTINGS, SearchIndexUpdate
+from url_resolver import UrlResolver
+
+
+def measure(trace, function, *args):
+    """
+    Returns (result, seconds, description of the peak bytes traced while running function).
+    """
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    peak = ""
+    if trace:
+        peak = f"  peak {tracemalloc.get_traced_memory()[1] / 2**20:7.1f} MiB"
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def record_pages(manifest, content_dir, dest_dir):
+    """
+    Records every page and returns {source path: terms}.
+    """
+    terms = {}
+    for dir_path, _, filenames in os.walk(content_dir):
+        for filename in filenames:
+            from_path = os.path.join(dir_path, filename)
+            dest_path = os.path.join(dest_dir, os.path.relpath(dir_path, content_dir), "index.html")
+            manifest.pages[from_path] = {
+                "dest": dest_path,
+                "deps": {from_path: manifest.file_hash(from_path)},
+                "meta": {"title": filename},
+            }
+            terms[from_path] = page_terms(from_path)
+    return terms
+
+
+def page_terms(from_path):
+    with open(from_path) as file:
+        return dict(parse_markdown(file.read())[1].terms)
+
+
+def index(manifest, dest_dir, resolver, spill, terms):
+    update = SearchIndexUpdate(manifest, dest_dir, spill)
+    for from_path, page in terms.items():
+        update.add(from_path, page)
+    return update.finish(resolver)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--spill", type=int, default=SPILL_POSTINGS)
+    parser.add_argument("--memory", action="store_true", help="trace the peak memory of each update")
+    args = parser.parse_args()
+
+    resolver = UrlResolver("/site/")
+    print(f"spilling every {args.spill:,d} postings")
+    for pages in args.pages:
+        with tempfile.TemporaryDirectory() as root:
+            content_dir, _ = write_site(root, pages)
+            dest_dir = os.path.join(root, "docs")
+            manifest = BuildManifest(os.path.join(dest_dir, "manifest.json"))
+            terms = record_pages(manifest, content_dir, dest_dir)
+
+            print(f"{pages} pages")
+            stats, seconds, peak = measure(args.memory, index, manifest, dest_dir, resolver, args.spill, terms)
+            print(f"  full     {seconds:8.2f} s{peak}  ({stats})")
+
+            changed = os.path.join(content_dir, "section0", "page0", "index.md")
+            with open(changed, "a") as file:
+                file.write("\nA freshly added paragraph.\n")
+            manifest.invalidate(changed)
+            manifest.pages[changed]["deps"][changed] = manifest.file_hash(changed)
+            changed_terms = {changed: page_terms(changed)}
+            stats, seconds, peak = measure(args.memory, index, manifest, dest_dir, resolver, args.spill, changed_terms)
+            print(f"  changed  {seconds:8.2f} s{peak}  ({stats})")
+
+            del manifest.pages[changed]
+            stats, seconds, peak = measure(args.memory, index, manifest, dest_dir, resolver, args.spill, {})
+            print(f"  deleted  {seconds:8.2f} s{peak}  ({stats})")
+
+
+if __name__ == "__main__":
+    main()
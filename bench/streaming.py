@@ -0,0 +1,91 @@
+"""
+Measures the peak memory of converting one very large markdown file, read
+whole versus streamed block by block, at several file sizes.
+
+Each conversion runs in a fresh process and reports its peak RSS, so the
+numbers are not skewed by memory an earlier run left allocated. Streaming
+should stay flat as the file grows; whole-file conversion grows with it.
+
+    python3 -m bench.streaming [--sizes-mb 10 40]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.corpus import TEMPLATE, PageSpec, make_page
+
+
+def write_large_markdown(path, size):
+    """
+    Writes a changelog-style page of about `size` bytes, one synthetic
+    section after another.
+    """
+    rng = random.Random(0)
+    spec = PageSpec(paragraphs=4, code_every=2)
+    written = 0
+    with open(path, "w") as file:
+        file.write("# Changelog\n\n")
+        release = 0
+        while written < size:
+            section = make_page(rng, f"Release {release}", spec).replace("# ", "## ", 1) + "\n\n"
+            file.write(section)
+            written += len(section)
+            release += 1
+
+
+def child(mode, source, template_path, dest_path):
+    from generate_page import render_page
+    from template import load_template
+    from url_resolver import UrlResolver
+
+    resolver = UrlResolver("/site/")
+    template = load_template(template_path, resolver=resolver)
+    threshold = 0 if mode == "streamed" else 1 << 62
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        render_page(source, template, dest_path, resolver, stream_threshold=threshold)
+    elapsed = time.perf_counter() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed} {peak_kib}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[10, 40])
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        template_path = os.path.join(root, "template.html")
+        with open(template_path, "w") as file:
+            file.write(TEMPLATE)
+        for size_mb in args.sizes_mb:
+            source = os.path.join(root, "changelog.md")
+            write_large_markdown(source, int(size_mb * 1024 * 1024))
+            print(f"{os.path.getsize(source) / 1024 / 1024:.0f} MiB of markdown")
+            outputs = []
+            for mode in ("whole", "streamed"):
+                dest_path = os.path.join(root, f"{mode}.html")
+                result = subprocess.run(
+                    [sys.executable, "-m", "bench.streaming", "--child", mode, source, template_path, dest_path],
+                    capture_output=True, text=True, check=True,
+                )
+                elapsed, peak_kib = result.stdout.split()
+                print(f"  {mode:8s} {float(elapsed):8.2f}s  peak RSS {int(peak_kib) / 1024:8.1f} MiB")
+                outputs.append(dest_path)
+            with open(outputs[0], "rb") as whole, open(outputs[1], "rb") as streamed:
+                print(f"  outputs identical: {whole.read() == streamed.read()}")
+
+
+if __name__ == "__main__":
+    main()
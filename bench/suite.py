@@ -0,0 +1,123 @@
+"""
+Per-stage benchmark suite for the whole pipeline.
+
+Each stage runs on the same deterministic corpus and reports the best of
+several runs. Results are written as JSON so two commits can be compared with
+bench.compare.
+
+    python3 -m bench.suite --output results.json [--pages 200] [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+from bench.corpus import PageSpec, TEMPLATE, make_pages, write_site
+from generate_page import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from markdown_blocks import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from template import compile_template
+
+
+def best_of(function, repeat):
+    """
+    Returns the fastest of `repeat` timed calls, in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def build_stages(pages, spec, site_pages):
+    """
+    Prepares the inputs of every stage and returns {name: (function, item count)}.
+    """
+    blocks = [block for markdown in pages for block in markdown_to_blocks(markdown)]
+    paragraphs = [block.replace("\n", " ") for block in blocks if not block.startswith(("#", "-", "1.", "```"))]
+    trees = [markdown_to_html_node(markdown) for markdown in pages]
+    bodies = [tree.to_html() for tree in trees]
+    template = compile_template(TEMPLATE, "/site/")
+
+    def end_to_end():
+        with tempfile.TemporaryDirectory() as root:
+            content_dir, template_path = write_site(root, site_pages, spec=spec)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_dir, template_path, os.path.join(root, "docs"), "/site/")
+
+    return {
+        "markdown_to_blocks": (lambda: [markdown_to_blocks(markdown) for markdown in pages], len(pages)),
+        "block_to_block_type": (lambda: [block_to_block_type(block) for block in blocks], len(blocks)),
+        "text_to_textnodes": (lambda: [text_to_textnodes(text) for text in paragraphs], len(paragraphs)),
+        "markdown_to_html_node": (lambda: [markdown_to_html_node(markdown) for markdown in pages], len(pages)),
+        "to_html": (lambda: [tree.to_html() for tree in trees], len(trees)),
+        "template": (lambda: [template.render({"Title": "Page", "Content": body}) for body in bodies], len(bodies)),
+        "generate_pages_recursive": (end_to_end, site_pages),
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_suite(pages=200, site_pages=200, repeat=5, spec=None, stages=None):
+    """
+    Runs the selected stages (all by default) and returns the results as a dict.
+    """
+    spec = spec or PageSpec()
+    markdown = make_pages(pages, spec)
+    results = {}
+    for name, (function, items) in build_stages(markdown, spec, site_pages).items():
+        if stages and name not in stages:
+            continue
+        seconds = best_of(function, repeat)
+        results[name] = {"seconds": seconds, "items": items, "us_per_item": seconds * 1e6 / max(items, 1)}
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pages": pages,
+            "site_pages": site_pages,
+            "repeat": repeat,
+            "spec": spec.as_dict(),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the per-stage benchmark suite")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--pages", type=int, default=200, help="pages used by the in-memory stages")
+    parser.add_argument("--site-pages", type=int, default=200, help="pages in the end-to-end build")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stage", action="append", help="only run this stage (repeatable)")
+    spec_defaults = PageSpec()
+    for name, value in spec_defaults.as_dict().items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    spec = PageSpec(**{name: getattr(args, name) for name in spec_defaults.as_dict()})
+    report = run_suite(args.pages, args.site_pages, args.repeat, spec, args.stage)
+    for name, result in report["results"].items():
+        print(f"{name:26s} {result['seconds'] * 1000:9.2f} ms  {result['us_per_item']:9.1f} us/item")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
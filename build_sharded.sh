@@ -0,0 +1,16 @@
+#!/bin/bash
+# Builds the site as N shards in parallel processes, the way N machines
+# would, then merges them into docs/. Usage: ./build_sharded.sh [N]
+count=${1:-4}
+basepath="/static-site-generator/"
+failed=0
+pids=()
+for i in $(seq 1 "$count"); do
+    python3 src/main.py "$basepath" --shard "$i/$count" --output "shards/$i" &
+    pids+=($!)
+done
+for pid in "${pids[@]}"; do
+    wait "$pid" || failed=1
+done
+python3 src/merge.py --basepath "$basepath" $(seq -f "shards/%g" 1 "$count") || failed=1
+exit $failed
@@ -0,0 +1,87 @@
+import sys
+from collections import OrderedDict
+
+
+class BlockCache:
+    """
+    A bounded LRU cache of rendered markdown blocks.
+
+    Blocks that repeat across pages (disclaimers, bios, link lists, code
+    snippets) are rendered once; later pages reuse the HTML fragment and skip
+    inline parsing entirely. Entries are evicted least recently used first once
+    the cached keys and fragments exceed max_bytes.
+
+    Attributes:
+        max_bytes (int): Memory cap for the cached keys and fragments.
+        hits (int): Lookups that found a fragment.
+        misses (int): Lookups that did not.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._workers = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, valid=None):
+        """
+        Returns the cached fragment for key, or None.
+
+        valid, if given, is called with the cached fragment; a fragment it
+        rejects is dropped and counts as a miss.
+        """
+        fragment = self._entries.get(key)
+        if fragment is not None and valid is not None and not valid(fragment):
+            self.size -= _entry_size(key, self._entries.pop(key))
+            fragment = None
+        if fragment is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return fragment
+
+    def put(self, key, fragment):
+        size = _entry_size(key, fragment)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.size -= _entry_size(key, self._entries.pop(key))
+        self._entries[key] = fragment
+        self.size += size
+        while self.size > self.max_bytes:
+            old_key, old_fragment = self._entries.popitem(last=False)
+            self.size -= _entry_size(old_key, old_fragment)
+
+    def add_stats(self, hits, misses, worker=None, blocks=0, size=0):
+        """
+        Adds the hit and miss counts of a cache in a worker process. The
+        blocks and bytes that worker's cache holds now replace the ones it
+        reported before, and are counted in the summary with this cache's own.
+        """
+        self.hits += hits
+        self.misses += misses
+        if worker is not None:
+            self._workers[worker] = (blocks, size)
+
+    def __repr__(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        blocks = len(self._entries) + sum(blocks for blocks, _ in self._workers.values())
+        size = self.size + sum(size for _, size in self._workers.values())
+        return (
+            f"{self.hits} hits, {self.misses} misses ({rate:.0%} hit rate), "
+            f"{blocks} blocks, {size / 1024 / 1024:.1f} MiB"
+        )
+
+
+def _entry_size(key, fragment):
+    # Blocks are cached as (HTML fragment, BlockFacts), which report their own size.
+    if isinstance(fragment, tuple):
+        return sys.getsizeof(key[1]) + sum(sys.getsizeof(item) for item in fragment)
+    return sys.getsizeof(key[1]) + sys.getsizeof(fragment)
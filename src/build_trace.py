@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+
+PAGE_STAGES = ("read", "block parse", "inline parse", "html render", "template fill", "write")
+
+
+class Span:
+    """
+    Times one traced region; use as a context manager.
+    """
+
+    __slots__ = ("tracer", "name", "category", "args", "start", "cpu_start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.cpu_start = time.thread_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        cpu = time.thread_time_ns() - self.cpu_start
+        self.tracer.record(self.name, self.category, self.start, end - self.start, cpu, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """
+    The tracer used when tracing is off. Every span is the same no-op object,
+    so untraced builds pay one method call per span and nothing else.
+    """
+
+    enabled = False
+
+    def span(self, name, category="stage", **args):
+        return _NULL_SPAN
+
+
+NULL_TRACER = NullTracer()
+
+
+class Tracer:
+    """
+    Records wall and CPU time of build spans as Chrome trace events.
+
+    Attributes:
+        events (list[dict]): Complete ("ph": "X") trace events, timestamps in microseconds.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.events = []
+
+    def span(self, name, category="stage", **args):
+        return Span(self, name, category, args)
+
+    def record(self, name, category, start_ns, wall_ns, cpu_ns, args):
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": wall_ns / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": dict(args, cpu_us=cpu_ns / 1000),
+        })
+
+    def extend(self, events):
+        """
+        Adds events recorded by another tracer, such as one in a worker process.
+        """
+        self.events.extend(events)
+
+    def page_totals(self):
+        """
+        Returns {page path: {"wall_us", "cpu_us", "stages": {stage: wall_us}}}.
+        """
+        pages = {}
+        for event in self.events:
+            page = event["args"].get("page")
+            if page is None:
+                continue
+            totals = pages.setdefault(page, {"wall_us": 0.0, "cpu_us": 0.0, "stages": {}})
+            if event["cat"] == "page":
+                totals["wall_us"] += event["dur"]
+                totals["cpu_us"] += event["args"]["cpu_us"]
+            else:
+                totals["stages"][event["name"]] = totals["stages"].get(event["name"], 0.0) + event["dur"]
+        return pages
+
+    def directory_totals(self, root):
+        """
+        Sums page wall time into every directory between each page and root.
+
+        Returns:
+            dict: {directory path: {"pages", "wall_us", "cpu_us"}}
+        """
+        root = os.path.normpath(root)
+        directories = {}
+        for page, totals in self.page_totals().items():
+            directory = os.path.dirname(os.path.normpath(page))
+            while True:
+                entry = directories.setdefault(directory, {"pages": 0, "wall_us": 0.0, "cpu_us": 0.0})
+                entry["pages"] += 1
+                entry["wall_us"] += totals["wall_us"]
+                entry["cpu_us"] += totals["cpu_us"]
+                if directory == root or not directory or directory == os.path.dirname(directory):
+                    break
+                directory = os.path.dirname(directory)
+        return directories
+
+    def slowest_pages(self, count):
+        pages = self.page_totals()
+        return sorted(pages.items(), key=lambda item: item[1]["wall_us"], reverse=True)[:count]
+
+    def write_chrome_trace(self, path, root, top=10):
+        """
+        Writes the events in Chrome trace-event format (loadable in
+        chrome://tracing or Perfetto), with the slowest pages and the
+        per-directory totals as extra keys.
+        """
+        with open(path, "w") as file:
+            json.dump({
+                "traceEvents": self.events,
+                "displayTimeUnit": "ms",
+                "slowestPages": [{"page": page, **totals} for page, totals in self.slowest_pages(top)],
+                "directoryTotals": self.directory_totals(root),
+            }, file)
+
+    def format_summary(self, root, top=10):
+        lines = [f"Slowest {top} pages (wall / cpu ms):"]
+        for page, totals in self.slowest_pages(top):
+            # Other stages, such as "stream" for very large pages, follow the usual ones.
+            names = [stage for stage in PAGE_STAGES if stage in totals["stages"]]
+            names += sorted(totals["stages"].keys() - set(PAGE_STAGES))
+            stages = ", ".join(f"{stage} {totals['stages'][stage] / 1000:.2f}" for stage in names)
+            lines.append(f"  {totals['wall_us'] / 1000:8.2f} / {totals['cpu_us'] / 1000:8.2f}  {page}  ({stages})")
+        lines.append("Directories (pages, wall ms):")
+        for directory, totals in sorted(self.directory_totals(root).items()):
+            lines.append(f"  {totals['pages']:6d} {totals['wall_us'] / 1000:10.2f}  {directory}")
+        return "\n".join(lines)
@@ -0,0 +1,144 @@
+import gzip
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from manifest import remove_empty_dirs
+
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".svg", ".xml", ".json", ".txt")
+
+
+class CompressStats:
+    """
+    Counts what a Compressor did, for the build summary.
+    """
+
+    def __init__(self):
+        self.compressed = []
+        self.fresh = 0
+        self.removed = []
+
+    def __repr__(self):
+        return f"{len(self.compressed)} compressed, {self.fresh} up to date, {len(self.removed)} removed"
+
+
+def gzip_file(path, level=9):
+    """
+    Writes path.gz next to path and gives it path's modification time.
+
+    The data is compressed in chunks, so memory use does not depend on the
+    file size, and the gzip header carries no name or timestamp, so the same
+    input always produces the same bytes.
+    """
+    gz_path = f"{path}.gz"
+    tmp_path = f"{gz_path}.tmp"
+    with open(path, "rb") as source, open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(filename="", mode="wb", compresslevel=level, fileobj=raw, mtime=0) as dest:
+            shutil.copyfileobj(source, dest, 1 << 20)
+    stat = os.stat(path)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path, gz_path)
+
+
+def is_fresh(path):
+    """
+    Returns True if path.gz exists and was compressed from the current path,
+    judged by the modification time gzip_file copies onto it.
+    """
+    try:
+        return os.stat(f"{path}.gz").st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+class Compressor:
+    """
+    Writes precompressed .gz sidecars for build outputs on a pool of threads.
+
+    Outputs are submitted as soon as they are written, so compression
+    overlaps with the rest of the build; zlib releases the GIL while it
+    compresses. After the build, sweep() catches every output whose sidecar
+    is missing or older than the output and deletes sidecars whose output is
+    gone, so an incremental build only recompresses what changed.
+
+    Attributes:
+        level (int): gzip compression level, 1 to 9.
+        min_size (int): Outputs smaller than this many bytes get no sidecar.
+        stats (CompressStats): What was compressed, left alone and removed.
+    """
+
+    def __init__(self, level=9, min_size=1024, jobs=4, suffixes=COMPRESSIBLE_SUFFIXES):
+        self.level = level
+        self.min_size = min_size
+        self.suffixes = suffixes
+        self.stats = CompressStats()
+        self._executor = ThreadPoolExecutor(max_workers=jobs)
+        self._futures = []
+        self._submitted = set()
+        self._lock = threading.Lock()
+
+    def wants(self, path):
+        path = str(path)
+        return path.endswith(self.suffixes)
+
+    def submit(self, path):
+        """
+        Compresses path in the background if it is a compressible output.
+
+        Safe to call from any thread.
+        """
+        path = os.path.normpath(path)
+        if not self.wants(path):
+            return
+        with self._lock:
+            if path in self._submitted:
+                return
+            self._submitted.add(path)
+            self._futures.append(self._executor.submit(self._compress, path))
+
+    def _compress(self, path):
+        if os.path.getsize(path) < self.min_size:
+            self._remove(f"{path}.gz")
+            return
+        gzip_file(path, self.level)
+        self.stats.compressed.append(f"{path}.gz")
+
+    def _remove(self, gz_path):
+        if os.path.isfile(gz_path):
+            os.remove(gz_path)
+            self.stats.removed.append(gz_path)
+
+    def sweep(self, dest_dir_path):
+        """
+        Submits every output under dest_dir_path whose sidecar is stale and
+        deletes sidecars whose output no longer exists. A .gz file is only
+        taken for a sidecar if the name without .gz is one the compressor
+        wants, so compressed static files such as data.tar.gz are left alone.
+        """
+        for dir_path, _, filenames in os.walk(dest_dir_path):
+            names = set(filenames)
+            for filename in sorted(filenames):
+                path = os.path.normpath(os.path.join(dir_path, filename))
+                if filename.endswith(".gz"):
+                    if self.wants(path[:-3]) and filename[:-3] not in names:
+                        self._remove(path)
+                        remove_empty_dirs(dir_path, dest_dir_path)
+                elif self.wants(path) and path not in self._submitted:
+                    if os.path.getsize(path) < self.min_size:
+                        self._remove(f"{path}.gz")
+                    elif is_fresh(path):
+                        self.stats.fresh += 1
+                    else:
+                        self.submit(path)
+
+    def close(self):
+        """
+        Waits for every submitted output and returns the stats.
+
+        Raises:
+            OSError: The first error a compression task raised, if any.
+        """
+        self._executor.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
+        return self.stats
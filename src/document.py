@@ -0,0 +1,168 @@
+import re
+import sys
+from collections import Counter
+from htmlnode import LeafNode
+
+SUMMARY_LENGTH = 200
+_ITEM_BREAK = LeafNode(None, " ")
+# What counts as a search term; a browser looking a word up tokenizes it the same way.
+MIN_TERM_LENGTH = 2
+TERM_PATTERN = re.compile(r"\w+")
+STOP_WORDS = frozenset((
+    "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "in", "is", "it", "its",
+    "of", "on", "or", "that", "the", "this", "to", "was", "were", "with",
+))
+
+
+class BlockFacts:
+    """
+    What one converted block contributes to its document's ParseResult.
+
+    Facts are immutable once made, so the BlockCache can hand the same facts
+    to every page a block repeats on.
+
+    Attributes:
+        heading (tuple, optional): (level, text) if the block is a heading.
+        words (int): Number of words of text in the block; code blocks have none.
+        images (tuple): (alt, url) of every image.
+        links (tuple): (text, url) of every link.
+        summary (str): The block's plain text, shortened to SUMMARY_LENGTH,
+            if it is a paragraph with text outside its links and images.
+        urls (tuple): (path, entry) of every URL the block resolved that has
+            an entry in the resolver's tables, see UrlResolver.entry.
+        terms (tuple): (term, count) of every search term in the block's
+            text, link text and image alt text; code blocks have none.
+    """
+
+    __slots__ = ("heading", "words", "images", "links", "summary", "urls", "terms")
+
+    def __init__(self, heading=None, words=0, images=(), links=(), summary="", urls=(), terms=()):
+        self.heading = heading
+        self.words = words
+        self.images = images
+        self.links = links
+        self.summary = summary
+        self.urls = urls
+        self.terms = terms
+
+    def __sizeof__(self):
+        return (
+            object.__sizeof__(self) + sys.getsizeof(self.heading) + sys.getsizeof(self.summary) +
+            sum(sys.getsizeof(text) + sys.getsizeof(url) for text, url in self.images + self.links) +
+            sum(sys.getsizeof(path) + sys.getsizeof(entry) for path, entry in self.urls) +
+            sum(sys.getsizeof(term) for term, _ in self.terms)
+        )
+
+
+class ParseResult:
+    """
+    Document metadata gathered while a page's blocks are converted to HTML,
+    so that feeds, tables of contents and search need not rescan the source.
+
+    URLs are recorded as they appear in the page, after resolving.
+
+    Attributes:
+        title (str, optional): Plain text of the first h1, or None if there is none.
+        outline (list of tuple): (level, text) of every heading, in order.
+        word_count (int): Words of text outside code blocks, image alt text excluded.
+        images (list of tuple): (alt, url) of every image, in order.
+        links (list of tuple): (text, url) of every link, in order.
+        summary (str): Plain text of the first paragraph that is more than
+            links and images, shortened to SUMMARY_LENGTH characters.
+        urls (dict): Maps the path of every URL with an entry in the
+            resolver's tables to that entry, which the page depends on.
+        terms (Counter): How often every search term occurs on the page.
+    """
+
+    def __init__(self):
+        self.title = None
+        self.outline = []
+        self.word_count = 0
+        self.images = []
+        self.links = []
+        self.summary = ""
+        self.urls = {}
+        self.terms = Counter()
+
+    def add(self, facts):
+        """
+        Adds the facts of the next block of the document.
+        """
+        if facts.heading is not None:
+            self.outline.append(facts.heading)
+            if self.title is None and facts.heading[0] == 1:
+                self.title = facts.heading[1]
+        self.word_count += facts.words
+        self.images.extend(facts.images)
+        self.links.extend(facts.links)
+        if not self.summary:
+            self.summary = facts.summary
+        self.urls.update(facts.urls)
+        for term, count in facts.terms:
+            self.terms[term] += count
+
+    def __repr__(self):
+        return f"ParseResult({self.title!r}, {self.word_count} words, {len(self.outline)} headings)"
+
+
+def block_facts(node, urls=()):
+    """
+    Returns the BlockFacts of a block's HTML node, resolved with the table
+    entries urls, as recorded by a RecordingResolver.
+    """
+    tag = node.tag
+    if tag == "pre":
+        return BlockFacts()
+
+    if tag == "ul" or tag == "ol":
+        # A space after every item keeps the text of two items apart.
+        leaves = []
+        for item in node.children:
+            leaves.extend(item.children)
+            leaves.append(_ITEM_BREAK)
+    else:
+        leaves = node.children
+
+    texts = []
+    images = []
+    links = []
+    has_text = False
+    for leaf in leaves:
+        leaf_tag = leaf.tag
+        if leaf_tag == "img":
+            images.append((leaf.props["alt"], leaf.props["src"]))
+            continue
+        if leaf_tag == "a":
+            links.append((leaf.value, leaf.props["href"]))
+        elif not has_text and leaf.value and not leaf.value.isspace():
+            has_text = True
+        texts.append(leaf.value)
+    words = "".join(texts).split()
+
+    text = " ".join(words)
+    heading = None
+    if tag[0] == "h" and len(tag) == 2:
+        heading = (int(tag[1]), text)
+    summary = ""
+    if tag == "p" and has_text:
+        summary = shorten(text)
+    terms = Counter(tokenize(text))
+    for alt, _ in images:
+        terms.update(tokenize(alt))
+    return BlockFacts(heading, len(words), tuple(images), tuple(links), summary, tuple(urls), tuple(terms.items()))
+
+
+def tokenize(text):
+    """
+    Returns the search terms of text, lowercased, in order.
+    """
+    return [term for term in TERM_PATTERN.findall(text.lower()) if len(term) >= MIN_TERM_LENGTH and term not in STOP_WORDS]
+
+
+def shorten(text, limit=SUMMARY_LENGTH):
+    """
+    Cuts text at a word boundary to at most limit characters, marking the cut with "...".
+    """
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "..."
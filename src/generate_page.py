@@ -1,52 +1,597 @@
+import contextlib
+import io
 import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from markdown_blocks import markdown_to_html_node
+from block_cache import BlockCache
+from build_trace import NULL_TRACER, Tracer
+from manifest import format_plan, hash_bytes
+from document import ParseResult, block_facts
+from markdown_blocks import BlockType, block_to_html_node, blocks_to_html_node, iter_block_nodes, iter_blocks
+from site_index import page_metadata, write_site_index
+from template import load_template
+from url_resolver import UrlResolver
+
+# Markdown files larger than this are converted block by block while they
+# are written, instead of being read and parsed whole.
+STREAM_THRESHOLD = 4 * 1024 * 1024
 
 def extract_title(markdown):
-    lines = markdown.split("\n")
-    
-    for line in lines:
-        if line.startswith("#"):
-            return line[2:].strip()    
-    
+    return title_from_lines(markdown.split("\n"))
+
+
+def title_from_lines(lines):
+    """
+    Returns the plain text of the first h1 in the markdown lines, scanning
+    only as far as that heading.
+
+    Page generation takes the title from the ParseResult instead; this is
+    for callers that need the title before the page is converted. Headings
+    are converted to tell an h1 apart, so both agree on which heading that
+    is, "#Title" included.
+
+    Raises:
+        ValueError: If there is no h1.
+    """
+    for block in iter_blocks(lines):
+        if block.block_type is BlockType.HEADING:
+            heading = block_facts(block_to_html_node(block)).heading
+            if heading[0] == 1:
+                return heading[1]
     raise ValueError("No title found")
+
+
+def require_title(result):
+    if result.title is None:
+        raise ValueError("No title found")
+    return result.title
    
    
    
-def generate_page(from_path, template_path, dest_path, basepath ):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    
-    # Step 5.2 - Read markdown file
+def generate_page(from_path, template_path, dest_path, basepath):
+    resolver = UrlResolver(basepath)
+    template = load_template(template_path, resolver=resolver)
+    render_page(from_path, template, dest_path, resolver)
+
+
+def render_page(from_path, template, dest_path, resolver, tracer=NULL_TRACER, cache=None,
+                stream_threshold=STREAM_THRESHOLD):
+    """
+    Converts one markdown file to HTML and streams it through a compiled Template.
+
+    With a Tracer, every stage is timed separately. The page is then rendered
+    to a string before it is written, so that HTML rendering, template filling
+    and the write each get their own span. A BlockCache lets repeated blocks
+    skip inline parsing. Files larger than stream_threshold bytes are handed
+    to stream_page instead, and traced as a single "stream" stage. The page
+    is minified if the template was.
+
+    Returns:
+        dict: What the page adds to its manifest entry, see rendered_entry.
+    """
+    print(f"Generating page from {from_path} to {dest_path} using {template.path}")
+    page = str(from_path)
+
+    if os.path.getsize(from_path) > stream_threshold:
+        with tracer.span("page", "page", page=page), tracer.span("stream", page=page):
+            return stream_page(from_path, template, dest_path, resolver, cache)
+
+    with tracer.span("page", "page", page=page):
+        with tracer.span("read", page=page):
+            markdown = read_markdown(from_path)
+
+        title, content, result = parse_page(markdown, resolver, page, tracer, cache, template.minify)
+
+        if not tracer.enabled:
+            with open_page(dest_path) as file:
+                template.write(file, {"Title": title, "Content": content})
+        else:
+            html = fill_template(template, title, content, page, tracer)
+            with tracer.span("write", page=page):
+                write_page(dest_path, html)
+    return rendered_entry(from_path, title, result, template)
+
+
+def stream_page(from_path, template, dest_path, resolver, cache=None):
+    """
+    Converts a markdown file of any size with memory bounded by its largest block.
+
+    A first pass over the file finds the title, which the template needs
+    before the content; it stops at the first h1. The second pass reads the
+    file line by line and scans, renders and writes one block at a time
+    straight into the template's content slot, gathering the ParseResult as
+    it goes. Like every page, it is written through open_page, so a block
+    that fails to convert never leaves a truncated page behind.
+
+    Returns:
+        dict: What the page adds to its manifest entry, see rendered_entry.
+    """
+    with open(from_path, "r") as file:
+        title = title_from_lines(line[:-1] if line.endswith("\n") else line for line in file)
+    result = ParseResult()
+    with open(from_path, "r") as file, open_page(dest_path) as out:
+        lines = (line[:-1] if line.endswith("\n") else line for line in file)
+        content = StreamedContent(iter_blocks(lines), resolver, cache, result)
+        template.write(out, {"Title": title, "Content": content})
+    return rendered_entry(from_path, title, result, template)
+
+
+def rendered_entry(from_path, title, result, template):
+    """
+    Returns what rendering a page gathered. Its manifest entry takes the
+    "meta", as returned by site_index.page_metadata, and the "urls", the
+    table entries of the URLs the page and its template resolved, see
+    UrlResolver.entry. The search index takes the "terms", {term: count}.
+    """
+    return {
+        "meta": page_metadata(from_path, title, result.summary),
+        "urls": {**template.urls, **result.urls},
+        "terms": dict(result.terms),
+    }
+
+
+def _collect(page, entry, rendered, indexed):
+    """
+    Hands the terms of a rendered page to indexed right away, so they are
+    never held for every page, and keeps the rest of its entry in rendered.
+    """
+    terms = entry.pop("terms")
+    if indexed is not None:
+        indexed(page, terms)
+    if rendered is not None:
+        rendered[page] = entry
+
+
+class StreamedContent:
+    """
+    A page body that is rendered block by block while it is written.
+
+    Writes the same <div> as blocks_to_html_node, but each block's node is
+    built, written and dropped before the next block is scanned. The facts of
+    every block are added to result, if given.
+    """
+
+    def __init__(self, blocks, resolver, cache=None, result=None):
+        self.blocks = blocks
+        self.resolver = resolver
+        self.cache = cache
+        self.result = result
+
+    def write_html(self, fp, minify=False):
+        fp.write("<div>")
+        for node in iter_block_nodes(self.blocks, self.cache, self.resolver, minify, self.result):
+            node.write_html(fp, minify)
+        fp.write("</div>")
+
+
+def read_markdown(from_path):
     with open(from_path, "r") as file:
-        markdown = file.read()
-    
-    # Step 5.3 - Read template file  
-    with open(template_path, "r") as file:
-        template = file.read()
-    
-    # Step 5.4 - Convert markdown to HTML (goes here, outside the with blocks)
-    html = markdown_to_html_node(markdown).to_html()
-    
-    # step 5.5 
-    title = extract_title(markdown)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', 'href="' + basepath)
-    template = template.replace('src="/', 'src="' + basepath)
-    
-    dest_dir_path = os.path.dirname(dest_path)
-    os.makedirs(dest_dir_path, exist_ok=True)
-    with open(dest_path, "w") as file:
-        file.write(template)
-        
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    
-    for filename in os.listdir(dir_path_content):
+        return file.read()
+
+
+def parse_page(markdown, resolver, page, tracer=NULL_TRACER, cache=None, minify=False):
+    """
+    Parses a page's markdown into its title, its HTML node tree, with link
+    and image URLs passed through the resolver, and its ParseResult, all in
+    one pass. minify only matters with a cache, whose fragments are stored
+    already rendered.
+
+    Raises:
+        ValueError: If the page has no h1 to take the title from.
+    """
+    with tracer.span("block parse", page=page):
+        blocks = list(iter_blocks(markdown.split("\n")))
+
+    with tracer.span("inline parse", page=page):
+        result = ParseResult()
+        content = blocks_to_html_node(blocks, cache, resolver, minify, result)
+    return require_title(result), content, result
+
+
+def fill_template(template, title, content, page, tracer=NULL_TRACER):
+    """
+    Renders the page content and fills the template with it.
+
+    Returns:
+        str: The finished page.
+    """
+    if not tracer.enabled:
+        buffer = io.StringIO()
+        template.write(buffer, {"Title": title, "Content": content})
+        return buffer.getvalue()
+
+    with tracer.span("html render", page=page):
+        buffer = io.StringIO()
+        content.write_html(buffer, template.minify)
+    with tracer.span("template fill", page=page):
+        return template.render({"Title": title, "Content": buffer.getvalue()})
+
+
+def write_page(dest_path, html):
+    with open_page(dest_path) as file:
+        file.write(html)
+
+
+@contextlib.contextmanager
+def open_page(dest_path):
+    """
+    Opens a page for writing. The page goes to a temporary file that
+    replaces dest_path only once it is complete, so a write that fails
+    partway never leaves a truncated page published.
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, "w") as file:
+            yield file
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, dest_path)
+
+
+def page_dependencies(from_path, template_path):
+    """
+    Returns the files a page is built from: its markdown and the template.
+    """
+    return [str(from_path), str(template_path)]
+
+
+def page_params(resolver, minify=False):
+    """
+    Returns the build parameters recorded with every page: the resolver's
+    settings and, if pages are minified, minify.
+    """
+    params = resolver.params()
+    if minify:
+        params["minify"] = True
+    return params
+
+
+class BuildError(Exception):
+    """
+    Raised after a build in which one or more pages failed to generate.
+
+    Attributes:
+        failures (list of tuple): (from_path, error message) for every failed page.
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(f"{len(failures)} page(s) failed to generate")
+
+
+def find_pages(dir_path_content, dest_dir_path):
+    """
+    Walks dir_path_content and pairs every markdown file with its output path.
+
+    Returns:
+        list of tuple: (from_path, dest_path) in a stable, sorted order.
+    """
+    pages = []
+    for filename in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
         if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+            pages.append((from_path, Path(dest_path).with_suffix(".html")))
+        else:
+            pages.extend(find_pages(from_path, dest_path))
+    return pages
+
+
+def page_shard(rel_path, count):
+    """
+    Returns the shard, from 1 to count, that builds the page at rel_path.
+
+    The shard is taken from a hash of the path relative to the content
+    directory, with "/" separators, so every machine and every run puts a
+    page in the same shard.
+    """
+    return int(hash_bytes(rel_path.replace(os.sep, "/").encode())[:8], 16) % count + 1
+
+
+def shard_pages(pages, dir_path_content, shard):
+    """
+    Returns the pages that belong to shard, an (index, count) pair.
+    """
+    index, count = shard
+    return [page for page in pages if page_shard(os.path.relpath(page[0], dir_path_content), count) == index]
+
+
+def generate_pages(pages, template, resolver, tracer=NULL_TRACER, cache=None, written=None, rendered=None,
+                   indexed=None):
+    """
+    Generates each (from_path, dest_path) page in turn with a compiled Template.
+
+    `written`, if given, is called with the destination path of every page
+    as soon as it has been written. `rendered`, if given, is a dict that
+    receives what render_page returns for every generated page but its
+    terms, keyed by its source path. `indexed`, if given, is called with the
+    source path and the terms of every page as soon as it is rendered.
+
+    Returns:
+        list of tuple: (from_path, error message or None) for every page.
+    """
+    results = []
+    for from_path, dest_path in pages:
+        try:
+            entry = render_page(from_path, template, dest_path, resolver, tracer, cache)
+        except Exception as error:
+            results.append((from_path, f"{type(error).__name__}: {error}"))
         else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
\ No newline at end of file
+            results.append((from_path, None))
+            _collect(str(from_path), entry, rendered, indexed)
+            if written is not None:
+                written(dest_path)
+    return results
+
+
+def generate_pages_pipelined(pages, template, resolver, tracer=NULL_TRACER, cache=None, io_threads=4, depth=16,
+                             stream_threshold=STREAM_THRESHOLD, written=None, rendered=None, indexed=None):
+    """
+    Generates pages with reads and writes overlapped with rendering.
+
+    `io_threads` reader threads load markdown into a bounded queue, the
+    calling thread parses and renders each page as it arrives, and
+    `io_threads` writer threads drain a second bounded queue of finished
+    pages. File I/O releases the GIL, so while one page is being rendered the
+    reads and writes of others are in flight. At most `depth` pages wait in
+    each queue, which bounds the memory held by the pipeline. Files larger
+    than stream_threshold bytes skip the queues and are streamed by the
+    calling thread with stream_page. `written` is called as in
+    generate_pages, from whichever thread wrote the page, and `rendered` and
+    `indexed` as in generate_pages, from the calling thread.
+
+    Returns:
+        list of tuple: (from_path, error message or None) for every page, in page order.
+    """
+    results = [None] * len(pages)
+    pending = queue.Queue()
+    for index, (from_path, dest_path) in enumerate(pages):
+        pending.put((index, from_path, dest_path))
+    read_queue = queue.Queue(maxsize=depth)
+    write_queue = queue.Queue(maxsize=depth)
+
+    def read():
+        while True:
+            try:
+                index, from_path, dest_path = pending.get_nowait()
+            except queue.Empty:
+                return
+            page = str(from_path)
+            try:
+                if os.path.getsize(from_path) > stream_threshold:
+                    markdown = None
+                else:
+                    with tracer.span("read", page=page):
+                        markdown = read_markdown(from_path)
+            except Exception as error:
+                read_queue.put((index, from_path, dest_path, None, error))
+            else:
+                read_queue.put((index, from_path, dest_path, markdown, None))
+
+    def write():
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            index, from_path, dest_path, html = item
+            try:
+                with tracer.span("write", page=str(from_path)):
+                    write_page(dest_path, html)
+            except Exception as error:
+                results[index] = (from_path, f"{type(error).__name__}: {error}")
+            else:
+                results[index] = (from_path, None)
+                if written is not None:
+                    written(dest_path)
+
+    readers = [threading.Thread(target=read, daemon=True) for _ in range(io_threads)]
+    writers = [threading.Thread(target=write, daemon=True) for _ in range(io_threads)]
+    for thread in readers + writers:
+        thread.start()
+
+    for _ in range(len(pages)):
+        index, from_path, dest_path, markdown, error = read_queue.get()
+        if error is None:
+            print(f"Generating page from {from_path} to {dest_path} using {template.path}")
+            page = str(from_path)
+            try:
+                if markdown is None:
+                    with tracer.span("page", "page", page=page), tracer.span("stream", page=page):
+                        entry = stream_page(from_path, template, dest_path, resolver, cache)
+                    results[index] = (from_path, None)
+                    _collect(page, entry, rendered, indexed)
+                    if written is not None:
+                        written(dest_path)
+                    continue
+                with tracer.span("render", "page", page=page):
+                    title, content, result = parse_page(markdown, resolver, page, tracer, cache, template.minify)
+                    html = fill_template(template, title, content, page, tracer)
+                    entry = rendered_entry(from_path, title, result, template)
+            except Exception as exception:
+                error = exception
+            else:
+                # A page whose write fails is still listed; the caller only
+                # uses the entries of pages without an error.
+                _collect(page, entry, rendered, indexed)
+                write_queue.put((index, from_path, dest_path, html))
+                continue
+        results[index] = (from_path, f"{type(error).__name__}: {error}")
+
+    for _ in writers:
+        write_queue.put(None)
+    for thread in readers + writers:
+        thread.join()
+    return results
+
+
+# Each worker process keeps one BlockCache for all the chunks it renders.
+_worker_cache = None
+
+
+def _generate_chunk(pages, template, resolver, trace, cache_bytes, io_threads, index):
+    global _worker_cache
+    cache = None
+    if cache_bytes:
+        if _worker_cache is None or _worker_cache.max_bytes != cache_bytes:
+            _worker_cache = BlockCache(cache_bytes)
+        cache = _worker_cache
+        hits, misses = cache.hits, cache.misses
+
+    tracer = Tracer() if trace else NULL_TRACER
+    rendered = {}
+    terms = {} if index else None
+    indexed = terms.__setitem__ if index else None
+    if io_threads:
+        results = generate_pages_pipelined(pages, template, resolver, tracer, cache, io_threads, rendered=rendered,
+                                           indexed=indexed)
+    else:
+        results = generate_pages(pages, template, resolver, tracer, cache, rendered=rendered, indexed=indexed)
+    stats = (cache.hits - hits, cache.misses - misses, os.getpid(), len(cache), cache.size) if cache else (0, 0)
+    return results, tracer.events if trace else [], stats, rendered, terms
+
+
+def generate_pages_parallel(pages, template, resolver, jobs, tracer=NULL_TRACER, cache=None, io_threads=0,
+                            written=None, rendered=None, indexed=None):
+    """
+    Generates pages on a pool of `jobs` worker processes.
+
+    Pages are sent to the workers in chunks to keep the per-task overhead low.
+    The results come back in the same order as the pages. Each worker traces
+    its own pages and keeps its own BlockCache of cache.max_bytes; their
+    events are merged into tracer, and their hit/miss counts and sizes into
+    cache. With
+    io_threads, every worker pipelines the I/O of its own chunks. `written`
+    is called for the pages of each chunk as the chunk completes, the
+    rendered entries the workers return are merged into `rendered`, and
+    `indexed` is called with the terms of the chunk's pages.
+    """
+    chunk_size = max(1, len(pages) // (jobs * 4))
+    chunks = [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        cache_bytes = cache.max_bytes if cache is not None else 0
+        futures = [
+            executor.submit(
+                _generate_chunk, chunk, template, resolver, tracer.enabled, cache_bytes, io_threads, indexed is not None
+            )
+            for chunk in chunks
+        ]
+        for chunk, future in zip(chunks, futures):
+            chunk_results, events, stats, chunk_rendered, chunk_terms = future.result()
+            results.extend(chunk_results)
+            if rendered is not None:
+                rendered.update(chunk_rendered)
+            if indexed is not None:
+                for page, terms in chunk_terms.items():
+                    indexed(page, terms)
+            if written is not None:
+                for (_, dest_path), (_, error) in zip(chunk, chunk_results):
+                    if error is None:
+                        written(dest_path)
+            if events:
+                tracer.extend(events)
+            if cache is not None:
+                cache.add_stats(*stats)
+    return results
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, manifest=None, jobs=1,
+                             tracer=NULL_TRACER, cache=None, explain=False, io_threads=0, resolver=None,
+                             written=None, minify=False, site_url=None, shard=None, search=None):
+    """
+    Generates an HTML page for every markdown file under dir_path_content.
+
+    URLs in the pages and the template are resolved with resolver, by
+    default a UrlResolver for basepath. The resolver's params are recorded as
+    build parameters, so pages are rebuilt when they change, and so are the
+    table entries of the URLs each page uses, so a page is rebuilt when one
+    of the static files it links to is fingerprinted again.
+
+    When a BuildManifest is given, the dirty pages are worked out from its
+    dependency graph before anything is rendered: pages whose input files and
+    basepath are unchanged since the last build are skipped, and every page
+    that is generated is recorded with its dependencies. With explain, the
+    dirty pages and the reasons they are dirty are printed first. With
+    jobs > 1 the pages are rendered on a process pool, and with io_threads
+    reads and writes overlap with rendering on that many threads. A Tracer
+    records the time of every page and stage, and a BlockCache memoizes blocks
+    that repeat across pages. `written` is called with the destination of
+    every page once it is written, for example to compress it. With minify,
+    the template and the pages are minified, which is also recorded as a
+    build parameter.
+
+    The title, summary and modification time of every page are gathered
+    while it renders and recorded in the manifest. With site_url, sitemap.xml
+    and the section feeds are then written from that index, which holds the
+    fresh metadata of the pages just rendered and the recorded metadata of
+    the pages that were skipped, so no markdown is read twice.
+
+    With shard, an (index, count) pair, only the pages page_shard assigns to
+    that shard are built. Their manifest entries carry their metadata, so
+    merge.py can write the site index once the shards are combined. Pages of
+    other shards count as deleted in this shard's manifest.
+
+    With search, a search_index.SearchIndexUpdate or ShardTerms, the pages
+    whose terms it lacks are rebuilt too, and the terms every page gathered
+    while it rendered are added to it as soon as the page is done.
+
+    Raises:
+        BuildError: If any page failed. The other pages are still generated.
+    """
+    pages = find_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        pages = shard_pages(pages, dir_path_content, shard)
+    resolver = resolver or UrlResolver(basepath)
+    dependencies = lambda from_path: page_dependencies(from_path, template_path)
+    params = page_params(resolver, minify)
+
+    all_pages = pages
+    if manifest is not None:
+        dirty = manifest.plan(pages, dependencies, params, resolver=resolver, extra=search and search.stale_reason)
+        if explain:
+            print(format_plan(dirty, len(pages)))
+        pages = [page for page in pages if page[0] in dirty]
+
+    template = load_template(template_path, resolver=resolver, minify=minify) if pages else None
+    rendered = {}
+    indexed = search and search.add
+    if jobs > 1 and len(pages) > 1:
+        results = generate_pages_parallel(pages, template, resolver, jobs, tracer, cache, io_threads, written, rendered,
+                                          indexed)
+    elif io_threads:
+        results = generate_pages_pipelined(pages, template, resolver, tracer, cache, io_threads, written=written,
+                                           rendered=rendered, indexed=indexed)
+    else:
+        results = generate_pages(pages, template, resolver, tracer, cache, written, rendered, indexed)
+
+    failures = []
+    for (from_path, dest_path), (_, error) in zip(pages, results):
+        if error is not None:
+            failures.append((from_path, error))
+            rendered.pop(str(from_path), None)
+        elif manifest is not None:
+            entry = rendered[str(from_path)]
+            manifest.record(from_path, dest_path, dependencies(from_path), params, entry["meta"], entry["urls"])
+            manifest.generated += 1
+
+    if site_url is not None:
+        index = {}
+        for from_path, dest_path in all_pages:
+            entry = rendered.get(str(from_path))
+            if entry is None and manifest is not None:
+                entry = manifest.pages.get(str(from_path))
+            if entry is not None:
+                index[dest_path] = entry["meta"]
+        recorded = manifest.record_output if manifest is not None else None
+        for path in write_site_index(index, dest_dir_path, site_url, resolver, recorded=recorded):
+            print(f"Wrote {path}")
+            if written is not None:
+                written(path)
+
+    if failures:
+        raise BuildError(failures)
@@ -1,3 +1,24 @@
+import re
+
+# Attribute values that may be written without quotes: non-empty and free of
+# whitespace, quotes, "=", "<", ">" and backticks. Braces are excluded as well,
+# so that a {{ Slot }} inside a template attribute keeps its quotes.
+UNQUOTED_VALUE_PATTERN = re.compile(r"[^\s\"'=<>`{}]+")
+
+# Elements that never have content; minified output drops their end tag.
+VOID_ELEMENTS = frozenset(("area", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"))
+
+
+def format_attribute(attribute, value, minify=False):
+    """
+    Returns attribute="value", or attribute=value when minifying and the
+    value does not need quotes.
+    """
+    if minify and UNQUOTED_VALUE_PATTERN.fullmatch(value):
+        return f"{attribute}={value}"
+    return f'{attribute}="{value}"'
+
+
 class HTMLNode:
     """
     Represents a generic node in an HTML document structure.
@@ -9,10 +30,21 @@ class HTMLNode:
         props (dict, optional): A dictionary of HTML attributes (e.g., {"class": "my-class", "href": "#"}).
 
     Methods:
-        to_html(): Abstract method intended to return a string representation of the node in HTML format.
-        props_to_html(): Converts the props dictionary into a string of HTML attributes.
+        to_html(minify): Abstract method intended to return a string representation of the node in HTML format.
+        write_html(fp, minify): Writes the node's HTML to a file-like object chunk by chunk.
+        render(write, minify): Passes the node's HTML to a write callable chunk by chunk.
+        props_to_html(minify): Converts the props dictionary into a string of HTML attributes.
+
+    Nodes use __slots__ instead of a per-instance __dict__, since a large page
+    creates tens of thousands of them. Empty props are stored as None.
+
+    With minify, attribute values that do not need quotes are written without
+    them and void elements get no end tag. Text is never touched, so the
+    content of <pre> and <code> comes out exactly as it went in.
     """
 
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None) -> None:
         """
         Initializes an HTMLNode instance.
@@ -26,9 +58,9 @@ class HTMLNode:
         self.tag = tag
         self.value = value
         self.children = children
-        self.props = props
+        self.props = props or None
 
-    def to_html(self):
+    def to_html(self, minify=False):
         """
         Converts the HTMLNode into an HTML string.
 
@@ -39,7 +71,26 @@ class HTMLNode:
         """
         raise NotImplementedError
 
-    def props_to_html(self):
+    def write_html(self, fp, minify=False):
+        """
+        Writes the node's HTML to fp without building the whole string first.
+
+        Parameters:
+            fp: Any object with a write(str) method, such as an open text file.
+            minify (bool): Write the minified form of the HTML.
+        """
+        self.render(fp.write, minify)
+
+    def render(self, write, minify=False):
+        """
+        Passes the node's HTML to the write callable in one or more chunks.
+
+        Subclasses override this to stream their output; the default writes
+        the result of to_html() as a single chunk.
+        """
+        write(self.to_html(minify))
+
+    def props_to_html(self, minify=False):
         """
         Converts the props dictionary into a string suitable for HTML attributes.
 
@@ -50,12 +101,7 @@ class HTMLNode:
         if self.props is None:
             return ""
 
-        string = ""
-
-        for attribute, value in self.props.items():
-            string += f'{attribute}="{value}" '
-
-        return string.strip()
+        return " ".join(format_attribute(attribute, value, minify) for attribute, value in self.props.items())
 
     def __repr__(self) -> str:
         """
@@ -83,6 +129,8 @@ class LeafNode(HTMLNode):
         to_html(): Returns the HTML string for this node.
     """
 
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         """
         Initializes a LeafNode instance.
@@ -94,7 +142,7 @@ class LeafNode(HTMLNode):
         """
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def to_html(self, minify=False):
         """
         Converts the LeafNode to an HTML string.
 
@@ -111,10 +159,11 @@ class LeafNode(HTMLNode):
         if self.tag is None:
             return self.value
 
-        if self.props:
-            return f"<{self.tag} {self.props_to_html()}>{self.value}</{self.tag}>"
+        start = f"<{self.tag} {self.props_to_html(minify)}>" if self.props else f"<{self.tag}>"
+        if minify and not self.value and self.tag in VOID_ELEMENTS:
+            return start
 
-        return f"<{self.tag}>{self.value}</{self.tag}>"
+        return f"{start}{self.value}</{self.tag}>"
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
@@ -137,8 +186,11 @@ class ParentNode(HTMLNode):
 
     Methods:
         to_html(): Converts the node and its children into an HTML string.
+        render(write): Streams the node and its children to a write callable.
     """
 
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None) -> None:
         """
         Initializes a ParentNode instance.
@@ -150,13 +202,24 @@ class ParentNode(HTMLNode):
         """
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, minify=False):
         """
         Converts the ParentNode and its children into an HTML string.
 
         Returns:
             str: The HTML string representing the tag and its children.
 
+        Raises:
+            ValueError: If tag is missing or children are not provided.
+        """
+        chunks = []
+        self.render(chunks.append, minify)
+        return "".join(chunks)
+
+    def render(self, write, minify=False):
+        """
+        Writes the opening tag, then each child's chunks, then the closing tag.
+
         Raises:
             ValueError: If tag is missing or children are not provided.
         """
@@ -166,15 +229,13 @@ class ParentNode(HTMLNode):
         if self.children is None or len(self.children) == 0:
             raise ValueError("invalid HTML: no children")
 
-        html_children = ""
-
-        for child in self.children:
-            html_children += child.to_html()
-
         # Add a space before attributes only if props exist
-        props_str = f" {self.props_to_html()}" if self.props else ""
+        props_str = f" {self.props_to_html(minify)}" if self.props else ""
 
-        return f"<{self.tag}{props_str}>{html_children}</{self.tag}>"
+        write(f"<{self.tag}{props_str}>")
+        for child in self.children:
+            child.render(write, minify)
+        write(f"</{self.tag}>")
 
     def __repr__(self) -> str:
         return f"ParentNode({self.tag}, children: {self.children}, props: {self.props})"
@@ -0,0 +1,92 @@
+import struct
+
+# Static files whose pixel size is read, so pages can reserve their space.
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+# JPEG start-of-frame markers, which carry the image size. 0xC4, 0xC8 and 0xCC
+# fall in the same range but are not frames.
+_JPEG_FRAMES = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# EXIF orientations that turn the image on its side.
+_TRANSPOSED = frozenset((5, 6, 7, 8))
+
+
+def read_image_size(path):
+    """
+    Reads the pixel width and height of a PNG, GIF, WebP or JPEG image from
+    its header, without decoding the image.
+
+    Browsers display a JPEG upright according to its EXIF orientation, so a
+    JPEG turned on its side has its width and height swapped.
+
+    Returns:
+        tuple: (width, height), or None if the file is not an image in one of
+        these formats or is truncated.
+    """
+    try:
+        with open(path, "rb") as file:
+            head = file.read(30)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return _webp_size(head)
+            if head[:2] == b"\xff\xd8":
+                file.seek(2)
+                return _jpeg_size(file)
+    except struct.error:
+        pass
+    return None
+
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20:21] == b"\x2f":
+        bits = struct.unpack("<I", head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) == 30:
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpeg_size(file):
+    """
+    Walks the segments of a JPEG up to its first frame header.
+    """
+    transposed = False
+    while True:
+        if file.read(1) != b"\xff":
+            return None
+        marker = file.read(1)
+        while marker == b"\xff":
+            marker = file.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            return None
+        length = struct.unpack(">H", file.read(2))[0]
+        segment = file.read(length - 2)
+        if marker in _JPEG_FRAMES:
+            height, width = struct.unpack(">HH", segment[1:5])
+            return (height, width) if transposed else (width, height)
+        if marker == 0xE1 and segment.startswith(b"Exif\0\0"):
+            transposed = _exif_orientation(segment[6:]) in _TRANSPOSED
+
+
+def _exif_orientation(tiff):
+    order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if order is None:
+        return None
+    offset = struct.unpack(order + "I", tiff[4:8])[0]
+    count = struct.unpack(order + "H", tiff[offset:offset + 2])[0]
+    for index in range(count):
+        entry = offset + 2 + index * 12
+        tag, _, _, value = struct.unpack(order + "HHIH", tiff[entry:entry + 10])
+        if tag == 0x0112:
+            return value
+    return None
@@ -2,15 +2,133 @@ import re
 
 from textnode import TextNode, TextType
 
+IMAGE_PATTERN = re.compile(r"!\[((?:[^\[\]]|(?:\[[^\[\]]*\]))*)\]\(([^()]*(?:\([^()]*\)[^()]*)*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[((?:[^\[\]]|(?:\[[^\[\]]*\]))*)\]\(([^()]*(?:\([^()]*\)[^()]*)*)\)")
+IMAGE_OR_LINK_PATTERN = re.compile(r"(!?)\[((?:[^\[\]]|(?:\[[^\[\]]*\]))*)\]\(([^()]*(?:\([^()]*\)[^()]*)*)\)")
+
+# Delimiters in the order they take precedence: text inside a pair is never
+# split by a later delimiter.
+DELIMITERS = (
+    ("**", TextType.BOLD),
+    ("_", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """
+    Tokenizes inline markdown into a list of TextNodes in one left-to-right pass.
+
+    Produces the same nodes as running split_nodes_delimiter for bold, italic
+    and code, then split_nodes_image and split_nodes_link, but works on offsets
+    into the original string and appends straight to a single output list.
+
+    Raises:
+        ValueError: If a delimiter is opened but not properly closed.
+    """
+    nodes = []
+    _tokenize(text, 0, len(text), 0, nodes)
     return nodes
 
+
+def _tokenize(text, start, end, level, nodes):
+    # Skip straight past delimiters that do not occur in this span.
+    while level < len(DELIMITERS):
+        delimiter, text_type = DELIMITERS[level]
+        count = text.count(delimiter, start, end)
+        if count:
+            break
+        level += 1
+    else:
+        _tokenize_images_and_links(text, start, end, nodes)
+        return
+
+    if count % 2 == 1:
+        raise ValueError("invalid markdown, formatted section not closed")
+
+    inside_delimiter = False
+    position = start
+    while True:
+        found = text.find(delimiter, position, end)
+        stop = end if found == -1 else found
+        if inside_delimiter:
+            nodes.append(TextNode(text[position:stop], text_type))
+        else:
+            _tokenize(text, position, stop, level + 1, nodes)
+        if found == -1:
+            return
+        position = found + len(delimiter)
+        inside_delimiter = not inside_delimiter
+
+
+def _tokenize_images_and_links(text, start, end, nodes):
+    if text.find("](", start, end) == -1:
+        # Neither an image nor a link can start here.
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+        return
+
+    # The text between delimiters always begins after a delimiter, never
+    # after "!", so matching with pos/endpos behaves like matching a slice.
+    _split_images_and_links(text, start, end, nodes)
+
+
+def _split_images_and_links(text, start, end, nodes):
+    if text.find("![", start, end) == -1:
+        # Links only, as on index and sitemap pages.
+        _split_on_pattern(text, start, end, LINK_PATTERN, TextType.LINK, nodes)
+        return
+
+    mark = len(nodes)
+    if _split_on_pattern(text, start, end, IMAGE_OR_LINK_PATTERN, None, nodes):
+        return
+
+    # An image inside a link. Images take precedence, as they did
+    # when images and links were split in separate passes.
+    del nodes[mark:]
+    position = start
+    for match in IMAGE_PATTERN.finditer(text, start, end):
+        if match.start() > position:
+            _split_on_pattern(text, position, match.start(), LINK_PATTERN, TextType.LINK, nodes)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    if position == start or position < end:
+        _split_on_pattern(text, position, end, LINK_PATTERN, TextType.LINK, nodes)
+
+
+def _split_on_pattern(text, start, end, pattern, text_type, nodes):
+    """
+    Appends the image/link nodes matched in text[start:end] and the text
+    between them to nodes, using the match offsets directly.
+
+    With text_type None the pattern is IMAGE_OR_LINK_PATTERN and each match's
+    leading "!" decides between an image and a link. Empty text between
+    matches is dropped; a span without any match is appended as-is.
+
+    Returns:
+        bool: False if, with IMAGE_OR_LINK_PATTERN, an image starts inside a
+              link; nodes is then left partially filled.
+    """
+    matched = False
+    position = start
+    for match in pattern.finditer(text, start, end):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        if text_type is None:
+            bang, alt_or_text, url = match.groups()
+            if bang:
+                nodes.append(TextNode(alt_or_text, TextType.IMAGE, url))
+            elif _overlaps_image(text, match, end):
+                return False
+            else:
+                nodes.append(TextNode(alt_or_text, TextType.LINK, url))
+        else:
+            nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        position = match.end()
+        matched = True
+    if not matched or position < end:
+        nodes.append(TextNode(text[position:end], TextType.TEXT))
+    return True
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     """
     Splits TextNodes based on paired delimiters and wraps the content between them in a new TextType.
@@ -71,7 +189,7 @@ def extract_markdown_images(text):
     """
    
 
-    return re.findall(r"!\[((?:[^\[\]]|(?:\[[^\[\]]*\]))*)\]\(([^()]*(?:\([^()]*\)[^()]*)*)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
@@ -89,80 +207,52 @@ def extract_markdown_links(text):
     """
     
     
-    return re.findall(r"(?<!!)\[((?:[^\[\]]|(?:\[[^\[\]]*\]))*)\]\(([^()]*(?:\([^()]*\)[^()]*)*)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
-        
-        for image in images:  
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            
-            new_nodes.append(TextNode(image[0], TextType.IMAGE, image[1]))
-            
-            original_text = sections[1]
-            
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    
-    return new_nodes
+    """
+    Splits TEXT nodes around markdown images, using the match offsets.
+
+    Args:
+        old_nodes (list of TextNode): The list of nodes to process.
+
+    Returns:
+        list of TextNode: The nodes with every image turned into an IMAGE node.
+    """
+    return _split_nodes_on_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
+
 
 def split_nodes_link(old_nodes):
+    """
+    Splits TEXT nodes around markdown links (not images), using the match offsets.
+    """
+    return _split_nodes_on_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
+
+
+def split_nodes_images_and_links(old_nodes):
+    """
+    Splits TEXT nodes around markdown images and links in a single scan.
+    """
+    return _split_nodes_on_pattern(old_nodes, IMAGE_OR_LINK_PATTERN, None)
+
+
+def _overlaps_image(text, link_match, end):
+    image_start = text.find("![", link_match.start(), link_match.end())
+    if image_start == -1:
+        return False
+    image = IMAGE_PATTERN.search(text, image_start, end)
+    return image is not None and image.start() < link_match.end()
+
+
+def _split_nodes_on_pattern(old_nodes, pattern, text_type):
     new_nodes = []
-    
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
-            continue
-        
-        original_text = old_node.text
-        
-        links = extract_markdown_links(original_text)
-
-        
-        if len(links) == 0:
-            new_nodes.append(old_node)
-            continue
-        
-        for link in links:  
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-          
-            
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            
-            
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            
-            original_text = sections[1]
-            
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    
- 
+        elif text_type is None:
+            _split_images_and_links(old_node.text, 0, len(old_node.text), new_nodes)
+        else:
+            _split_on_pattern(old_node.text, 0, len(old_node.text), pattern, text_type, new_nodes)
     return new_nodes
-            
-
-
-        
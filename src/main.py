@@ -1,39 +1,137 @@
+import argparse
 import os
 import shutil
 import sys
-from generate_page import generate_pages_recursive
+from block_cache import BlockCache
+from build_trace import NULL_TRACER, Tracer
+from compress import Compressor
+from generate_page import BuildError, generate_pages_recursive
+from manifest import BuildManifest
+from search_index import SearchIndexUpdate, ShardTerms
+from static_sync import scan_static, sync_static
+from url_resolver import FingerprintResolver, UrlResolver
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else '/'
-    print("Deleting Public Directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
-
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
-    
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
-
-    
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
-
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        
-        print(f" * {from_path} -> {dest_path}")      
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
+
+def make_resolver(basepath, stats, fingerprint):
+    """
+    Returns the resolver for the fingerprints and image sizes in stats, the SyncStats of the static files.
+    """
+    if fingerprint:
+        return FingerprintResolver(basepath, stats.fingerprints, stats.image_sizes)
+    return UrlResolver(basepath, stats.image_sizes)
+
+
+def parse_shard(text):
+    """
+    Parses the I/N argument of --shard into (I, N).
+    """
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, such as 1/4, got {text!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} does not exist in {count} shards")
+    return index, count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into ./docs")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served from")
+    parser.add_argument("--output", default=dir_path_public, metavar="DIR", help="directory the site is built into")
+    parser.add_argument("--manifest", metavar="FILE", help="build manifest to use (default: .<output name>-manifest.json next to the output)")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N", help="build only the I-th of N shards of the pages, for merge.py to combine")
+    parser.add_argument("--clean", action="store_true", help="delete the output directory and rebuild every page")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="render pages on N worker processes (0 = one per CPU)")
+    parser.add_argument("--io-threads", type=int, default=0, metavar="N", help="overlap reads and writes with rendering on N threads, for slow or network disks")
+    parser.add_argument("--static-compare", choices=("mtime", "hash"), default="mtime", help="how to detect changed static files")
+    parser.add_argument("--fingerprint", action="store_true", help="copy assets to name.<hash>.ext and point links at the copies")
+    parser.add_argument("--hardlink", action="store_true", help="hardlink static files into the output instead of copying them")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace of every page and stage to FILE")
+    parser.add_argument("--trace-top", type=int, default=10, metavar="N", help="slowest pages listed in the trace summary")
+    parser.add_argument("--explain", action="store_true", help="print which pages need rebuilding and why before rendering")
+    parser.add_argument("--site-url", metavar="URL", help="scheme and host the site is served from; writes sitemap.xml and blog/feed.xml")
+    parser.add_argument("--search-index", action="store_true", help="write a sharded client-side search index to search/; shards keep the search terms of their pages for merge.py --search-index")
+    parser.add_argument("--minify", action="store_true", help="minify the HTML of the template and the pages")
+    parser.add_argument("--gzip", action="store_true", help="write precompressed .gz copies of pages and text assets")
+    parser.add_argument("--gzip-level", type=int, default=9, choices=range(1, 10), metavar="1-9", help="gzip compression level")
+    parser.add_argument("--gzip-min-bytes", type=int, default=1024, metavar="N", help="do not compress outputs smaller than N bytes")
+    parser.add_argument("--block-cache-mb", type=float, default=64, metavar="MB", help="memory cap of the repeated-block cache (0 disables it)")
+    args = parser.parse_args(argv)
+    if args.shard is not None:
+        for flag, enabled in (("--site-url", args.site_url), ("--gzip", args.gzip)):
+            if enabled:
+                parser.error(f"{flag} covers the whole site; pass it to merge.py instead of --shard builds")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    basepath = args.basepath
+    jobs = args.jobs or os.cpu_count() or 1
+    output = args.output
+
+    if args.clean and os.path.exists(output):
+        print("Deleting Public Directory...")
+        shutil.rmtree(output)
+
+    tracer = Tracer() if args.trace else NULL_TRACER
+    cache = BlockCache(int(args.block_cache_mb * 1024 * 1024)) if args.block_cache_mb > 0 else None
+    manifest = BuildManifest.load(output, args.manifest)
+    compressor = Compressor(args.gzip_level, args.gzip_min_bytes, jobs=max(2, jobs)) if args.gzip else None
+    written = compressor.submit if compressor is not None else None
+    if args.shard is None:
+        stats = sync_static(
+            dir_path_static, output, manifest, args.static_compare, args.hardlink, fingerprint=args.fingerprint
+        )
+        print(f"Static files: {stats}")
+    else:
+        # merge.py makes the one copy of the static files; a shard only needs their URLs and image sizes.
+        manifest.assets, stats = scan_static(dir_path_static, manifest.assets, args.static_compare, args.fingerprint)
+    resolver = make_resolver(basepath, stats, args.fingerprint)
+    if compressor is not None:
+        for dest_path in stats.copied:
+            compressor.submit(dest_path)
+
+    search = None
+    if args.search_index:
+        search = SearchIndexUpdate(manifest, output) if args.shard is None else ShardTerms(manifest)
+
+    failures = []
+    try:
+        generate_pages_recursive(
+            dir_path_content, template_path, output, basepath, manifest, jobs=jobs, tracer=tracer, cache=cache,
+            explain=args.explain, io_threads=args.io_threads, resolver=resolver, written=written, minify=args.minify,
+            site_url=args.site_url, shard=args.shard, search=search,
+        )
+    except BuildError as error:
+        failures = error.failures
+    for dest_path in manifest.prune():
+        print(f"Removed stale file {dest_path}")
+    if search is not None:
+        print(f"Search index: {search.finish(resolver)}")
+    manifest.save()
+    shard = "" if args.shard is None else f"Shard {args.shard[0]}/{args.shard[1]}: "
+    print(f"{shard}{manifest.generated} pages generated, {manifest.skipped} up to date")
+    if compressor is not None:
+        compressor.sweep(output)
+        print(f"Gzip: {compressor.close()}")
+    if cache is not None:
+        print(f"Block cache: {cache}")
+
+    if args.trace:
+        tracer.write_chrome_trace(args.trace, dir_path_content, args.trace_top)
+        print(tracer.format_summary(dir_path_content, args.trace_top))
+
+    if failures:
+        for from_path, message in failures:
+            print(f"Failed to generate {from_path}: {message}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+
+
+def manifest_path(dest_dir_path):
+    """
+    Returns where the manifest of a build into dest_dir_path is kept by
+    default: a hidden file next to the output directory, ./.docs-manifest.json
+    for ./docs, so it is neither deployed nor committed with the site.
+    """
+    dest_dir_path = os.path.normpath(dest_dir_path)
+    return os.path.join(os.path.dirname(dest_dir_path), f".{os.path.basename(dest_dir_path)}-manifest.json")
+
+
+def hash_bytes(data):
+    """
+    Returns the hex digest used to fingerprint build inputs.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    """
+    Hashes a file's contents in fixed-size chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Records the dependency graph of the last build so that later builds can
+    work out which pages a set of changed inputs affects, and skip the rest.
+
+    The manifest is a JSON file stored next to the output directory, see
+    manifest_path, so it is not published with the site. Each page entry
+    is keyed by the markdown source path and holds the destination path, the
+    hash of every file the page was built from (its markdown, the template and
+    any other shared input), the build parameters, such as the basepath, the
+    entries of the static file tables its URLs were resolved with, and
+    the page metadata gathered while it rendered, for the sitemap and feeds.
+    The other files the build wrote from that metadata, such as sitemap.xml,
+    are listed too, so a build that no longer writes one deletes it.
+
+    Attributes:
+        path (str): Location of the manifest file.
+        dest_dir_path (str): The output directory the manifest describes.
+        pages (dict): Maps a source path to its recorded entry.
+        assets (dict): Maps the relative path of every synced static file to its entry.
+        search (dict): The state of the search index, kept by search_index.SearchIndexUpdate.
+        outputs (list): Paths of the files besides the pages that the last build wrote, see record_output.
+    """
+
+    def __init__(self, path, pages=None, assets=None, search=None, dest_dir_path=None, outputs=None):
+        self.path = path
+        self.dest_dir_path = dest_dir_path if dest_dir_path is not None else os.path.dirname(path)
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else {}
+        self.search = search if search is not None else {}
+        self.outputs = outputs if outputs is not None else []
+        self.generated = 0
+        self.skipped = 0
+        self._seen = set()
+        self._outputs = set()
+        self._file_hashes = {}
+
+    @classmethod
+    def load(cls, dest_dir_path, path=None):
+        """
+        Loads the manifest of the build into dest_dir_path from path, by
+        default manifest_path(dest_dir_path), or returns an empty one if there
+        is none or it cannot be read.
+        """
+        path = path or manifest_path(dest_dir_path)
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(path, dest_dir_path=dest_dir_path)
+        return cls(
+            path, data.get("pages", {}), data.get("assets", {}), data.get("search", {}), dest_dir_path,
+            data.get("outputs", []),
+        )
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as file:
+            data = {"pages": self.pages, "assets": self.assets, "search": self.search, "outputs": self.outputs}
+            json.dump(data, file, indent=1, sort_keys=True)
+
+    def file_hash(self, path):
+        """
+        Hashes an input file once per build.
+
+        Returns:
+            str or None: The hash, or None if the file does not exist.
+        """
+        path = str(path)
+        if path not in self._file_hashes:
+            try:
+                self._file_hashes[path] = hash_file(path)
+            except FileNotFoundError:
+                self._file_hashes[path] = None
+        return self._file_hashes[path]
+
+    def invalidate(self, path):
+        """
+        Forgets the memoized hash of an input that changed mid-build.
+        """
+        self._file_hashes.pop(str(path), None)
+
+    def dependents(self, paths):
+        """
+        Returns the source paths of the recorded pages built from any of paths.
+        """
+        paths = {str(path) for path in paths}
+        return {from_path for from_path, entry in self.pages.items() if paths.intersection(entry["deps"])}
+
+    def url_dependents(self, resolver):
+        """
+        Returns the source paths of the recorded pages that resolved a URL
+        whose entry in resolver's tables is not the one they recorded, such
+        as an image that was resized.
+        """
+        return {from_path for from_path, entry in self.pages.items() if _changed_urls(entry["urls"], resolver)}
+
+    def stale_reasons(self, from_path, dest_path, dependencies, params, resolver=None):
+        """
+        Compares a page against its recorded entry and the current inputs.
+
+        Files recorded for the page are checked as well as `dependencies`, so an
+        input the page read last time still counts after it is deleted. With a
+        resolver, the recorded entry of every URL the page used is
+        compared against resolver.entry(), so the page is rebuilt when a
+        static file it links to is renamed or resized, and only then.
+
+        Returns:
+            list of str: Why the page must be rebuilt; empty if it is up to date.
+        """
+        from_path = str(from_path)
+        self._seen.add(from_path)
+        dependencies = {str(path) for path in dependencies}
+        for path in dependencies:
+            self.file_hash(path)
+        entry = self.pages.get(from_path)
+        if entry is None:
+            return ["new page"]
+
+        reasons = []
+        if entry["dest"] != str(dest_path):
+            reasons.append(f"output moved to {dest_path}")
+        elif not os.path.exists(dest_path):
+            reasons.append("output missing")
+        recorded = entry["deps"]
+        for path in sorted(recorded.keys() | dependencies):
+            current = self.file_hash(path)
+            if path not in recorded:
+                reasons.append(f"new input {path}")
+            elif current is None:
+                reasons.append(f"{path} deleted")
+            elif current != recorded[path]:
+                reasons.append(f"{path} changed")
+        for name in sorted(params.keys() | entry["params"].keys()):
+            if entry["params"].get(name) != params.get(name):
+                reasons.append(f"{name} changed from {entry['params'].get(name)!r} to {params.get(name)!r}")
+        if resolver is not None:
+            reasons.extend(f"asset {url} changed" for url in _changed_urls(entry["urls"], resolver))
+        return reasons
+
+    def plan(self, pages, dependencies, params, resolver=None, extra=None):
+        """
+        Works out which pages need rebuilding, and why, before anything is rendered.
+
+        Args:
+            pages (list of tuple): (from_path, dest_path) for every page.
+            dependencies (callable): Returns the files a page is built from, given its source path.
+            params (dict): Build parameters every page depends on, such as the basepath.
+            resolver (UrlResolver, optional): Compare the URL entries of every page, see stale_reasons.
+            extra (callable, optional): Returns another reason an otherwise
+                up-to-date page needs rebuilding, or None, given its source path.
+
+        Returns:
+            dict: Maps the source path of every dirty page to its list of reasons, in page order.
+        """
+        dirty = {}
+        for from_path, dest_path in pages:
+            reasons = self.stale_reasons(from_path, dest_path, dependencies(from_path), params, resolver)
+            if not reasons and extra is not None:
+                reasons = [reason for reason in (extra(from_path),) if reason is not None]
+            if reasons:
+                dirty[from_path] = reasons
+            else:
+                self.skipped += 1
+        return dirty
+
+    def record(self, from_path, dest_path, dependencies, params, meta, urls):
+        """
+        Records that from_path was built to dest_path from the given files and
+        parameters, along with the page's metadata and the table entries of
+        the URLs it resolved.
+
+        The files are recorded with the hashes memoized when the build was
+        planned, so an edit made while the page was rendering is still seen as
+        a change by the next build.
+        """
+        from_path = str(from_path)
+        self._seen.add(from_path)
+        self.pages[from_path] = {
+            "dest": str(dest_path),
+            "deps": {str(path): self.file_hash(path) for path in dependencies},
+            "params": dict(params),
+            "meta": meta,
+            "urls": urls,
+        }
+
+    def adopt(self, from_path, entry):
+        """
+        Records an entry made by another build, such as one shard of a
+        sharded build, as it was recorded there.
+        """
+        from_path = str(from_path)
+        self._seen.add(from_path)
+        self.pages[from_path] = entry
+
+    def record_output(self, path):
+        """
+        Records a file this build wrote, or left as it was, besides the pages,
+        such as sitemap.xml.
+        """
+        self._outputs.add(str(path))
+
+    def prune(self):
+        """
+        Deletes the outputs of pages whose source was not seen during this build
+        and drops them from the manifest, along with the other files an earlier
+        build recorded and this one did not.
+
+        Returns:
+            list of str: The destination paths that were removed.
+        """
+        removed = []
+        stale = [self.pages.pop(from_path)["dest"] for from_path in sorted(set(self.pages) - self._seen)]
+        for dest_path in stale + sorted(set(self.outputs) - self._outputs):
+            if os.path.isfile(dest_path):
+                os.remove(dest_path)
+                remove_empty_dirs(os.path.dirname(dest_path), self.dest_dir_path)
+            removed.append(dest_path)
+        self.outputs = sorted(self._outputs)
+        return removed
+
+
+def _changed_urls(urls, resolver):
+    """
+    Returns the URLs, in order, whose recorded entry in urls is not resolver.entry().
+    """
+    return [url for url, entry in sorted(urls.items()) if resolver.entry(url) != entry]
+
+
+def format_plan(dirty, total):
+    """
+    Formats the result of BuildManifest.plan for --explain.
+    """
+    lines = [f"{len(dirty)} of {total} pages need rebuilding"]
+    for from_path, reasons in dirty.items():
+        lines.append(f"  {from_path}: {'; '.join(reasons)}")
+    return "\n".join(lines)
+
+
+def remove_empty_dirs(dir_path, stop_dir_path):
+    """
+    Removes dir_path and its parents while they are empty, stopping at stop_dir_path.
+    """
+    stop = os.path.abspath(stop_dir_path)
+    current = os.path.abspath(dir_path)
+    while current != stop and current.startswith(stop + os.sep):
+        try:
+            os.rmdir(current)
+        except OSError:
+            return
+        current = os.path.dirname(current)
@@ -1,8 +1,10 @@
 from enum import Enum
 
-from htmlnode import ParentNode, HTMLNode
+from document import ParseResult, block_facts
+from htmlnode import LeafNode, ParentNode, HTMLNode
 from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
+from url_resolver import RecordingResolver
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -13,92 +15,232 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
         
 
-def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+class Block:
+    """
+    A block of markdown produced by the block scanner.
+
+    Attributes:
+        block_type (BlockType): What kind of block this is.
+        lines (list[str]): The block's lines, with the block's surrounding whitespace stripped.
+        start (int): Index of the block's first line in the document.
+        end (int): Index one past the block's last line.
+    """
+
+    def __init__(self, block_type, lines, start, end):
+        self.block_type = block_type
+        self.lines = lines
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+    def __eq__(self, other):
+        if not isinstance(other, Block):
+            return NotImplemented
+        return (
+            self.block_type == other.block_type and
+            self.lines == other.lines and
+            self.start == other.start and
+            self.end == other.end
+        )
+
+    def __repr__(self):
+        return f"Block({self.block_type.value}, {self.lines}, {self.start}, {self.end})"
+
+
+def _make_block(lines, start, end, quote, unordered, ordered):
+    lines[-1] = lines[-1].rstrip()
+    first = lines[0]
+    if first.startswith("#"):
+        block_type = BlockType.HEADING
+    elif first.startswith("```") and lines[-1].endswith("```"):
+        block_type = BlockType.CODE
+    elif quote:
+        block_type = BlockType.QUOTE
+    elif unordered:
+        block_type = BlockType.UNORDERED_LIST
+    elif ordered:
+        block_type = BlockType.ORDERED_LIST
+    else:
+        block_type = BlockType.PARAGRAPH
+    return Block(block_type, lines, start, end)
+
+
+def iter_blocks(lines):
+    """
+    Scans markdown lines once, front to back, and yields typed Blocks.
+
+    Blocks are separated by blank lines. Each line is classified as it is
+    read, so the block type is known as soon as the block ends. A block that
+    opens with a ``` fence runs until the closing fence, blank lines included.
+
+    Parameters:
+        lines (iterable of str): The document's lines, without line endings.
+    """
+    block_lines = []
+    start = 0
+    quote = unordered = ordered = fenced = False
+
+    for number, line in enumerate(lines):
+        if fenced:
+            block_lines.append(line)
+            if line.rstrip().endswith("```"):
+                yield _make_block(block_lines, start, number + 1, False, False, False)
+                block_lines = []
+                fenced = False
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks 
 
-def block_to_block_type(block):
-    # check for heading
-    if block.startswith(('#', '##', '###', '####', '#####', '######')):
-        return BlockType.HEADING
-    
-    # check for code 
-    if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
+        if not line or line.isspace():
+            if block_lines:
+                yield _make_block(block_lines, start, number, quote, unordered, ordered)
+                block_lines = []
+            continue
 
-    lines = block.split("\n")
-    
+        if not block_lines:
+            start = number
+            line = line.lstrip()
+            if line.startswith("```"):
+                block_lines.append(line)
+                closing = line.rstrip()
+                if len(closing) >= 6 and closing.endswith("```"):
+                    yield _make_block(block_lines, start, number + 1, False, False, False)
+                    block_lines = []
+                else:
+                    fenced = True
+                continue
+            quote = unordered = ordered = True
 
-    # check for quote
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
-    
-    # check for unordered list
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.UNORDERED_LIST
-    
-    # check for ordered list
-    if block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.ORDERED_LIST
-    
+        block_lines.append(line)
+        quote = quote and line.startswith(">")
+        unordered = unordered and line.startswith("- ")
+        ordered = ordered and line.startswith(f"{len(block_lines)}. ")
+
+    if block_lines:
+        if fenced:
+            quote = unordered = ordered = False
+        yield _make_block(block_lines, start, start + len(block_lines), quote, unordered, ordered)
+
+
+def markdown_to_blocks(markdown):
+    return [block.text for block in iter_blocks(markdown.split("\n"))]
+
+
+def block_to_block_type(block):
+    for scanned in iter_blocks(block.split("\n")):
+        return scanned.block_type
     return BlockType.PARAGRAPH
 
 
+def markdown_to_html_node(markdown, resolver=None):
+    return blocks_to_html_node(iter_blocks(markdown.split("\n")), resolver=resolver)
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown) 
 
-    children = []
-    
+def parse_markdown(markdown, resolver=None, cache=None, minify=False):
+    """
+    Converts markdown into a <div> of HTML nodes and gathers the document's
+    metadata in the same pass.
+
+    Returns:
+        tuple: (ParentNode, ParseResult)
+    """
+    result = ParseResult()
+    return blocks_to_html_node(iter_blocks(markdown.split("\n")), cache, resolver, minify, result), result
+
+
+def blocks_to_html_node(blocks, cache=None, resolver=None, minify=False, result=None):
+    """
+    Converts scanned blocks into a <div> of HTML nodes.
+
+    Link and image URLs are passed through the resolver, if any. With a
+    BlockCache, each block is looked up by its type, its text, the resolver
+    and minify first; a hit becomes a raw LeafNode holding the cached HTML,
+    and a miss is rendered once, minified if asked, and stored. A hit whose
+    URLs now have other entries in the resolver's tables, such as an image
+    that was fingerprinted again, counts as a miss. The facts of every block
+    are added to result, if given.
+    """
+    return ParentNode("div", list(iter_block_nodes(blocks, cache, resolver, minify, result)), None)
+
+
+def iter_block_nodes(blocks, cache=None, resolver=None, minify=False, result=None):
+    """
+    Yields the HTML node of each block as it is scanned, as
+    blocks_to_html_node does, without holding on to earlier blocks.
+    """
     for block in blocks:
-       html_node = block_to_html_node(block)
-       children.append(html_node)
-    return ParentNode("div", children, None)
-    
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+        if cache is None:
+            node, facts = convert_block(block, resolver)
+            if result is not None:
+                result.add(facts)
+            yield node
+            continue
+
+        key = (block.block_type, block.text, resolver, minify)
+        entry = cache.get(key, lambda entry: _entries_unchanged(entry[1], resolver))
+        if entry is None:
+            node, facts = convert_block(block, resolver)
+            entry = (node.to_html(minify), facts)
+            cache.put(key, entry)
+        if result is not None:
+            result.add(entry[1])
+        yield LeafNode(None, entry[0])
+
+
+def convert_block(block, resolver=None):
+    """
+    Converts a block to its HTML node and its BlockFacts, which record the
+    table entries of the URLs the block resolved.
+    """
+    if resolver is None:
+        node = block_to_html_node(block)
+        return node, block_facts(node)
+    recorder = RecordingResolver(resolver)
+    node = block_to_html_node(block, recorder)
+    return node, block_facts(node, recorder.entries.items())
+
+
+def _entries_unchanged(facts, resolver):
+    return all(resolver.entry(path) == entry for path, entry in facts.urls)
+
+
+def block_to_html_node(block, resolver=None):
+    if isinstance(block, str):
+        block = next(iter_blocks(block.split("\n")))
+    lines = block.lines
     
-    match block_type:
+    match block.block_type:
         case BlockType.HEADING:
-            return heading_to_html(block)
+            return heading_to_html(lines, resolver)
         case BlockType.PARAGRAPH:
-            return paragraph_to_html(block)
+            return paragraph_to_html(lines, resolver)
         case BlockType.CODE:
-            return code_to_html(block)
+            return code_to_html(lines)
         case BlockType.QUOTE:
-            return quote_to_html(block)
+            return quote_to_html(lines, resolver)
         case BlockType.UNORDERED_LIST:
-            return unordered_list_to_html(block)
+            return unordered_list_to_html(lines, resolver)
         case BlockType.ORDERED_LIST:
-            return ordered_list_to_html(block)
+            return ordered_list_to_html(lines, resolver)
         case _:
             raise ValueError("invalid block type")
 
-def text_to_children(text):
+def text_to_children(text, resolver=None):
     text_nodes = text_to_textnodes(text)
     children = []
   
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, resolver)
         children.append(html_node)
         
     return children
     
-def heading_to_html(block):
+def heading_to_html(lines, resolver=None):
     """
     Convert a heading block to HTML heading tag.
     """
+    block = "\n".join(lines)
     # Count the number of # characters at the start
     level = 0
     for char in block:
@@ -113,17 +255,17 @@ def heading_to_html(block):
      
     # Extract the heading text (everything after the #s and any following spaces)
     heading_text = block[level:].strip() 
-    children = text_to_children(heading_text)
+    children = text_to_children(heading_text, resolver)
     
     return ParentNode(f"h{level}", children)
 
-def paragraph_to_html(block):
-    lines = block.split("\n")
+def paragraph_to_html(lines, resolver=None):
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, resolver)
     return ParentNode("p", children)
 
-def code_to_html(block):
+def code_to_html(lines):
+    block = "\n".join(lines)
     if not block.startswith("```") and not block.endswith("```"):
         raise ValueError("Invalid Code Block")
     
@@ -135,8 +277,7 @@ def code_to_html(block):
     return ParentNode("pre", [code])
 
     
-def quote_to_html(block):
-    lines = block.split("\n")
+def quote_to_html(lines, resolver=None):
     new_lines = []
     
     for line in lines:
@@ -146,28 +287,26 @@ def quote_to_html(block):
         new_lines.append(line.lstrip(">").strip())
         
     quote_text = " ".join(new_lines)
-    children = text_to_children(quote_text)
+    children = text_to_children(quote_text, resolver)
     return ParentNode("blockquote", children)
     
-def unordered_list_to_html(block):
-    items = block.split("\n")
+def unordered_list_to_html(lines, resolver=None):
     new_items = []
     
-    for item in items:
+    for item in lines:
         item_text = item.lstrip("-").strip()
-        children = text_to_children(item_text)
+        children = text_to_children(item_text, resolver)
         li_text = ParentNode("li" ,children)
         new_items.append(li_text)
         
     
     return ParentNode("ul", new_items)
 
-def ordered_list_to_html(block):
-    items = block.split("\n")
+def ordered_list_to_html(lines, resolver=None):
     new_items = []
-    for item in items:
+    for item in lines:
         text = item[2:].strip()
-        children = text_to_children(text)
+        children = text_to_children(text, resolver)
         li_text = ParentNode("li", children)        
         new_items.append(li_text)
         
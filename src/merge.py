@@ -0,0 +1,189 @@
+import argparse
+import os
+import sys
+from compress import Compressor
+from generate_page import find_pages, page_params
+from main import dir_path_content, dir_path_public, dir_path_static, make_resolver
+from manifest import BuildManifest
+from search_index import SearchIndexUpdate
+from site_index import write_site_index
+from static_sync import copy_file, is_unchanged, link_file, sync_static
+
+
+class MergeStats:
+    """
+    Counts what a merge_shards run did, for the build summary.
+
+    Attributes:
+        missing (list of str): Source paths of the pages no shard built.
+    """
+
+    def __init__(self):
+        self.copied = []
+        self.unchanged = 0
+        self.missing = []
+
+    def __repr__(self):
+        return f"{len(self.copied)} copied, {self.unchanged} unchanged, {len(self.missing)} missing"
+
+
+def load_shards(shard_dirs, resolver, terms=False, minify=False):
+    """
+    Reads the manifests of the shard builds, which must all have built their
+    pages with the resolver's settings and minify as given.
+
+    With terms, every page must carry the search terms its shard gathered,
+    as main.py --shard --search-index records them.
+
+    Returns:
+        dict: Maps the source path of every page a shard built to (shard_dir, entry).
+
+    Raises:
+        ValueError: If two shards built the same page, as shards of two
+            different partitions do, or a shard built pages with other
+            parameters or resolved URLs with other static files than the
+            merge, which would mix asset URLs or minified and unminified pages
+            across the site, or a page lacks the terms asked for.
+    """
+    expected = page_params(resolver, minify)
+    built = {}
+    for shard_dir in shard_dirs:
+        for from_path, entry in BuildManifest.load(shard_dir).pages.items():
+            if from_path in built:
+                raise ValueError(f"{from_path} was built by both {built[from_path][0]} and {shard_dir}")
+            if entry["params"] != expected:
+                raise ValueError(f"{shard_dir} built {from_path} with {entry['params']}, but the merge expects {expected}")
+            for url, recorded in sorted(entry["urls"].items()):
+                current = resolver.entry(url)
+                if current != recorded:
+                    raise ValueError(f"{shard_dir} built {from_path} with {url} as {recorded}, but the merge has {current}")
+            if terms and "terms" not in entry:
+                raise ValueError(f"{shard_dir} built {from_path} without --search-index")
+            built[from_path] = (shard_dir, entry)
+    return built
+
+
+def merge_shards(shard_dirs, dir_path_content, dest_dir_path, manifest, resolver, hardlink=False, written=None,
+                 search=None, minify=False):
+    """
+    Combines the pages built by the shards of a sharded build into dest_dir_path.
+
+    Every page under dir_path_content is copied from the shard that built
+    it, unless dest_dir_path already holds a copy with the same size and
+    modification time, and the shard's manifest entry is adopted with its
+    destination moved to dest_dir_path. The merged manifest then records
+    every page with the dependencies and metadata its shard recorded, so the
+    site index and the search index can be written from it. Pages no shard
+    built, such as pages that failed, keep their previous output and entry.
+    The outputs of deleted pages are left to manifest.prune().
+
+    `written` is called with the destination of every page that is copied.
+    With search, a search_index.SearchIndexUpdate, the search terms the
+    shards recorded are added to it and left out of the merged manifest.
+
+    Returns:
+        MergeStats: What was copied, left alone and missing.
+
+    Raises:
+        ValueError: See load_shards. Nothing is copied.
+    """
+    built = load_shards(shard_dirs, resolver, search is not None, minify)
+    stats = MergeStats()
+    for from_path, dest_path in find_pages(dir_path_content, dest_dir_path):
+        shard_dir, entry = built.get(from_path, (None, None))
+        shard_path = shard_dir and os.path.join(shard_dir, os.path.relpath(dest_path, dest_dir_path))
+        if shard_path is None or not os.path.isfile(shard_path):
+            stats.missing.append(from_path)
+            if from_path in manifest.pages:
+                manifest.adopt(from_path, manifest.pages[from_path])
+            continue
+
+        if is_unchanged(shard_path, dest_path, None, "mtime", hardlink):
+            stats.unchanged += 1
+        else:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            if hardlink:
+                link_file(shard_path, dest_path)
+            else:
+                copy_file(shard_path, dest_path)
+            stats.copied.append(str(dest_path))
+            if written is not None:
+                written(dest_path)
+        entry = dict(entry, dest=str(dest_path))
+        terms = entry.pop("terms", None)
+        if search is not None:
+            search.add(from_path, terms)
+        manifest.adopt(from_path, entry)
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Combine the outputs of main.py --shard builds into ./docs")
+    parser.add_argument("shards", nargs="+", metavar="SHARD_DIR", help="output directories of the shard builds")
+    parser.add_argument("--basepath", default="/", help="URL prefix the site is served from, as given to the shards")
+    parser.add_argument("--output", default=dir_path_public, metavar="DIR", help="directory the site is merged into")
+    parser.add_argument("--manifest", metavar="FILE", help="build manifest to use (default: .<output name>-manifest.json next to the output)")
+    parser.add_argument("--fingerprint", action="store_true", help="fingerprint assets, as the shards did")
+    parser.add_argument("--minify", action="store_true", help="the shards minified their pages")
+    parser.add_argument("--static-compare", choices=("mtime", "hash"), default="mtime", help="how to detect changed static files")
+    parser.add_argument("--hardlink", action="store_true", help="hardlink static files and pages into the output instead of copying them")
+    parser.add_argument("--site-url", metavar="URL", help="scheme and host the site is served from; writes sitemap.xml and blog/feed.xml")
+    parser.add_argument("--search-index", action="store_true", help="write a sharded client-side search index to search/ from the terms the --search-index shards kept")
+    parser.add_argument("--gzip", action="store_true", help="write precompressed .gz copies of pages and text assets")
+    parser.add_argument("--gzip-level", type=int, default=9, choices=range(1, 10), metavar="1-9", help="gzip compression level")
+    parser.add_argument("--gzip-min-bytes", type=int, default=1024, metavar="N", help="do not compress outputs smaller than N bytes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output
+
+    manifest = BuildManifest.load(output, args.manifest)
+    compressor = Compressor(args.gzip_level, args.gzip_min_bytes) if args.gzip else None
+    written = compressor.submit if compressor is not None else None
+    stats = sync_static(
+        dir_path_static, output, manifest, args.static_compare, args.hardlink, fingerprint=args.fingerprint
+    )
+    print(f"Static files: {stats}")
+    resolver = make_resolver(args.basepath, stats, args.fingerprint)
+    if compressor is not None:
+        for dest_path in stats.copied:
+            compressor.submit(dest_path)
+
+    search = SearchIndexUpdate(manifest, output) if args.search_index else None
+    try:
+        merged = merge_shards(
+            args.shards, dir_path_content, output, manifest, resolver, hardlink=args.hardlink, written=written,
+            search=search, minify=args.minify,
+        )
+    except ValueError as error:
+        print(f"Cannot merge: {error}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Pages from {len(args.shards)} shards: {merged}")
+    if args.site_url is not None:
+        index = {
+            dest_path: manifest.pages[str(from_path)]["meta"]
+            for from_path, dest_path in find_pages(dir_path_content, output) if str(from_path) in manifest.pages
+        }
+        for path in write_site_index(index, output, args.site_url, resolver, recorded=manifest.record_output):
+            print(f"Wrote {path}")
+            if written is not None:
+                written(path)
+    for dest_path in manifest.prune():
+        print(f"Removed stale file {dest_path}")
+    if search is not None:
+        print(f"Search index: {search.finish(resolver)}")
+    manifest.save()
+    if compressor is not None:
+        compressor.sweep(output)
+        print(f"Gzip: {compressor.close()}")
+
+    if merged.missing:
+        for from_path in merged.missing:
+            print(f"No shard built {from_path}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import json
+import os
+import tempfile
+from collections import defaultdict
+from site_index import page_url, write_if_changed
+
+SEARCH_DIRNAME = "search"
+PREFIX_LENGTH = 2
+# Postings held in memory before they are spilled to the shard run files.
+SPILL_POSTINGS = 200_000
+
+
+class SearchStats:
+    """
+    Counts what a search index update did, for the build summary.
+    """
+
+    def __init__(self):
+        self.indexed = 0
+        self.removed = 0
+        self.written = []
+
+    def __repr__(self):
+        return f"{self.indexed} pages indexed, {self.removed} removed, {len(self.written)} files written"
+
+
+def shard_name(term):
+    """
+    Returns the name of the shard holding term: its first PREFIX_LENGTH
+    characters, with anything but ASCII letters and digits written as _<hex code point>.
+    """
+    return "".join(char if char.isascii() and char.isalnum() else f"_{ord(char):x}" for char in term[:PREFIX_LENGTH])
+
+
+def encode_postings(postings):
+    """
+    Encodes {doc id: tf} as a flat list of id gaps and term frequencies.
+    """
+    encoded = []
+    previous = 0
+    for doc_id in sorted(postings):
+        encoded.extend((doc_id - previous, postings[doc_id]))
+        previous = doc_id
+    return encoded
+
+
+def decode_postings(encoded):
+    postings = {}
+    doc_id = 0
+    for index in range(0, len(encoded), 2):
+        doc_id += encoded[index]
+        postings[doc_id] = encoded[index + 1]
+    return postings
+
+
+class SearchIndexUpdate:
+    """
+    Brings the search index of every page recorded in the manifest up to
+    date with the terms pages gather while they render.
+
+    Pages are indexed as they are rendered: generate_pages_recursive rebuilds
+    the pages that stale_reason() names and hands the ParseResult terms of
+    every page it renders to add(). Only pages whose markdown changed since
+    they were last indexed are added. Their postings are spilled to one run
+    file per shard whenever spill_postings of them are buffered. finish()
+    then loads each shard, strips it of the postings of changed and deleted
+    pages, merges it with its run file and writes it back if it differs. The
+    old terms of a page are not kept, so any change rescans every shard; only
+    shards that gained postings are rescanned when pages were only added.
+    Memory use is bounded by the buffer and the largest shard, however many
+    pages the site has.
+
+    The manifest's search table records the document id and markdown hash of
+    every indexed page. The index is rebuilt from scratch, by rendering every
+    page again, if its shards are missing.
+
+    The index is written to <dest_dir_path>/search:
+
+        docs.json           {"prefix": 2, "docs": [[url, title], ...]}; a document
+                            id is an index into "docs", and removed pages leave null.
+        shards/<name>.json  {term: [gap, tf, gap, tf, ...]} for the terms whose
+                            shard_name is name, with postings sorted by document
+                            id; gap is the difference to the previous id (the
+                            first gap is the id itself) and tf is how often the
+                            term occurs on the page.
+
+    A browser looking up a word tokenizes it the same way, with
+    document.tokenize, and only fetches docs.json and the shard of the word's
+    prefix.
+    """
+
+    def __init__(self, manifest, dest_dir_path, spill_postings=SPILL_POSTINGS):
+        self.manifest = manifest
+        self.search_dir = os.path.join(dest_dir_path, SEARCH_DIRNAME)
+        self.shards_dir = os.path.join(self.search_dir, "shards")
+        self.dest_dir_path = dest_dir_path
+        self.spill_postings = spill_postings
+        self.stats = SearchStats()
+        self.state = manifest.search if os.path.isdir(self.shards_dir) else {}
+        self.docs = self.state.setdefault("docs", {})
+        self.free = self.state.setdefault("free", [])
+        self.state.setdefault("next", 0)
+        self._drop = set()
+        self._removed = set()
+        self._spill_dir = tempfile.TemporaryDirectory()
+        self._buffers = defaultdict(list)
+        self._buffered = 0
+        self._runs = set()
+        # Pages whose markdown is gone free their ids for the pages added next.
+        for from_path in sorted(self.docs):
+            if manifest.file_hash(from_path) is None:
+                self._remove(from_path)
+
+    def stale_reason(self, from_path):
+        """
+        Returns why a page must be rendered to be indexed, or None if the
+        index holds its current markdown.
+        """
+        if self._is_indexed(str(from_path), self.manifest.file_hash(from_path)):
+            return None
+        return "not in the search index"
+
+    def _remove(self, from_path):
+        doc_id = self.docs.pop(from_path)[0]
+        self._removed.add(doc_id)
+        self._drop.add(doc_id)
+        self.free.append(doc_id)
+        self.stats.removed += 1
+
+    def _is_indexed(self, from_path, digest):
+        entry = self.docs.get(from_path)
+        return entry is not None and entry[1] == digest
+
+    def add(self, from_path, terms):
+        """
+        Indexes the terms, {term: count}, of a page that was just rendered,
+        unless its markdown is indexed already.
+        """
+        from_path = str(from_path)
+        digest = self.manifest.file_hash(from_path)
+        if digest is None or self._is_indexed(from_path, digest):
+            return
+        entry = self.docs.get(from_path)
+        if entry is not None:
+            doc_id = entry[0]
+        elif self.free:
+            doc_id = self.free.pop()
+            self._removed.discard(doc_id)
+        else:
+            doc_id = self.state["next"]
+            self.state["next"] += 1
+        self._drop.add(doc_id)
+        self.docs[from_path] = [doc_id, digest]
+        self.stats.indexed += 1
+        for term, count in terms.items():
+            self._buffers[shard_name(term)].append(f"{term}\t{doc_id}\t{count}\n")
+        self._buffered += len(terms)
+        if self._buffered >= self.spill_postings:
+            _flush(self._buffers, self._spill_dir.name, self._runs)
+            self._buffered = 0
+
+    def finish(self, resolver):
+        """
+        Drops the pages no longer in the manifest and writes the index.
+        Call it once the manifest has been pruned.
+
+        Returns:
+            SearchStats: What was indexed, removed and written.
+        """
+        stats = self.stats
+        # Pages that were rendered but failed to record are removed too.
+        for from_path in sorted(self.docs.keys() - self.manifest.pages.keys()):
+            self._remove(from_path)
+
+        os.makedirs(self.shards_dir, exist_ok=True)
+        with self._spill_dir as spill_dir:
+            _flush(self._buffers, spill_dir, self._runs)
+            if self._runs or self._drop:
+                names = set(self._runs)
+                if self._drop:
+                    names.update(
+                        filename[:-len(".json")] for filename in os.listdir(self.shards_dir) if filename.endswith(".json")
+                    )
+                for name in sorted(names):
+                    run_path = os.path.join(spill_dir, name) if name in self._runs else None
+                    shard_path = os.path.join(self.shards_dir, f"{name}.json")
+                    if _update_shard(shard_path, run_path, self._drop, self._removed):
+                        stats.written.append(shard_path)
+
+        table = [None] * self.state["next"]
+        for from_path, (doc_id, _) in self.docs.items():
+            entry = self.manifest.pages[from_path]
+            url = resolver.resolve(page_url(entry["dest"], self.dest_dir_path))
+            table[doc_id] = [url, entry["meta"]["title"]]
+        docs_path = os.path.join(self.search_dir, "docs.json")
+        if write_if_changed(docs_path, json.dumps({"prefix": PREFIX_LENGTH, "docs": table}, separators=(",", ":"))):
+            stats.written.append(docs_path)
+
+        self.manifest.search = self.state
+        return stats
+
+
+class ShardTerms:
+    """
+    Takes the place of a SearchIndexUpdate in a --shard build, which cannot
+    write the index of the whole site: the terms of the pages the shard
+    renders are kept in their manifest entries instead, like their metadata,
+    for merge.py to index once the shards are combined.
+    """
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+        self.terms = {}
+
+    def stale_reason(self, from_path):
+        entry = self.manifest.pages.get(str(from_path))
+        return None if entry is None or "terms" in entry else "no search terms"
+
+    def add(self, from_path, terms):
+        self.terms[str(from_path)] = terms
+
+    def finish(self, resolver=None):
+        stats = SearchStats()
+        for from_path, terms in self.terms.items():
+            if from_path in self.manifest.pages:
+                self.manifest.pages[from_path]["terms"] = terms
+                stats.indexed += 1
+        return stats
+
+
+def _flush(buffers, spill_dir, runs):
+    for name, lines in buffers.items():
+        with open(os.path.join(spill_dir, name), "a") as file:
+            file.writelines(lines)
+        runs.add(name)
+    buffers.clear()
+
+
+def _update_shard(path, run_path, drop, removed=frozenset()):
+    """
+    Rewrites one shard without the postings of the dropped documents and
+    with the postings in its run file, except those of removed documents.
+    Returns whether the file changed.
+    """
+    postings = {}
+    try:
+        with open(path, "r") as file:
+            stored = json.load(file)
+    except FileNotFoundError:
+        stored = {}
+    for term, encoded in stored.items():
+        kept = {doc_id: count for doc_id, count in decode_postings(encoded).items() if doc_id not in drop}
+        if kept:
+            postings[term] = kept
+    if run_path is not None:
+        with open(run_path, "r") as file:
+            for line in file:
+                term, doc_id, count = line[:-1].split("\t")
+                if int(doc_id) not in removed:
+                    postings.setdefault(term, {})[int(doc_id)] = int(count)
+
+    if not postings:
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+    encoded = {term: encode_postings(postings[term]) for term in sorted(postings)}
+    return write_if_changed(path, json.dumps(encoded, separators=(",", ":")))
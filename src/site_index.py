@@ -0,0 +1,137 @@
+import os
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+SITEMAP_FILENAME = "sitemap.xml"
+FEED_FILENAME = "feed.xml"
+# Content directories that get an Atom feed of the pages under them.
+FEED_SECTIONS = ("blog",)
+
+
+def page_metadata(from_path, title, summary):
+    """
+    Returns the metadata recorded for a rendered page: its title, summary
+    and the modification time of its markdown as an ISO 8601 timestamp.
+    """
+    updated = datetime.fromtimestamp(os.stat(from_path).st_mtime, timezone.utc)
+    return {"title": title, "summary": summary, "updated": updated.isoformat(timespec="seconds")}
+
+
+def page_url(dest_path, dest_dir_path):
+    """
+    Returns the root-relative URL a page is served at, "/blog/tom/" for
+    blog/tom/index.html.
+    """
+    url = "/" + os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    return url[:-len("index.html")] if url.endswith("/index.html") else url
+
+
+def build_sitemap(entries, site_url):
+    """
+    Returns a sitemap.xml listing every (url, metadata) entry.
+    """
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for url, meta in sorted(entries, key=lambda entry: entry[0]):
+        lines.append(f"  <url><loc>{escape(site_url + url)}</loc><lastmod>{meta['updated']}</lastmod></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def build_feed(entries, site_url, section_url, title):
+    """
+    Returns an Atom feed of the (url, metadata) entries, newest first.
+    """
+    entries = sorted(entries, key=lambda entry: (entry[1]["updated"], entry[0]), reverse=True)
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape(title)}</title>",
+        f"  <link href={quoteattr(site_url + section_url + FEED_FILENAME)} rel=\"self\"/>",
+        f"  <link href={quoteattr(site_url + section_url)}/>",
+        f"  <id>{escape(site_url + section_url)}</id>",
+        f"  <updated>{max(meta['updated'] for _, meta in entries)}</updated>",
+    ]
+    for url, meta in entries:
+        lines.extend([
+            "  <entry>",
+            f"    <title>{escape(meta['title'])}</title>",
+            f"    <link href={quoteattr(site_url + url)}/>",
+            f"    <id>{escape(site_url + url)}</id>",
+            f"    <updated>{meta['updated']}</updated>",
+            f"    <summary>{escape(meta['summary'])}</summary>",
+            "  </entry>",
+        ])
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def write_if_changed(path, text):
+    """
+    Writes text to path unless the file already holds exactly that text, so
+    that an unchanged file keeps its modification time.
+
+    Returns:
+        bool: Whether the file was written.
+    """
+    try:
+        with open(path, "r") as file:
+            if file.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_site_index(index, dest_dir_path, site_url, resolver, sections=FEED_SECTIONS, recorded=None):
+    """
+    Writes sitemap.xml and an Atom feed for every section from the metadata
+    of every page, in one pass over the index.
+
+    URLs are made absolute by passing them through the resolver and
+    prefixing site_url. A file is only rewritten when its content changes.
+    The feed of a section without pages is deleted. `recorded`, if given, is
+    called with the path of every file the site index now consists of,
+    written or not, such as BuildManifest.record_output.
+
+    Parameters:
+        index (dict): Maps the destination path of every page to its metadata.
+        site_url (str): Scheme and host the site is served from, such as "https://example.com".
+
+    Returns:
+        list of str: The paths of the files that were written.
+    """
+    site_url = site_url.rstrip("/")
+    entries = []
+    feeds = {section: [] for section in sections}
+    titles = {}
+    for dest_path, meta in index.items():
+        url = page_url(dest_path, dest_dir_path)
+        resolved = resolver.resolve(url)
+        entries.append((resolved, meta))
+        titles[url] = meta["title"]
+        for section in sections:
+            if url.startswith(f"/{section}/") and url != f"/{section}/":
+                feeds[section].append((resolved, meta))
+
+    files = {os.path.join(dest_dir_path, SITEMAP_FILENAME): build_sitemap(entries, site_url)}
+    for section, section_entries in feeds.items():
+        path = os.path.join(dest_dir_path, section, FEED_FILENAME)
+        if not section_entries:
+            if os.path.isfile(path):
+                os.remove(path)
+            continue
+        title = titles.get(f"/{section}/") or titles.get("/") or section
+        files[path] = build_feed(section_entries, site_url, resolver.resolve(f"/{section}/"), title)
+
+    written = []
+    for path, text in files.items():
+        if write_if_changed(path, text):
+            written.append(path)
+        if recorded is not None:
+            recorded(path)
+    return written
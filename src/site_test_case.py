@@ -0,0 +1,61 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from generate_page import generate_pages_recursive
+from manifest import BuildManifest
+
+
+class SiteTestCase(unittest.TestCase):
+    """
+    Base class of the tests that work on files: every test runs in a fresh
+    temporary directory, self.root, which is removed afterwards.
+
+    self.content, self.static, self.docs and self.template are the paths a
+    site has inside it, as laid out in the repository. None of them exist
+    until a test writes them.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+
+    def write(self, path, text):
+        """
+        Writes text to path, relative to self.root unless it is absolute,
+        creating its directories. Returns the full path.
+        """
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def read(self, *parts):
+        with open(os.path.join(self.root, *parts)) as file:
+            return file.read()
+
+    def build(self, basepath="/", dest=None, manifest=None, **kwargs):
+        """
+        Builds self.content into dest, by default self.docs, with the build
+        manifest loaded from next to it unless one is given, then prunes and
+        saves the manifest, as main.py does. Output is silenced, and the
+        other arguments are passed on to generate_pages_recursive.
+
+        Returns:
+            tuple: (BuildManifest, list of the destination paths pruned)
+        """
+        dest = dest or self.docs
+        if manifest is None:
+            manifest = BuildManifest.load(dest)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, dest, basepath, manifest, **kwargs)
+        removed = manifest.prune()
+        manifest.save()
+        return manifest, removed
@@ -0,0 +1,379 @@
+import errno
+import os
+import posixpath
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from image_size import IMAGE_SUFFIXES, read_image_size
+from manifest import hash_bytes, hash_file, remove_empty_dirs
+
+
+# Assets that are renamed to name.<hash>.ext when fingerprinting. Other files,
+# such as robots.txt or CNAME, must keep their names.
+FINGERPRINT_SUFFIXES = (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".woff", ".woff2")
+# A url(...) reference in a stylesheet, with its optional quotes.
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")\s]+)\1\s*\)""")
+# The path of a URL, before any query string or fragment.
+_URL_PATH = re.compile(r"[^?#]*")
+# A URL with a scheme, such as data: or https:, which is never a static file.
+_SCHEME = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+class SyncStats:
+    """
+    Counts what a sync_static run did, for the build summary.
+
+    Attributes:
+        fingerprints (dict): Maps the root-relative URL of every fingerprinted
+            asset ("/index.css") to the URL of its copy ("/index.1a2b3c4d5e.css").
+        image_sizes (dict): Maps the root-relative URL of every image with a
+            readable header ("/images/tom.png") to its (width, height).
+    """
+
+    def __init__(self):
+        self.copied = []
+        self.unchanged = 0
+        self.removed = []
+        self.fingerprints = {}
+        self.image_sizes = {}
+
+    def __repr__(self):
+        return f"{len(self.copied)} copied, {self.unchanged} unchanged, {len(self.removed)} removed"
+
+
+def find_static_files(source_dir_path):
+    """
+    Returns the path of every file under source_dir_path relative to it, in a stable order.
+    """
+    files = []
+    for dir_path, dir_names, filenames in os.walk(source_dir_path):
+        dir_names.sort()
+        for filename in sorted(filenames):
+            files.append(os.path.relpath(os.path.join(dir_path, filename), source_dir_path))
+    return files
+
+
+def copy_file(from_path, dest_path):
+    """
+    Copies a file, letting the kernel move the data where possible.
+
+    Uses os.copy_file_range when the platform has it and falls back to
+    shutil.copyfile (which itself uses sendfile/fcopyfile). The data is written
+    to a temporary file and renamed over dest_path, so an existing hardlink at
+    dest_path is replaced rather than written through.
+    """
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        _copy_file_range(from_path, tmp_path)
+    except OSError as error:
+        if error.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+            raise
+        shutil.copyfile(from_path, tmp_path)
+    shutil.copystat(from_path, tmp_path)
+    os.replace(tmp_path, dest_path)
+
+
+def _copy_file_range(from_path, dest_path):
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    with open(from_path, "rb") as source, open(dest_path, "wb") as dest:
+        remaining = os.fstat(source.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(source.fileno(), dest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def link_file(from_path, dest_path):
+    tmp_path = f"{dest_path}.tmp"
+    os.link(from_path, tmp_path)
+    os.replace(tmp_path, dest_path)
+
+
+def cached_hash(from_path, entry):
+    """
+    Returns the content hash of from_path, reusing the hash recorded in its
+    manifest entry when the file's size and modification time are unchanged.
+    """
+    stat = os.stat(from_path)
+    if entry and "hash" in entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return entry["hash"]
+    return hash_file(from_path)
+
+
+def cached_image_size(from_path, entry, stat):
+    """
+    Returns the (width, height) of an image, or None if its header cannot be
+    read, reusing the size recorded in its manifest entry when the file's
+    size and modification time are unchanged.
+    """
+    if entry and "image" in entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return entry["image"] and tuple(entry["image"])
+    return read_image_size(from_path)
+
+
+def fingerprinted_path(rel_path, digest):
+    """
+    Returns rel_path with the start of digest inserted before its extension.
+    """
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:10]}{ext}"
+
+
+def _stylesheet_ref(url, base):
+    """
+    Returns the root-relative URL of the static file a url(...) in a
+    stylesheet served from the directory base points at, or None if it is
+    not a local file. Relative references are relative to the stylesheet.
+    """
+    path = _URL_PATH.match(url).group()
+    if not path or path.startswith("//") or _SCHEME.match(path):
+        return None
+    if path.startswith("/"):
+        return path
+    return posixpath.normpath(posixpath.join(base, path))
+
+
+def stylesheet_refs(text, rel_path):
+    """
+    Returns the root-relative URLs of the local files the stylesheet at
+    rel_path references with url(...), in order.
+    """
+    base = posixpath.dirname("/" + rel_path.replace(os.sep, "/"))
+    refs = (_stylesheet_ref(match.group(2), base) for match in _CSS_URL.finditer(text))
+    return [ref for ref in refs if ref is not None]
+
+
+def rewrite_stylesheet(text, rel_path, table):
+    """
+    Points the url(...) references of the stylesheet at rel_path at the
+    fingerprinted copies in table, keeping any query string or fragment.
+
+    Only the file name of a reference changes, so a relative reference stays
+    relative and a root-relative one is not given the basepath, as neither
+    is without fingerprints.
+
+    Returns:
+        tuple: (text, refs), the rewritten stylesheet and a dict mapping the
+        root-relative URL of every local reference to its fingerprinted URL,
+        or to None if it is not fingerprinted.
+    """
+    base = posixpath.dirname("/" + rel_path.replace(os.sep, "/"))
+    refs = {}
+
+    def replace(match):
+        quote, url = match.groups()
+        ref = _stylesheet_ref(url, base)
+        if ref is None:
+            return match.group()
+        refs[ref] = fingerprinted = table.get(ref)
+        if fingerprinted is None:
+            return match.group()
+        path = _URL_PATH.match(url).group()
+        head = path[:len(path) - len(posixpath.basename(path))]
+        return f"url({quote}{head}{posixpath.basename(fingerprinted)}{url[len(path):]}{quote})"
+
+    return _CSS_URL.sub(replace, text), refs
+
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        return file.read()
+
+
+def _fingerprint_stylesheet(source_dir_path, url, stylesheets, assets, previous, stats):
+    """
+    Fingerprints the stylesheet at url, which is popped from stylesheets, the
+    fingerprinted stylesheets not done yet. A stylesheet's references are
+    rewritten first, and its name is the hash of the rewritten text, so it
+    changes whenever a font or image it uses does. Stylesheets it imports
+    are done first, so their new names are known.
+
+    The references are recorded in its asset entry, so it is only read again
+    once it or one of the files it references changes.
+    """
+    rel_path = stylesheets.pop(url)
+    asset = assets[rel_path]
+    entry = previous.get(rel_path) or {}
+    refs = entry.get("refs")
+    if refs is not None and entry.get("hash") == asset["hash"] and "dest" in entry:
+        for ref in refs:
+            if ref in stylesheets:
+                _fingerprint_stylesheet(source_dir_path, ref, stylesheets, assets, previous, stats)
+        if all(stats.fingerprints.get(ref) == fingerprinted for ref, fingerprinted in refs.items()):
+            asset.update(refs=refs, dest=entry["dest"])
+            stats.fingerprints[url] = "/" + entry["dest"].replace(os.sep, "/")
+            return
+
+    text = _read_text(os.path.join(source_dir_path, rel_path))
+    for ref in stylesheet_refs(text, rel_path):
+        if ref in stylesheets:
+            _fingerprint_stylesheet(source_dir_path, ref, stylesheets, assets, previous, stats)
+    text, refs = rewrite_stylesheet(text, rel_path, stats.fingerprints)
+    digest = hash_bytes(text.encode("utf-8")) if any(refs.values()) else asset["hash"]
+    asset.update(refs=refs, dest=fingerprinted_path(rel_path, digest))
+    stats.fingerprints[url] = "/" + asset["dest"].replace(os.sep, "/")
+
+
+def write_stylesheet(from_path, dest_path, rel_path, table):
+    """
+    Writes the stylesheet at from_path to dest_path with its references
+    pointed at the fingerprinted copies in table.
+    """
+    tmp_path = f"{dest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as file:
+        file.write(rewrite_stylesheet(_read_text(from_path), rel_path, table)[0])
+    os.replace(tmp_path, dest_path)
+
+
+def is_rewritten(asset):
+    """
+    Tells whether the synced copy of an asset is a stylesheet whose
+    references were rewritten, rather than a copy of the source.
+    """
+    return any(asset.get("refs", {}).values())
+
+
+def is_unchanged(from_path, dest_path, entry, compare, hardlink, digest=None):
+    """
+    Decides whether dest_path already holds the current contents of from_path.
+
+    compare="mtime" checks size and modification time; compare="hash" checks
+    the source's content hash, digest, against the hash recorded in the
+    manifest entry.
+    """
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    from_stat = os.stat(from_path)
+
+    if hardlink or os.path.samestat(from_stat, dest_stat):
+        # A link left behind by a hardlink build still needs a real copy.
+        return hardlink and os.path.samestat(from_stat, dest_stat)
+    if from_stat.st_size != dest_stat.st_size:
+        return False
+    if compare == "hash":
+        return entry is not None and entry.get("hash") == digest
+    return from_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def scan_static(source_dir_path, previous, compare="mtime", fingerprint=False):
+    """
+    Works out the asset table of source_dir_path without copying anything:
+    the content hashes needed to compare or fingerprint each file, the
+    fingerprinted names and the image sizes.
+
+    A sharded build scans the static files this way to resolve URLs exactly
+    as the merged build, which makes the one copy, will.
+
+    Parameters:
+        previous (dict): The asset table of the last build, whose hashes and
+            image sizes are reused for files whose size and mtime are unchanged.
+
+    Returns:
+        tuple: (assets, stats), the new asset table and a SyncStats holding
+        the fingerprint table and the image sizes.
+    """
+    stats = SyncStats()
+    assets = {}
+    stylesheets = {}
+    for rel_path in find_static_files(source_dir_path):
+        from_path = os.path.join(source_dir_path, rel_path)
+        entry = previous.get(rel_path)
+        renamed = fingerprint and rel_path.endswith(FINGERPRINT_SUFFIXES)
+
+        assets[rel_path] = {}
+        url = "/" + rel_path.replace(os.sep, "/")
+        if compare == "hash" or renamed:
+            digest = cached_hash(from_path, entry)
+            stat = os.stat(from_path)
+            assets[rel_path] = {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if rel_path.endswith(IMAGE_SUFFIXES):
+            stat = os.stat(from_path)
+            size = cached_image_size(from_path, entry, stat)
+            assets[rel_path].update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, image=size)
+            if size is not None:
+                stats.image_sizes[url] = size
+        if renamed and rel_path.endswith(".css"):
+            stylesheets[url] = rel_path
+        elif renamed:
+            dest_rel_path = fingerprinted_path(rel_path, assets[rel_path]["hash"])
+            assets[rel_path]["dest"] = dest_rel_path
+            stats.fingerprints[url] = "/" + dest_rel_path.replace(os.sep, "/")
+    while stylesheets:
+        _fingerprint_stylesheet(source_dir_path, next(iter(stylesheets)), stylesheets, assets, previous, stats)
+    return assets, stats
+
+
+def sync_static(source_dir_path, dest_dir_path, manifest, compare="mtime", hardlink=False, jobs=8, fingerprint=False):
+    """
+    Mirrors source_dir_path into dest_dir_path, copying only files that changed.
+
+    Files that were synced by an earlier build but no longer exist in the
+    source are deleted. The manifest's asset table records what was synced so
+    that orphans can be told apart from generated pages, along with content
+    hashes keyed by size and mtime so that unchanged files are not rehashed.
+
+    With fingerprint, assets with a FINGERPRINT_SUFFIXES extension are copied
+    to name.<hash>.ext instead, so they can be served with long-lived cache
+    headers; the copy of an earlier version is deleted once it is replaced.
+    The url(...) references of fingerprinted stylesheets are rewritten to the
+    fingerprinted names, so fonts and images they use are found too.
+
+    The pixel size of every image is read from its header and recorded in
+    the asset table too, so it is only read again once the image changes.
+
+    Parameters:
+        compare (str): "mtime" to compare size and mtime, "hash" to compare content hashes.
+        hardlink (bool): Hardlink files into the output instead of copying them.
+        jobs (int): Number of threads used for copying.
+        fingerprint (bool): Put a content hash in the names of cacheable assets.
+
+    Returns:
+        SyncStats: What was copied, left alone and removed, the fingerprint table and the image sizes.
+    """
+    previous = manifest.assets
+    assets, stats = scan_static(source_dir_path, previous, compare, fingerprint)
+    pending = []
+    for rel_path, asset in assets.items():
+        from_path = os.path.join(source_dir_path, rel_path)
+        dest_path = os.path.join(dest_dir_path, asset.get("dest", rel_path))
+        if is_rewritten(asset):
+            # Named by the hash of the rewritten text, so any copy is current.
+            unchanged = os.path.isfile(dest_path)
+        else:
+            unchanged = is_unchanged(from_path, dest_path, previous.get(rel_path), compare, hardlink, asset.get("hash"))
+        if unchanged:
+            stats.unchanged += 1
+        else:
+            pending.append((rel_path, from_path, dest_path))
+
+    def sync_one(item):
+        rel_path, from_path, dest_path = item
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if is_rewritten(assets[rel_path]):
+            write_stylesheet(from_path, dest_path, rel_path, stats.fingerprints)
+        elif hardlink:
+            link_file(from_path, dest_path)
+        else:
+            copy_file(from_path, dest_path)
+        return dest_path
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        stats.copied.extend(executor.map(sync_one, pending))
+
+    current = {entry.get("dest", rel_path) for rel_path, entry in assets.items()}
+    for rel_path, entry in sorted(previous.items()):
+        dest_rel_path = entry.get("dest", rel_path)
+        if dest_rel_path in current:
+            continue
+        dest_path = os.path.join(dest_dir_path, dest_rel_path)
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
+        stats.removed.append(dest_path)
+
+    manifest.assets = assets
+    return stats
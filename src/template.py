@@ -0,0 +1,158 @@
+import re
+from htmlnode import UNQUOTED_VALUE_PATTERN
+from url_resolver import RecordingResolver, UrlResolver
+
+SLOT_PATTERN = re.compile(r"\{\{ *(\w+) *\}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r'(?<![\w-])(href|src)="([^"]*)"')
+
+# Elements whose content is kept byte for byte when a template is minified.
+RAW_TEXT_PATTERN = re.compile(r"<(pre|textarea|script|style)\b[^>]*>(.*?)</\1\s*>", re.IGNORECASE | re.DOTALL)
+START_TAG_PATTERN = re.compile(r"<[a-zA-Z][^>]*>")
+QUOTED_ATTRIBUTE_PATTERN = re.compile(r'="([^"]*)"')
+INTER_TAG_WHITESPACE_PATTERN = re.compile(r"(<[!/]?([a-zA-Z][\w-]*)[^>]*>)\s+(?=<[!/]?([a-zA-Z][\w-]*))")
+# Whitespace next to these elements is rendered, so minifying keeps one space.
+INLINE_ELEMENTS = frozenset((
+    "a", "abbr", "b", "bdi", "bdo", "br", "button", "cite", "code", "data", "dfn", "em", "i", "img", "input",
+    "kbd", "label", "mark", "q", "s", "samp", "select", "small", "span", "strong", "sub", "sup", "time", "u", "var",
+))
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class Template:
+    """
+    A page template compiled into literal segments and named slots.
+
+    The template text is parsed once; rendering a page then only fills the
+    slots and joins the pieces, without rescanning the document.
+
+    Attributes:
+        path (str, optional): The file the template was loaded from.
+        parts (list[str]): Literal segments with a placeholder at every slot position.
+        slots (list[tuple]): (index into parts, slot name) for every slot occurrence.
+        minify (bool): Whether the template was minified; node values are then
+            written minified as well.
+        urls (dict): The resolver's table entry for every URL of the template
+            that has one, see UrlResolver.entry. Every page depends on them.
+    """
+
+    def __init__(self, parts, slots, path=None, minify=False, urls=None):
+        self.parts = parts
+        self.slots = slots
+        self.path = path
+        self.minify = minify
+        self.urls = urls or {}
+
+    @property
+    def slot_names(self):
+        return {name for _, name in self.slots}
+
+    def render(self, values):
+        """
+        Fills every slot from the values dict and returns the page.
+
+        Slots without a value are left as their original placeholder text.
+        """
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            if name in values:
+                parts[index] = values[name]
+        return "".join(parts)
+
+    def write(self, fp, values):
+        """
+        Writes the filled template to fp.
+
+        A value may be a string or any object with a write_html(fp, minify)
+        method, such as an HTMLNode, which then streams its output straight
+        into fp.
+        """
+        slots = dict(self.slots)
+        for index, part in enumerate(self.parts):
+            name = slots.get(index)
+            if name is None or name not in values:
+                fp.write(part)
+            elif isinstance(values[name], str):
+                fp.write(values[name])
+            else:
+                values[name].write_html(fp, self.minify)
+
+    def __repr__(self):
+        return f"Template({self.path}, slots: {[name for _, name in self.slots]})"
+
+
+def rewrite_urls(html, resolver):
+    """
+    Passes the URL of every double-quoted href and src attribute through the resolver.
+    """
+    return URL_ATTRIBUTE_PATTERN.sub(lambda match: f'{match.group(1)}="{resolver.resolve(match.group(2))}"', html)
+
+
+def minify_html(html):
+    """
+    Returns html with whitespace between block-level tags removed, other
+    whitespace runs collapsed to one space, optional attribute quotes dropped and the
+    self-closing slash of start tags removed.
+
+    The content of <pre>, <textarea>, <script> and <style> elements is left
+    exactly as it is.
+    """
+    pieces = []
+    position = 0
+    for match in RAW_TEXT_PATTERN.finditer(html):
+        pieces.append(_minify_markup(html[position:match.start(2)]))
+        pieces.append(match.group(2))
+        position = match.end(2)
+    pieces.append(_minify_markup(html[position:]))
+    return "".join(pieces).strip()
+
+
+def _minify_markup(text):
+    text = INTER_TAG_WHITESPACE_PATTERN.sub(_drop_inter_tag_whitespace, text)
+    text = WHITESPACE_PATTERN.sub(" ", text)
+    return START_TAG_PATTERN.sub(lambda match: _minify_start_tag(match.group(0)), text)
+
+
+def _drop_inter_tag_whitespace(match):
+    if match.group(2).lower() in INLINE_ELEMENTS or match.group(3).lower() in INLINE_ELEMENTS:
+        return match.group(1) + " "
+    return match.group(1)
+
+
+def _minify_start_tag(tag):
+    if tag.endswith("/>"):
+        tag = tag[:-2].rstrip() + ">"
+    return QUOTED_ATTRIBUTE_PATTERN.sub(
+        lambda match: f"={match.group(1)}" if UNQUOTED_VALUE_PATTERN.fullmatch(match.group(1)) else match.group(0),
+        tag,
+    )
+
+
+def compile_template(text, basepath="/", path=None, resolver=None, minify=False):
+    """
+    Compiles template text into a Template.
+
+    Placeholders look like {{ Name }} and may appear any number of times. The
+    URLs in the template are resolved here, once, with resolver or else a
+    UrlResolver for basepath, so that rendering never has to rescan the
+    finished page. With minify, the template text is minified here too, and
+    the Template writes node values minified.
+    """
+    resolver = RecordingResolver(resolver or UrlResolver(basepath))
+    text = rewrite_urls(text, resolver)
+    if minify:
+        text = minify_html(text)
+    parts = []
+    slots = []
+    position = 0
+    for match in SLOT_PATTERN.finditer(text):
+        parts.append(text[position:match.start()])
+        slots.append((len(parts), match.group(1)))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(text[position:])
+    return Template(parts, slots, path, minify, resolver.entries)
+
+
+def load_template(template_path, basepath="/", resolver=None, minify=False):
+    with open(template_path, "r") as file:
+        return compile_template(file.read(), basepath, str(template_path), resolver, minify)
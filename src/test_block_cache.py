@@ -0,0 +1,79 @@
+import unittest
+from block_cache import BlockCache
+from markdown_blocks import BlockType, blocks_to_html_node, iter_blocks, markdown_to_html_node
+from url_resolver import FingerprintResolver, UrlResolver
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = BlockCache()
+        key = (BlockType.PARAGRAPH, "text")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p>text</p>")
+        self.assertEqual(cache.get(key), "<p>text</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        one = (BlockType.PARAGRAPH, "one")
+        two = (BlockType.PARAGRAPH, "two")
+        six = (BlockType.PARAGRAPH, "six")
+        cache = BlockCache(max_bytes=10 ** 6)
+        cache.put(one, "<p>one</p>")
+        cache.max_bytes = cache.size * 2
+        cache.put(two, "<p>two</p>")
+        cache.get(one)
+        cache.put(six, "<p>six</p>")
+        self.assertEqual(cache.get(two), None)
+        self.assertEqual(cache.get(one), "<p>one</p>")
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+    def test_oversized_fragment_is_not_cached(self):
+        cache = BlockCache(max_bytes=100)
+        cache.put((BlockType.CODE, "x"), "x" * 1000)
+        self.assertEqual(len(cache), 0)
+
+    def test_summary_counts_the_caches_of_workers(self):
+        cache = BlockCache()
+        cache.add_stats(2, 1, "worker a", 3, 1024 * 1024)
+        cache.add_stats(1, 0, "worker a", 4, 2 * 1024 * 1024)
+        cache.add_stats(0, 1, "worker b", 1, 1024 * 1024)
+        self.assertEqual(repr(cache), "3 hits, 2 misses (60% hit rate), 5 blocks, 3.0 MiB")
+
+    def test_cached_render_matches_uncached(self):
+        md = "# Title\n\nA **repeated** [block](/x).\n\n- item\n- item\n\nA **repeated** [block](/x)."
+        cache = BlockCache()
+        expected = markdown_to_html_node(md).to_html()
+        for _ in range(2):
+            self.assertEqual(blocks_to_html_node(iter_blocks(md.split("\n")), cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (5, 3))
+
+    def test_resolver_is_part_of_the_key(self):
+        md = "A [link](/x)."
+        cache = BlockCache()
+        blocks_to_html_node(iter_blocks(md.split("\n")), cache, UrlResolver("/a/"))
+        html = blocks_to_html_node(iter_blocks(md.split("\n")), cache, UrlResolver("/b/")).to_html()
+        self.assertEqual(html, '<div><p>A <a href="/b/x">link</a>.</p></div>')
+        html = blocks_to_html_node(iter_blocks(md.split("\n")), cache, UrlResolver("/a/")).to_html()
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_blocks_whose_assets_changed_are_rendered_again(self):
+        md = "![Tom](/tom.png)\n\nA [link](/blog/)."
+        cache = BlockCache()
+        blocks_to_html_node(iter_blocks(md.split("\n")), cache, FingerprintResolver("/", {"/tom.png": "/tom.1.png"}))
+        resolver = FingerprintResolver("/", {"/tom.png": "/tom.2.png", "/index.css": "/index.2.css"})
+        html = blocks_to_html_node(iter_blocks(md.split("\n")), cache, resolver).to_html()
+        self.assertEqual(html, '<div><p><img src="/tom.2.png" alt="Tom"></img></p><p>A <a href="/blog/">link</a>.</p></div>')
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(len(cache), 2)
+
+    def test_minify_is_part_of_the_key(self):
+        md = "A [link](/x)."
+        cache = BlockCache()
+        blocks_to_html_node(iter_blocks(md.split("\n")), cache, UrlResolver("/"))
+        html = blocks_to_html_node(iter_blocks(md.split("\n")), cache, UrlResolver("/"), minify=True).to_html()
+        self.assertEqual(html, "<div><p>A <a href=/x>link</a>.</p></div>")
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from build_trace import NULL_TRACER, PAGE_STAGES, Tracer
+from generate_page import generate_pages_recursive
+
+
+class TestTracer(unittest.TestCase):
+    def test_span_records_event(self):
+        tracer = Tracer()
+        with tracer.span("read", page="a.md"):
+            pass
+        (event,) = tracer.events
+        self.assertEqual((event["name"], event["cat"], event["ph"]), ("read", "stage", "X"))
+        self.assertEqual(event["args"]["page"], "a.md")
+        self.assertIn("cpu_us", event["args"])
+        self.assertGreaterEqual(event["dur"], 0)
+
+    def test_null_tracer_records_nothing(self):
+        self.assertFalse(NULL_TRACER.enabled)
+        with NULL_TRACER.span("read", page="a.md") as span:
+            self.assertIs(span, NULL_TRACER.span("write"))
+
+    def test_page_and_directory_totals(self):
+        tracer = Tracer()
+        for page, wall in (("content/a/x.md", 3000), ("content/a/y.md", 1000), ("content/z.md", 2000)):
+            tracer.record("page", "page", 0, wall * 1000, wall * 500, {"page": page})
+            tracer.record("read", "stage", 0, 1000, 1000, {"page": page})
+        self.assertEqual(tracer.page_totals()["content/a/x.md"]["stages"], {"read": 1.0})
+        self.assertEqual([page for page, _ in tracer.slowest_pages(2)], ["content/a/x.md", "content/z.md"])
+        directories = tracer.directory_totals("content")
+        self.assertEqual(directories["content/a"]["pages"], 2)
+        self.assertEqual(directories["content"]["wall_us"], 6000)
+        self.assertEqual(set(directories), {"content", "content/a"})
+
+
+class TestTracedBuild(unittest.TestCase):
+    def test_build_writes_chrome_trace(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            for path in ("index.md", os.path.join("blog", "index.md")):
+                with open(os.path.join(content, path), "w") as file:
+                    file.write("# Title\n\nSome **text**.")
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as file:
+                file.write("<title>{{ Title }}</title>{{ Content }}")
+
+            tracer = Tracer()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content, template, os.path.join(root, "docs"), "/", tracer=tracer)
+            trace_path = os.path.join(root, "trace.json")
+            tracer.write_chrome_trace(trace_path, content)
+
+            with open(trace_path) as file:
+                trace = json.load(file)
+            names = {event["name"] for event in trace["traceEvents"]}
+            self.assertEqual(names, {"page", *PAGE_STAGES})
+            self.assertEqual(len(trace["slowestPages"]), 2)
+            self.assertEqual(trace["directoryTotals"][content]["pages"], 2)
+            with open(os.path.join(root, "docs", "index.html")) as file:
+                self.assertEqual(file.read(), "<title>Title</title><div><h1>Title</h1><p>Some <b>text</b>.</p></div>")
+
+
+if __name__ == '__main__':
+    unittest.main()
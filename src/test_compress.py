@@ -0,0 +1,76 @@
+import gzip
+import os
+import unittest
+from compress import Compressor, gzip_file, is_fresh
+from site_test_case import SiteTestCase
+
+
+class TestCompress(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = os.path.join(self.root, "blog", "index.html")
+        self.write(self.page, "<p>hobbit</p>" * 200)
+        self.write(os.path.join(self.root, "index.css"), "body { color: red; }\n" * 100)
+        self.write(os.path.join(self.root, "small.html"), "<p>hi</p>")
+        self.write(os.path.join(self.root, "logo.png"), "not text" * 500)
+
+    def compress(self, **kwargs):
+        compressor = Compressor(**kwargs)
+        compressor.sweep(self.root)
+        return compressor.close()
+
+    def test_gzip_file(self):
+        gzip_file(self.page)
+        with gzip.open(f"{self.page}.gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>hobbit</p>" * 200)
+        self.assertTrue(is_fresh(self.page))
+        with open(f"{self.page}.gz", "rb") as file:
+            first = file.read()
+        gzip_file(self.page)
+        with open(f"{self.page}.gz", "rb") as file:
+            self.assertEqual(file.read(), first)
+
+    def test_threshold_and_suffixes(self):
+        stats = self.compress(min_size=1024)
+        self.assertEqual(sorted(os.path.basename(path) for path in stats.compressed), ["index.css.gz", "index.html.gz"])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "small.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "logo.png.gz")))
+
+    def test_incremental_build_recompresses_only_changes(self):
+        self.compress()
+        stats = self.compress()
+        self.assertEqual((stats.compressed, stats.fresh), ([], 2))
+
+        self.write(self.page, "<p>elf</p>" * 200)
+        stats = self.compress()
+        self.assertEqual(stats.compressed, [f"{self.page}.gz"])
+        with gzip.open(f"{self.page}.gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>elf</p>" * 200)
+
+    def test_stale_sidecars_are_removed(self):
+        self.compress()
+        os.remove(self.page)
+        self.write(os.path.join(self.root, "index.css"), "body {}")
+        stats = self.compress()
+        self.assertEqual(sorted(stats.removed), [os.path.join(self.root, "blog", "index.html.gz"), os.path.join(self.root, "index.css.gz")])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "blog")))
+
+    def test_compressed_static_files_are_not_taken_for_sidecars(self):
+        archive = os.path.join(self.root, "static", "data.tar.gz")
+        os.makedirs(os.path.dirname(archive))
+        with gzip.open(archive, "wt") as file:
+            file.write("tar" * 1000)
+        stats = self.compress()
+        self.assertTrue(os.path.isfile(archive))
+        self.assertNotIn(archive, stats.removed)
+
+    def test_submitted_outputs_are_not_swept_twice(self):
+        compressor = Compressor()
+        compressor.submit(self.page)
+        compressor.sweep(self.root)
+        stats = compressor.close()
+        self.assertEqual(sorted(stats.compressed), sorted([f"{self.page}.gz", os.path.join(self.root, "index.css.gz")]))
+
+
+if __name__ == '__main__':
+    unittest.main()
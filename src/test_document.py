@@ -0,0 +1,65 @@
+import unittest
+from block_cache import BlockCache
+from document import shorten
+from generate_page import extract_title
+from markdown_blocks import parse_markdown
+from url_resolver import UrlResolver
+
+MARKDOWN = """## Before the title
+
+# The **Real** Title
+
+[< Back Home](/)
+
+![A map](/images/map.png)
+
+Some **bold** text with a [link](/blog/) and `code`.
+
+```
+not counted [fake](/x)
+```
+
+## Details
+
+- one [item](https://example.com)
+- two
+
+> quoted words here
+"""
+
+
+class TestParseResult(unittest.TestCase):
+    def test_metadata_is_gathered_while_converting(self):
+        node, result = parse_markdown(MARKDOWN, UrlResolver("/site/"))
+        self.assertEqual(node.tag, "div")
+        self.assertEqual(result.title, "The Real Title")
+        self.assertEqual(result.outline, [(2, "Before the title"), (1, "The Real Title"), (2, "Details")])
+        self.assertEqual(result.images, [("A map", "/site/images/map.png")])
+        self.assertEqual(
+            result.links,
+            [("< Back Home", "/site/"), ("link", "/site/blog/"), ("item", "https://example.com")],
+        )
+        self.assertEqual(result.summary, "Some bold text with a link and code.")
+        self.assertEqual(result.word_count, 3 + 3 + 3 + 8 + 1 + 2 + 1 + 3)
+
+    def test_cached_blocks_still_contribute(self):
+        cache = BlockCache()
+        _, first = parse_markdown(MARKDOWN, cache=cache)
+        node, second = parse_markdown(MARKDOWN, cache=cache)
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(node.to_html(), parse_markdown(MARKDOWN)[0].to_html())
+        for name in ("title", "outline", "word_count", "images", "links", "summary"):
+            self.assertEqual(getattr(first, name), getattr(second, name))
+
+    def test_no_h1_means_no_title(self):
+        self.assertIsNone(parse_markdown("## Only a subheading\n\ntext")[1].title)
+        with self.assertRaises(ValueError):
+            extract_title("## Only a subheading\n\n```\n# not a heading\n```")
+
+    def test_shorten_cuts_at_a_word_boundary(self):
+        self.assertEqual(shorten("word " * 100, limit=22), "word word word word...")
+        self.assertEqual(shorten("short"), "short")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,6 +19,9 @@ class TestGeneratePage(unittest.TestCase):
         
         self.assertEqual(value, "This is an heading")
 
+    def test_extract_title_without_space(self):
+        self.assertEqual(extract_title("## Subtitle\n\n#Title"), "Title")
+
     def test_extract_title_no_heading_markdown(self):
         
         with self.assertRaises(ValueError):
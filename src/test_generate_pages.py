@@ -0,0 +1,170 @@
+import contextlib
+import filecmp
+import io
+import os
+import unittest
+from unittest import mock
+from block_cache import BlockCache
+from build_trace import Tracer
+from generate_page import BuildError, find_pages, generate_pages_pipelined, generate_pages_recursive, render_page
+from site_test_case import SiteTestCase
+from template import load_template
+from url_resolver import UrlResolver
+
+
+class TestGeneratePagesRecursive(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        for i in range(6):
+            self.write(
+                os.path.join(self.content, f"section{i % 2}", f"page{i}", "index.md"),
+                f"# Page {i}\n\nSome **bold** text and a [link](/page{i}).",
+            )
+
+    def build(self, dest_name, jobs, io_threads=0, cache=None):
+        dest = os.path.join(self.root, dest_name)
+        super().build("/site/", dest, jobs=jobs, io_threads=io_threads, cache=cache)
+        return dest
+
+    def assertSameOutput(self, expected, actual):
+        comparison = filecmp.dircmp(expected, actual)
+        self.assertEqual(comparison.left_only + comparison.right_only, [])
+        for from_path, dest_path in find_pages(self.content, expected):
+            other = os.path.join(actual, os.path.relpath(dest_path, expected))
+            self.assertTrue(filecmp.cmp(dest_path, other, shallow=False))
+
+    def test_find_pages(self):
+        pages = find_pages(self.content, "docs")
+        self.assertEqual(len(pages), 6)
+        self.assertEqual(str(pages[0][1]), os.path.join("docs", "section0", "page0", "index.html"))
+
+    def test_parallel_output_matches_serial(self):
+        serial = self.build("serial", jobs=1)
+        self.assertSameOutput(serial, self.build("parallel", jobs=3))
+
+    def test_pipelined_output_matches_serial(self):
+        serial = self.build("serial", jobs=1)
+        self.assertSameOutput(serial, self.build("pipelined", jobs=1, io_threads=3))
+        self.assertSameOutput(serial, self.build("both", jobs=2, io_threads=2))
+
+    def test_pipeline_with_more_pages_than_queue_slots(self):
+        template = load_template(self.template)
+        pages = find_pages(self.content, os.path.join(self.root, "docs"))
+        pages.append((os.path.join(self.content, "missing.md"), os.path.join(self.root, "docs", "missing.html")))
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = generate_pages_pipelined(pages, template, UrlResolver("/"), io_threads=2, depth=1)
+        self.assertEqual([from_path for from_path, _ in results], [from_path for from_path, _ in pages])
+        self.assertEqual([error for _, error in results[:-1]], [None] * 6)
+        self.assertIn("FileNotFoundError", results[-1][1])
+
+    def test_parallel_build_reports_the_blocks_its_workers_cached(self):
+        cache = BlockCache(1024 * 1024)
+        self.build("parallel", jobs=2, cache=cache)
+        self.assertEqual(cache.hits + cache.misses, 12)
+        self.assertNotIn(" 0 blocks", repr(cache))
+
+    def test_written_is_called_for_every_page(self):
+        for jobs, io_threads in ((1, 0), (2, 0), (1, 2)):
+            dest = os.path.join(self.root, f"written{jobs}-{io_threads}")
+            written = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content, self.template, dest, "/", jobs=jobs, io_threads=io_threads,
+                                         written=written.append)
+            self.assertEqual(sorted(map(str, written)), sorted(str(path) for _, path in find_pages(self.content, dest)))
+
+    def test_failures_are_reported_per_page(self):
+        broken = os.path.join(self.content, "section0", "page0", "index.md")
+        self.write(broken, "no title here")
+        for jobs, io_threads in ((1, 0), (2, 0), (1, 2)):
+            name = f"out{jobs}-{io_threads}"
+            with self.assertRaises(BuildError) as context:
+                self.build(name, jobs=jobs, io_threads=io_threads)
+            self.assertEqual([path for path, _ in context.exception.failures], [broken])
+            self.assertIn("No title found", context.exception.failures[0][1])
+            self.assertTrue(os.path.exists(os.path.join(self.root, name, "section1", "page1", "index.html")))
+
+
+class TestStreamPage(SiteTestCase):
+    MARKDOWN = (
+        "Intro with a [link](/blog/) and ![img](/i.png)\n\n# The Title\n\n"
+        "```\nfirst\n\nsecond\n```\n\n- one\n- **two**\n\n1. a\n2. b\n\n> quoted\n"
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.template_path = self.write("template.html", '<title>{{ Title }}</title><link href="/a.css">{{ Content }}')
+        self.source = self.write("page.md", self.MARKDOWN)
+        self.template = load_template(self.template_path, resolver=UrlResolver("/s/"))
+
+    def render(self, dest_name, stream_threshold, tracer=None):
+        dest_path = os.path.join(self.root, "out", dest_name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            render_page(self.source, self.template, dest_path, UrlResolver("/s/"), tracer or Tracer(),
+                        stream_threshold=stream_threshold)
+        with open(dest_path) as file:
+            return file.read()
+
+    def test_streamed_output_matches_whole_file_conversion(self):
+        tracer = Tracer()
+        streamed = self.render("streamed.html", 0, tracer)
+        self.assertEqual(streamed, self.render("whole.html", 1 << 30))
+        self.assertTrue(streamed.startswith('<title>The Title</title><link href="/s/a.css"><div><p>Intro with a <a href="/s/blog/">'))
+        self.assertIn("stream", tracer.page_totals()[self.source]["stages"])
+
+    def test_streamed_title_matches_parsed_title(self):
+        with open(self.source, "w") as file:
+            file.write("#Title without a space\n\nText.")
+        streamed = self.render("streamed.html", 0)
+        self.assertEqual(streamed, self.render("whole.html", 1 << 30))
+        self.assertTrue(streamed.startswith("<title>Title without a space</title>"))
+
+    def test_failed_stream_leaves_no_partial_page(self):
+        with open(self.source, "a") as file:
+            file.write("\n####### too deep\n")
+        with self.assertRaises(ValueError):
+            self.render("page.html", 0)
+        self.assertEqual(os.listdir(os.path.join(self.root, "out")), [])
+
+    def test_failed_write_keeps_the_previous_page(self):
+        dest_path = self.write(os.path.join("out", "page.html"), "previous")
+
+        def failing_write(template, file, values):
+            file.write("<title>")
+            raise OSError("disk full")
+
+        with mock.patch.object(type(self.template), "write", failing_write), self.assertRaises(OSError):
+            with contextlib.redirect_stdout(io.StringIO()):
+                render_page(self.source, self.template, dest_path, UrlResolver("/s/"))
+        self.assertEqual(self.read(dest_path), "previous")
+        self.assertEqual(os.listdir(os.path.join(self.root, "out")), ["page.html"])
+
+    def test_failed_open_keeps_its_own_error(self):
+        real_open = open
+
+        def failing_open(path, *args, **kwargs):
+            if str(path).endswith(".tmp"):
+                raise PermissionError("read-only")
+            return real_open(path, *args, **kwargs)
+
+        with mock.patch("builtins.open", failing_open), self.assertRaises(PermissionError):
+            self.render("page.html", 0)
+
+    def test_streamed_minified_output_matches_whole_file_conversion(self):
+        self.template = load_template(self.template_path, resolver=UrlResolver("/s/"), minify=True)
+        streamed = self.render("streamed.html", 0)
+        self.assertEqual(streamed, self.render("whole.html", 1 << 30))
+        self.assertIn('<link href=/s/a.css><div><p>Intro with a <a href=/s/blog/>', streamed)
+        self.assertIn("<pre><code>first\n\nsecond\n</code></pre>", streamed)
+
+    def test_pipeline_streams_large_files(self):
+        pages = [(self.source, os.path.join(self.root, "out", "page.html"))]
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = generate_pages_pipelined(pages, self.template, UrlResolver("/s/"), io_threads=1, stream_threshold=0)
+        self.assertEqual(results, [(self.source, None)])
+        with open(pages[0][1]) as file:
+            self.assertEqual(file.read(), self.render("whole.html", 1 << 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -214,4 +215,66 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(
             structure.to_html(),
             '<div><h1>Title</h1><section><p>Paragraph</p><div><span>Text</span><a href="#">Link</a></div></section></div>'
-            )
\ No newline at end of file
+            )
+
+    def test_write_html_streams_chunks(self):
+        """
+        Test that write_html writes the same HTML as to_html, in several chunks
+        """
+        structure = ParentNode("ul", [
+            ParentNode("li", [LeafNode(None, "one ")]),
+            ParentNode("li", [LeafNode("b", "two")], {"class": "x"}),
+        ])
+        chunks = []
+        structure.render(chunks.append)
+        self.assertGreater(len(chunks), 1)
+
+        buffer = io.StringIO()
+        structure.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "".join(chunks))
+        self.assertEqual(buffer.getvalue(), '<ul><li>one </li><li class="x"><b>two</b></li></ul>')
+
+    def test_render_falls_back_to_to_html(self):
+        """
+        Test that a child that only implements to_html can still be streamed
+        """
+        class Raw(HTMLNode):
+            def to_html(self, minify=False):
+                return "<hr>"
+
+        self.assertEqual(ParentNode("div", [Raw(), LeafNode("p", "x")]).to_html(), "<div><hr><p>x</p></div>")
+
+    def test_nodes_have_no_instance_dict(self):
+        """
+        Test that nodes use __slots__ and store empty props as None
+        """
+        for node in (HTMLNode("p"), LeafNode("p", "x", {}), ParentNode("div", [LeafNode("p", "x")])):
+            self.assertFalse(hasattr(node, "__dict__"))
+            self.assertIsNone(node.props)
+
+    def test_minify_drops_optional_quotes(self):
+        """
+        Test that minified attributes lose their quotes only where that is safe
+        """
+        node = LeafNode("a", "x", {"href": "/blog/", "title": "two words", "data-x": "", "class": "a=b"})
+        self.assertEqual(node.to_html(minify=True), '<a href=/blog/ title="two words" data-x="" class="a=b">x</a>')
+        self.assertEqual(node.to_html(), '<a href="/blog/" title="two words" data-x="" class="a=b">x</a>')
+
+    def test_minify_omits_void_end_tags(self):
+        """
+        Test that minified void elements have no end tag and other empty elements keep theirs
+        """
+        image = LeafNode("img", "", {"src": "/a.png", "alt": "A picture"})
+        self.assertEqual(image.to_html(minify=True), '<img src=/a.png alt="A picture">')
+        self.assertEqual(image.to_html(), '<img src="/a.png" alt="A picture"></img>')
+        self.assertEqual(LeafNode("span", "").to_html(minify=True), "<span></span>")
+
+    def test_minify_leaves_code_untouched(self):
+        """
+        Test that minifying never changes the text inside <pre><code>
+        """
+        code = ParentNode("pre", [ParentNode("code", [LeafNode(None, "a  =  1\n\n  b\n")])])
+        buffer = io.StringIO()
+        ParentNode("div", [code], {"class": "body"}).write_html(buffer, minify=True)
+        self.assertEqual(buffer.getvalue(), "<div class=body><pre><code>a  =  1\n\n  b\n</code></pre></div>")
+
@@ -0,0 +1,62 @@
+import os
+import struct
+import unittest
+from image_size import read_image_size
+from site_test_case import SiteTestCase
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII5B", 13, b"IHDR", width, height, 8, 6, 0, 0, 0) + b"\0" * 4
+
+
+def webp(chunk, payload):
+    data = chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(data) + 4) + b"WEBP" + data
+
+
+def jpeg(width, height, orientation=None):
+    segments = [b"\xff\xd8", b"\xff\xdb" + struct.pack(">H", 4) + b"\0\0"]
+    if orientation is not None:
+        tiff = b"MM\0*" + struct.pack(">IHHHIHHI", 8, 1, 0x0112, 3, 1, orientation, 0, 0)
+        exif = b"Exif\0\0" + tiff
+        segments.append(b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif)
+    frame = struct.pack(">BHHB", 8, height, width, 3) + b"\0" * 9
+    segments.append(b"\xff\xff\xc2" + struct.pack(">H", len(frame) + 2) + frame)
+    segments.append(b"\xff\xd9")
+    return b"".join(segments)
+
+
+class TestReadImageSize(SiteTestCase):
+    def size(self, data):
+        path = os.path.join(self.root, "image")
+        with open(path, "wb") as file:
+            file.write(data)
+        return read_image_size(path)
+
+    def test_png_and_gif(self):
+        self.assertEqual(self.size(png(1100, 438)), (1100, 438))
+        self.assertEqual(self.size(b"GIF87a" + struct.pack("<HH", 300, 200) + b"\0" * 8), (300, 200))
+
+    def test_webp(self):
+        lossy = b"\0\0\0" + b"\x9d\x01\x2a" + struct.pack("<HH", 400, 300)
+        self.assertEqual(self.size(webp(b"VP8 ", lossy)), (400, 300))
+        lossless = b"\x2f" + ((400 - 1) | (300 - 1) << 14).to_bytes(4, "little")
+        self.assertEqual(self.size(webp(b"VP8L", lossless)), (400, 300))
+        extended = b"\0" * 4 + (4000 - 1).to_bytes(3, "little") + (3000 - 1).to_bytes(3, "little")
+        self.assertEqual(self.size(webp(b"VP8X", extended)), (4000, 3000))
+
+    def test_jpeg_follows_exif_orientation(self):
+        self.assertEqual(self.size(jpeg(640, 480)), (640, 480))
+        self.assertEqual(self.size(jpeg(640, 480, orientation=1)), (640, 480))
+        self.assertEqual(self.size(jpeg(640, 480, orientation=6)), (480, 640))
+
+    def test_unreadable_images(self):
+        self.assertIsNone(self.size(b"png-a"))
+        self.assertIsNone(self.size(png(10, 10)[:20]))
+        self.assertIsNone(self.size(jpeg(640, 480)[:16]))
+        self.assertIsNone(self.size(b"\xff\xd8\xff\xd9"))
+        self.assertIsNone(self.size(webp(b"VP8X", b"\0" * 4)))
+
+
+if __name__ == '__main__':
+    unittest.main()
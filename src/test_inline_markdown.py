@@ -1,3 +1,4 @@
+import random
 import unittest
 from inline_markdown import (
     split_nodes_delimiter,
@@ -5,6 +6,7 @@ from inline_markdown import (
     extract_markdown_images,
     split_nodes_image,
     split_nodes_link,
+    split_nodes_images_and_links,
     text_to_textnodes
 )
 from textnode import TextNode, TextType
@@ -345,4 +347,99 @@ class TestSplitNodesDelimiter(unittest.TestCase):
                 TextNode("link", TextType.LINK, "https://boot.dev"),
             ],
             nodes,
-        )
\ No newline at end of file
+        )
+
+
+def pipeline_text_to_textnodes(text):
+    """
+    The original five-pass implementation, kept as the reference for the tokenizer.
+    """
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+class TestTokenizerEquivalence(unittest.TestCase):
+    SAMPLES = [
+        "",
+        "plain text",
+        "**bold** at start",
+        "ends with **bold**",
+        "****",
+        "**bold with _italic_ inside** and _italic with `code`_",
+        "`code with **stars**` **bold with `code`**",
+        "![image](/a.png)",
+        "![image](/a.png)![second](/b.png) and text",
+        "[link](/a) [other](/b) links",
+        "an ![image](/a.png) then a [link](/b) then **bold [link](/c)**",
+        "nested [brackets [in] text](/url) and (parens) [x](/u(1))",
+        "!not an image [but a link](/x)",
+        "_[link in italic](/x)_ and `![image in code](/y)`",
+        "x![a](b)[c](d)y",
+    ]
+
+    def assert_equivalent(self, text):
+        try:
+            expected = pipeline_text_to_textnodes(text)
+        except ValueError:
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+            return
+        self.assertEqual(text_to_textnodes(text), expected, text)
+
+    def test_samples(self):
+        for text in self.SAMPLES:
+            self.assert_equivalent(text)
+
+    def test_unclosed_delimiters_raise(self):
+        for text in ("**open", "a _b", "`c", "**a _b** c_"):
+            self.assert_equivalent(text)
+
+    def test_random_documents(self):
+        pieces = [
+            "word", " ", "**", "_", "`", "![alt](/i.png)", "[text](/page)", "[![a](/b.png)](/c)",
+            "!", "[", "]", "(", ")", "![", "](",
+        ]
+        rng = random.Random(7)
+        for _ in range(2000):
+            self.assert_equivalent("".join(rng.choice(pieces) for _ in range(rng.randint(0, 12))))
+
+
+class TestPositionBasedSplitting(unittest.TestCase):
+    def test_link_text_repeated_inside_image(self):
+        node = TextNode("![x](/u) then [x](/u)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("![x](/u) then ", TextType.TEXT),
+                TextNode("x", TextType.LINK, "/u"),
+            ],
+            split_nodes_link([node]),
+        )
+
+    def test_images_and_links_in_one_scan(self):
+        node = TextNode("a ![i](/i.png) b [l](/l) ![i](/i.png)", TextType.TEXT)
+        expected = [
+            TextNode("a ", TextType.TEXT),
+            TextNode("i", TextType.IMAGE, "/i.png"),
+            TextNode(" b ", TextType.TEXT),
+            TextNode("l", TextType.LINK, "/l"),
+            TextNode(" ", TextType.TEXT),
+            TextNode("i", TextType.IMAGE, "/i.png"),
+        ]
+        self.assertListEqual(expected, split_nodes_images_and_links([node]))
+        self.assertListEqual(expected, split_nodes_link(split_nodes_image([node])))
+
+    def test_image_inside_link_keeps_image_precedence(self):
+        node = TextNode("[![a](/b.png)](/c)", TextType.TEXT)
+        self.assertListEqual(split_nodes_link(split_nodes_image([node])), split_nodes_images_and_links([node]))
+
+    def test_many_links(self):
+        text = " ".join(f"[page {i}](/p/{i})" for i in range(2000))
+        nodes = split_nodes_images_and_links([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(nodes), 3999)
+        self.assertEqual(nodes[-1], TextNode("page 1999", TextType.LINK, "/p/1999"))
+
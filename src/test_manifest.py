@@ -0,0 +1,177 @@
+import contextlib
+import io
+import os
+import unittest
+from generate_page import find_pages, generate_pages_recursive, page_dependencies
+from manifest import BuildManifest
+from site_test_case import SiteTestCase
+from url_resolver import FingerprintResolver, UrlResolver
+
+
+class ManifestTestCase(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+
+
+class TestBuildManifest(ManifestTestCase):
+    def test_first_build_generates_everything(self):
+        manifest, _ = self.build()
+        self.assertEqual((manifest.generated, manifest.skipped), (2, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "post", "index.html")))
+
+    def test_noop_rebuild_skips_everything(self):
+        self.build()
+        manifest, removed = self.build()
+        self.assertEqual((manifest.generated, manifest.skipped), (0, 2))
+        self.assertEqual(removed, [])
+
+    def test_markdown_change_rebuilds_only_that_page(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home again")
+        manifest, _ = self.build()
+        self.assertEqual((manifest.generated, manifest.skipped), (1, 1))
+        with open(os.path.join(self.docs, "index.html")) as file:
+            self.assertIn("Home again", file.read())
+
+    def test_template_and_basepath_changes_rebuild_everything(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        manifest, _ = self.build()
+        self.assertEqual(manifest.generated, 2)
+        manifest, _ = self.build("/site/")
+        self.assertEqual(manifest.generated, 2)
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        manifest, _ = self.build()
+        self.assertEqual((manifest.generated, manifest.skipped), (1, 1))
+
+    def test_deleted_source_is_pruned(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        os.rmdir(os.path.join(self.content, "blog", "post"))
+        manifest, removed = self.build()
+        self.assertEqual(removed, [os.path.join(self.docs, "blog", "post", "index.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertNotIn(os.path.join(self.content, "blog", "post", "index.md"), manifest.pages)
+
+    def test_manifest_is_kept_next_to_the_output(self):
+        manifest, _ = self.build()
+        self.assertEqual(manifest.path, os.path.join(self.root, ".docs-manifest.json"))
+        self.assertTrue(os.path.isfile(manifest.path))
+        self.assertEqual(sorted(os.listdir(self.docs)), ["blog", "index.html"])
+
+
+class TestDependencyGraph(ManifestTestCase):
+    def plan(self, basepath="/", resolver=None):
+        manifest = BuildManifest.load(self.docs)
+        pages = find_pages(self.content, self.docs)
+        dependencies = lambda from_path: page_dependencies(from_path, self.template)
+        dirty = manifest.plan(pages, dependencies, {"basepath": basepath}, resolver=resolver)
+        return manifest, dirty
+
+    def test_pages_record_their_dependencies(self):
+        manifest, _ = self.build()
+        index = os.path.join(self.content, "index.md")
+        self.assertEqual(set(manifest.pages[index]["deps"]), {index, self.template})
+        self.assertEqual(manifest.pages[index]["params"], {"basepath": "/"})
+
+    def test_dependents(self):
+        manifest, _ = self.build()
+        index = os.path.join(self.content, "index.md")
+        self.assertEqual(manifest.dependents([self.template]), set(manifest.pages))
+        self.assertEqual(manifest.dependents([index]), {index})
+        self.assertEqual(manifest.dependents(["unrelated.css"]), set())
+
+    def test_plan_explains_dirty_pages(self):
+        self.build()
+        self.assertEqual(self.plan()[1], {})
+
+        self.write(os.path.join(self.content, "index.md"), "# Home again")
+        _, dirty = self.plan()
+        self.assertEqual(dirty, {os.path.join(self.content, "index.md"): [f"{os.path.join(self.content, 'index.md')} changed"]})
+
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        _, dirty = self.plan("/site/")
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        self.assertEqual(len(dirty), 2)
+        self.assertEqual(dirty[post], [f"{self.template} changed", "basepath changed from '/' to '/site/'"])
+
+    def test_dropped_param_is_a_change(self):
+        manifest, _ = self.build()
+        index = os.path.join(self.content, "index.md")
+        manifest.pages[index]["params"]["assets"] = "abc"
+        manifest.save()
+        _, dirty = self.plan()
+        self.assertEqual(dirty, {index: ["assets changed from 'abc' to None"]})
+
+    def test_plan_new_page_and_missing_output(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        self.write(os.path.join(self.content, "about.md"), "# About")
+        manifest, dirty = self.plan()
+        self.assertEqual(dirty, {
+            os.path.join(self.content, "about.md"): ["new page"],
+            os.path.join(self.content, "index.md"): ["output missing"],
+        })
+        self.assertEqual(manifest.skipped, 1)
+
+    def test_deleted_dependency_is_a_change(self):
+        manifest, _ = self.build()
+        index = os.path.join(self.content, "index.md")
+        entry = manifest.pages[index]
+        entry["deps"]["shared.md"] = "0" * 64
+        manifest.save()
+        _, dirty = self.plan()
+        self.assertEqual(dirty, {index: ["shared.md deleted"]})
+
+    def test_pages_depend_on_the_assets_they_use(self):
+        self.write(self.template, '<link href="/index.css"><title>{{ Title }}</title>{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![Tom](/tom.png) and [the post](/blog/post/).")
+        table = {"/index.css": "/index.0123456789.css", "/tom.png": "/tom.0123456789.png", "/rivendell.png": "/rivendell.0123456789.png"}
+        manifest, _ = self.build(resolver=FingerprintResolver("/", table))
+        index = os.path.join(self.content, "index.md")
+        self.assertEqual(manifest.pages[index]["urls"], {"/index.css": {"url": "/index.0123456789.css"},
+                                                        "/tom.png": {"url": "/tom.0123456789.png"}})
+
+        table["/rivendell.png"] = "/rivendell.abcdef0123.png"
+        manifest, _ = self.build(resolver=FingerprintResolver("/", table))
+        self.assertEqual((manifest.generated, manifest.skipped), (0, 2))
+
+        table["/tom.png"] = "/tom.abcdef0123.png"
+        _, dirty = self.plan(resolver=FingerprintResolver("/", table))
+        self.assertEqual(dirty, {index: ["asset /tom.png changed"]})
+        manifest, _ = self.build(resolver=FingerprintResolver("/", table))
+        self.assertEqual((manifest.generated, manifest.skipped), (1, 1))
+
+        table["/index.css"] = "/index.abcdef0123.css"
+        manifest, _ = self.build(resolver=FingerprintResolver("/", table))
+        self.assertEqual((manifest.generated, manifest.skipped), (2, 0))
+
+    def test_pages_depend_on_the_sizes_of_their_images(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![Tom](/tom.png)")
+        sizes = {"/tom.png": (3, 2), "/rivendell.png": (5, 4)}
+        self.build(resolver=UrlResolver("/", sizes))
+        manifest, _ = self.build(resolver=UrlResolver("/", dict(sizes, **{"/rivendell.png": (50, 40)})))
+        self.assertEqual((manifest.generated, manifest.skipped), (0, 2))
+        _, dirty = self.plan(resolver=UrlResolver("/", {"/tom.png": (30, 20)}))
+        self.assertEqual(dirty, {os.path.join(self.content, "index.md"): ["asset /tom.png changed"]})
+
+    def test_explain_is_printed_before_rendering(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            generate_pages_recursive(self.content, self.template, self.docs, "/", BuildManifest.load(self.docs), explain=True)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "2 of 2 pages need rebuilding")
+        self.assertIn(f"{self.template} changed", lines[1])
+        self.assertTrue(lines[3].startswith("Generating page"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,11 @@ from markdown_blocks import (
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
+    iter_blocks,
+    Block,
     BlockType,
 )
+from url_resolver import UrlResolver
 
 
 
@@ -208,7 +211,74 @@ the **same** even with inline stuff
             html,
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
-        
-    
+
+    def test_code_with_blank_lines(self):
+        md = """
+```
+first
+
+second
+```
+
+after
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>first\n\nsecond\n</code></pre><p>after</p></div>",
+        )
+
+    def test_urls_resolved_at_link_construction(self):
+        md = """
+See [home](/) and ![logo](/logo.png), or [tom](blog/tom) and [x](https://x.org/).
+
+```
+<a href="/literal">
+```
+"""
+
+        node = markdown_to_html_node(md, UrlResolver("/site/"))
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p>See <a href="/site/">home</a> and <img src="/site/logo.png" alt="logo"></img>, or '
+            '<a href="blog/tom">tom</a> and <a href="https://x.org/">x</a>.</p>'
+            '<pre><code><a href="/literal">\n</code></pre></div>',
+        )
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_types_and_spans(self):
+        md = "# Title\n\n> a\n> b\n\n\n1. one\n2. two\n3 three\n\n- x\n- y"
+        self.assertEqual(
+            list(iter_blocks(md.split("\n"))),
+            [
+                Block(BlockType.HEADING, ["# Title"], 0, 1),
+                Block(BlockType.QUOTE, ["> a", "> b"], 2, 4),
+                Block(BlockType.PARAGRAPH, ["1. one", "2. two", "3 three"], 6, 9),
+                Block(BlockType.UNORDERED_LIST, ["- x", "- y"], 10, 12),
+            ],
+        )
+
+    def test_whitespace_only_lines_separate_blocks(self):
+        blocks = list(iter_blocks(["  first  ", "   ", "second   "]))
+        self.assertEqual([block.lines for block in blocks], [["first"], ["second"]])
+
+    def test_single_line_fence(self):
+        blocks = list(iter_blocks(["```let ben = cute```", "text"]))
+        self.assertEqual([block.block_type for block in blocks], [BlockType.CODE, BlockType.PARAGRAPH])
+
+    def test_unclosed_fence_runs_to_end(self):
+        blocks = list(iter_blocks(["```", "> code", "", "more"]))
+        self.assertEqual(blocks, [Block(BlockType.PARAGRAPH, ["```", "> code", "", "more"], 0, 4)])
+
+    def test_reads_from_iterator(self):
+        blocks = iter_blocks(iter(["a", "", "b"]))
+        self.assertEqual(next(blocks).lines, ["a"])
+        self.assertEqual(next(blocks).lines, ["b"])
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import subprocess
+import sys
+import unittest
+from generate_page import page_shard, shard_pages
+from manifest import BuildManifest
+from site_test_case import SiteTestCase
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestShardPages(unittest.TestCase):
+    def test_page_shard_is_a_stable_hash_of_the_content_path(self):
+        self.assertEqual(page_shard("blog/tom/index.md", 4), 2)
+        self.assertEqual(page_shard(os.path.join("blog", "tom", "index.md"), 4), 2)
+        self.assertEqual(page_shard("index.md", 1), 1)
+
+    def test_every_page_is_in_exactly_one_shard(self):
+        pages = [(os.path.join("content", f"page{i}", "index.md"), None) for i in range(50)]
+        shards = [shard_pages(pages, "content", (index, 3)) for index in (1, 2, 3)]
+        self.assertEqual(sorted(page for shard in shards for page in shard), sorted(pages))
+        self.assertTrue(all(shards))
+
+
+class TestShardedBuild(SiteTestCase):
+    """
+    Builds a small site as shard processes running in parallel, as separate
+    machines would, and merges them.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        self.write(os.path.join("static", "index.css"), "body {}")
+        with open(os.path.join(self.root, "static", "tom.gif"), "wb") as file:
+            file.write(b"GIF89a\x03\x00\x02\x00")
+        self.write(os.path.join("content", "index.md"), "# Home\n\n![Tom](/tom.gif)")
+        for i in range(6):
+            self.write(os.path.join("content", "blog", f"post{i}", "index.md"), f"# Post {i}\n\nText of post {i}.")
+
+    def run_script(self, script, *args):
+        return subprocess.run(
+            [sys.executable, os.path.join(SRC_DIR, script), *args], cwd=self.root, capture_output=True, text=True
+        )
+
+    def build_shards(self, count, *args):
+        processes = [
+            subprocess.Popen(
+                [sys.executable, os.path.join(SRC_DIR, "main.py"), *args, "--shard", f"{index}/{count}",
+                 "--output", os.path.join("shards", str(index))],
+                cwd=self.root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+            )
+            for index in range(1, count + 1)
+        ]
+        outputs = [process.communicate()[0] for process in processes]
+        for process, output in zip(processes, outputs):
+            self.assertEqual(process.returncode, 0, output)
+        return outputs
+
+    def merge(self, count, *args):
+        shard_dirs = [os.path.join("shards", str(index)) for index in range(1, count + 1)]
+        return self.run_script("merge.py", *args, *shard_dirs)
+
+    def tree(self, dir_name):
+        files = {}
+        top = os.path.join(self.root, dir_name)
+        for dir_path, _, filenames in os.walk(top):
+            for filename in filenames:
+                with open(os.path.join(dir_path, filename), "rb") as file:
+                    files[os.path.relpath(os.path.join(dir_path, filename), top)] = file.read()
+        return files
+
+    def test_merged_shards_match_a_single_build(self):
+        self.build_shards(3, "/site/")
+        merged = self.merge(3, "--basepath", "/site/", "--site-url", "https://example.com")
+        self.assertEqual(merged.returncode, 0, merged.stderr)
+        self.assertEqual(self.run_script("main.py", "/site/", "--output", "full", "--site-url", "https://example.com").returncode, 0)
+        self.assertEqual(self.tree("docs"), self.tree("full"))
+        self.assertIn(b'width="3" height="2"', self.tree("docs")["index.html"])
+        self.assertNotIn("index.css", os.listdir(os.path.join(self.root, "shards", "1")))
+
+        manifest = BuildManifest.load(os.path.join(self.root, "docs"))
+        self.assertEqual(len(manifest.pages), 7)
+        for entry in manifest.pages.values():
+            self.assertTrue(entry["dest"].startswith(os.path.join("docs", "")), entry["dest"])
+            self.assertIn("meta", entry)
+
+    def test_only_changed_pages_are_rebuilt_and_copied(self):
+        self.build_shards(2)
+        self.assertEqual(self.merge(2).returncode, 0)
+
+        self.write(os.path.join("content", "blog", "post1", "index.md"), "# Post 1\n\nEdited.")
+        os.remove(os.path.join(self.root, "content", "blog", "post2", "index.md"))
+        outputs = self.build_shards(2)
+        self.assertEqual(sum(output.count("Generating page") for output in outputs), 1)
+        merged = self.merge(2)
+        self.assertEqual(merged.returncode, 0, merged.stderr)
+        self.assertIn("1 copied, 5 unchanged, 0 missing", merged.stdout)
+        self.assertIn(b"Edited.", self.tree("docs")[os.path.join("blog", "post1", "index.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "docs", "blog", "post2")))
+
+    def test_merged_search_index_matches_a_single_build(self):
+        self.build_shards(2, "--search-index")
+        merged = self.merge(2, "--search-index")
+        self.assertEqual(merged.returncode, 0, merged.stderr)
+        self.assertIn("7 pages indexed", merged.stdout)
+        self.assertEqual(self.run_script("main.py", "--output", "full", "--search-index").returncode, 0)
+        self.assertEqual(self.tree("docs"), self.tree("full"))
+        self.assertIn(os.path.join("search", "docs.json"), self.tree("docs"))
+        manifest = BuildManifest.load(os.path.join(self.root, "docs"))
+        self.assertFalse(any("terms" in entry for entry in manifest.pages.values()))
+
+        self.write(os.path.join("content", "blog", "post1", "index.md"), "# Post 1\n\nEdited.")
+        self.build_shards(2)
+        merged = self.merge(2, "--search-index")
+        self.assertEqual(merged.returncode, 1)
+        self.assertIn("without --search-index", merged.stderr)
+
+    def test_mismatched_shards_are_not_merged(self):
+        self.build_shards(2, "/site/")
+        merged = self.merge(2)
+        self.assertEqual(merged.returncode, 1)
+        self.assertIn("but the merge expects", merged.stderr)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "docs", "index.html")))
+
+        merged = self.merge(1, "--basepath", "/site/")
+        self.assertEqual(merged.returncode, 1)
+        self.assertIn("No shard built", merged.stderr)
+
+    def test_minified_shards_are_only_merged_with_minify(self):
+        self.build_shards(2, "--minify")
+        merged = self.merge(2)
+        self.assertEqual(merged.returncode, 1)
+        self.assertIn("'minify': True", merged.stderr)
+        merged = self.merge(2, "--minify")
+        self.assertEqual(merged.returncode, 0, merged.stderr)
+        self.assertEqual(self.run_script("main.py", "--output", "full", "--minify").returncode, 0)
+        self.assertEqual(self.tree("docs"), self.tree("full"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import os
+import unittest
+from block_cache import BlockCache
+from manifest import BuildManifest
+from markdown_blocks import parse_markdown
+from search_index import SearchIndexUpdate, decode_postings, encode_postings, shard_name
+from site_test_case import SiteTestCase
+from url_resolver import UrlResolver
+
+
+class TestTokenizing(unittest.TestCase):
+    def test_terms_are_gathered_while_parsing(self):
+        markdown = (
+            "# The **Hobbit** Title\n\nA [linked word](/x) and ![an elvish map](/m.png) and `inline code`.\n\n"
+            "```\nfenced ignored\n```\n\n- hobbit one\n1. hobbit two\n\n> quoted hobbit"
+        )
+        terms = parse_markdown(markdown)[1].terms
+        self.assertEqual(terms["hobbit"], 4)
+        for term in ("title", "linked", "word", "elvish", "map", "inline", "code", "one", "two", "quoted"):
+            self.assertEqual(terms[term], 1, term)
+        for term in ("fenced", "the", "a", "x", "png"):
+            self.assertNotIn(term, terms)
+
+    def test_cached_blocks_keep_their_terms(self):
+        cache = BlockCache(1024 * 1024)
+        terms = parse_markdown("Ring ring.\n\nRing ring.", cache=cache)[1].terms
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(terms["ring"], 4)
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("hobbit"), "ho")
+        self.assertEqual(shard_name("élan"), "_e9l")
+        self.assertEqual(shard_name("a_b"), "a_5f")
+
+    def test_postings_round_trip(self):
+        postings = {7: 2, 0: 1, 3: 5}
+        self.assertEqual(encode_postings(postings), [0, 1, 3, 5, 4, 2])
+        self.assertEqual(decode_postings(encode_postings(postings)), postings)
+
+
+class TestSearchIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome to the shire.")
+        self.write(os.path.join(self.content, "ring", "index.md"), "# Ring\n\nOne ring, one shire, one ring.")
+        self.write(os.path.join(self.content, "tree", "index.md"), "# Tree\n\nAn old tree.")
+
+    def build(self, docs=None, spill_postings=100_000):
+        docs = docs or self.docs
+        manifest = BuildManifest.load(docs)
+        search = SearchIndexUpdate(manifest, docs, spill_postings)
+        super().build("/site/", docs, manifest, search=search)
+        stats = search.finish(UrlResolver("/site/"))
+        manifest.save()
+        return stats
+
+    def lookup(self, term, docs=None):
+        search_dir = os.path.join(docs or self.docs, "search")
+        with open(os.path.join(search_dir, "docs.json")) as file:
+            table = json.load(file)["docs"]
+        try:
+            with open(os.path.join(search_dir, "shards", f"{shard_name(term)}.json")) as file:
+                encoded = json.load(file).get(term, [])
+        except FileNotFoundError:
+            encoded = []
+        return {table[doc_id][0]: count for doc_id, count in decode_postings(encoded).items()}
+
+    def test_index_maps_terms_to_pages(self):
+        stats = self.build()
+        self.assertEqual((stats.indexed, stats.removed), (3, 0))
+        self.assertEqual(self.lookup("shire"), {"/site/": 1, "/site/ring/": 1})
+        self.assertEqual(self.lookup("ring"), {"/site/ring/": 3})
+        self.assertEqual(self.lookup("dragon"), {})
+
+    def test_only_changed_pages_are_reindexed(self):
+        self.build()
+        stats = self.build()
+        self.assertEqual((stats.indexed, stats.removed, stats.written), (0, 0, []))
+
+        self.write(os.path.join(self.content, "ring", "index.md"), "# Ring\n\nA dragon, no shire.")
+        os.remove(os.path.join(self.content, "tree", "index.md"))
+        self.write(os.path.join(self.content, "cave", "index.md"), "# Cave\n\nA dragon sleeps.")
+        stats = self.build()
+        self.assertEqual((stats.indexed, stats.removed), (2, 1))
+        self.assertEqual(self.lookup("ring"), {"/site/ring/": 1})
+        self.assertEqual(self.lookup("dragon"), {"/site/ring/": 1, "/site/cave/": 1})
+        self.assertEqual(self.lookup("old"), {})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "search", "shards", "ol.json")))
+
+        with open(os.path.join(self.docs, "search", "docs.json")) as file:
+            self.assertEqual(len(json.load(file)["docs"]), 3)
+
+    def test_spilling_does_not_change_the_index(self):
+        self.build()
+        small = os.path.join(self.root, "small")
+        self.build(small, spill_postings=1)
+        for name in os.listdir(os.path.join(self.docs, "search", "shards")):
+            with open(os.path.join(self.docs, "search", "shards", name)) as expected, \
+                    open(os.path.join(small, "search", "shards", name)) as actual:
+                self.assertEqual(expected.read(), actual.read())
+
+    def test_missing_index_is_rebuilt(self):
+        self.build()
+        for name in os.listdir(os.path.join(self.docs, "search", "shards")):
+            os.remove(os.path.join(self.docs, "search", "shards", name))
+        os.rmdir(os.path.join(self.docs, "search", "shards"))
+        self.assertEqual(self.build().indexed, 3)
+        self.assertEqual(self.lookup("shire"), {"/site/": 1, "/site/ring/": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import unittest
+from site_index import page_url
+from site_test_case import SiteTestCase
+
+
+class TestPageUrl(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("docs", "index.html"), "docs"), "/")
+        self.assertEqual(page_url(os.path.join("docs", "blog", "tom", "index.html"), "docs"), "/blog/tom/")
+        self.assertEqual(page_url(os.path.join("docs", "about.html"), "docs"), "/about.html")
+
+
+class TestSiteIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome & hello.")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nAll posts.")
+        self.write(os.path.join(self.content, "blog", "first", "index.md"), "# First\n\n[< Back](/)\n\nThe first post.")
+        self.write(os.path.join(self.content, "blog", "second", "index.md"), "# Second\n\nThe second post.")
+        os.utime(os.path.join(self.content, "blog", "first", "index.md"), (1700000000, 1700000000))
+
+    def build(self, **kwargs):
+        return super().build("/site/", site_url="https://example.com/", **kwargs)[0]
+
+    def test_sitemap_and_feed(self):
+        self.build()
+        sitemap = self.read(self.docs, "sitemap.xml")
+        self.assertIn("<loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/site/blog/first/</loc><lastmod>2023-11-14T22:13:20+00:00</lastmod>", sitemap)
+        self.assertEqual(sitemap.count("<url>"), 4)
+
+        feed = self.read(self.docs, "blog", "feed.xml")
+        self.assertIn("<title>Blog</title>", feed)
+        self.assertIn('<link href="https://example.com/site/blog/feed.xml" rel="self"/>', feed)
+        self.assertEqual(feed.count("<entry>"), 2)
+        self.assertLess(feed.index("<title>Second</title>"), feed.index("<title>First</title>"))
+        self.assertIn("<summary>The first post.</summary>", feed)
+
+    def test_skipped_pages_stay_in_the_index(self):
+        self.build()
+        sitemap_path = os.path.join(self.docs, "sitemap.xml")
+        os.utime(sitemap_path, (1, 1))
+        manifest = self.build()
+        self.assertEqual(manifest.generated, 0)
+        self.assertEqual(os.stat(sitemap_path).st_mtime, 1)
+
+        self.write(os.path.join(self.content, "blog", "second", "index.md"), "# Renamed\n\nThe second post.")
+        os.remove(os.path.join(self.content, "index.md"))
+        manifest = self.build()
+        self.assertEqual(manifest.generated, 1)
+        self.assertIn("<title>Renamed</title>", self.read(self.docs, "blog", "feed.xml"))
+        self.assertIn("<title>First</title>", self.read(self.docs, "blog", "feed.xml"))
+        self.assertNotIn("<loc>https://example.com/site/</loc>", self.read(self.docs, "sitemap.xml"))
+
+    def test_feed_of_an_emptied_section_is_deleted(self):
+        self.build()
+        for name in ("first", "second"):
+            os.remove(os.path.join(self.content, "blog", name, "index.md"))
+        manifest = self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "feed.xml")))
+        self.assertEqual(manifest.outputs, [os.path.join(self.docs, "sitemap.xml")])
+
+    def test_index_files_are_removed_once_site_url_is_dropped(self):
+        self.build()
+        manifest, removed = super().build("/site/")
+        self.assertEqual(sorted(removed), [os.path.join(self.docs, "blog", "feed.xml"), os.path.join(self.docs, "sitemap.xml")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "sitemap.xml")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "index.html")))
+        self.assertEqual(manifest.outputs, [])
+
+    def test_parallel_and_pipelined_builds_gather_metadata(self):
+        self.build(jobs=2, io_threads=2)
+        self.assertIn("<summary>The second post.</summary>", self.read(self.docs, "blog", "feed.xml"))
+
+
+if __name__ == '__main__':
+    unittest.main()
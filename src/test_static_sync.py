@@ -0,0 +1,169 @@
+import os
+import unittest
+from manifest import BuildManifest
+from site_test_case import SiteTestCase
+from static_sync import cached_hash, copy_file, find_static_files, fingerprinted_path, rewrite_stylesheet, sync_static
+
+
+class StaticTestCase(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png-a")
+        self.write(os.path.join(self.docs, "index.html"), "<p>page</p>")
+
+    def sync(self, **kwargs):
+        manifest = BuildManifest.load(self.docs)
+        stats = sync_static(self.static, self.docs, manifest, **kwargs)
+        manifest.save()
+        return stats
+
+
+class TestSyncStatic(StaticTestCase):
+    def test_find_static_files(self):
+        self.assertEqual(find_static_files(self.static), ["index.css", os.path.join("images", "a.png")])
+
+    def test_first_sync_copies_everything(self):
+        stats = self.sync()
+        self.assertEqual((len(stats.copied), stats.unchanged, stats.removed), (2, 0, []))
+        self.assertEqual(self.read(os.path.join(self.docs, "images", "a.png")), "png-a")
+
+    def test_second_sync_copies_nothing(self):
+        self.sync()
+        stats = self.sync()
+        self.assertEqual((len(stats.copied), stats.unchanged), (0, 2))
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        stats = self.sync()
+        self.assertEqual(stats.copied, [os.path.join(self.docs, "index.css")])
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body { color: red }")
+
+    def test_hash_compare_ignores_touched_files(self):
+        self.sync(compare="hash")
+        path = os.path.join(self.static, "index.css")
+        os.utime(path, (1, 1))
+        stats = self.sync(compare="hash")
+        self.assertEqual(stats.copied, [])
+        self.write(path, "body { color: blue }")
+        stats = self.sync(compare="hash")
+        self.assertEqual(stats.copied, [os.path.join(self.docs, "index.css")])
+
+    def test_orphans_removed_but_pages_kept(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        stats = self.sync()
+        self.assertEqual(stats.removed, [os.path.join(self.docs, "images", "a.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_hardlink(self):
+        self.sync(hardlink=True)
+        self.assertTrue(os.path.samefile(os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css")))
+        self.assertEqual(self.sync(hardlink=True).unchanged, 2)
+        # Switching back to copies must not write through the link into static/.
+        self.sync()
+        self.write(os.path.join(self.docs, "index.css"), "changed")
+        self.assertEqual(self.read(os.path.join(self.static, "index.css")), "body {}")
+
+    def test_copy_file_preserves_mtime(self):
+        from_path = os.path.join(self.static, "index.css")
+        dest_path = os.path.join(self.root, "copy.css")
+        os.utime(from_path, ns=(1_000_000_000, 1_000_000_000))
+        copy_file(from_path, dest_path)
+        self.assertEqual(self.read(dest_path), "body {}")
+        self.assertEqual(os.stat(dest_path).st_mtime_ns, 1_000_000_000)
+
+
+class TestFingerprint(StaticTestCase):
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path(os.path.join("images", "a.png"), "0123456789abcdef"),
+                         os.path.join("images", "a.0123456789.png"))
+
+    def test_assets_are_copied_under_hashed_names(self):
+        self.write(os.path.join(self.static, "robots.txt"), "User-agent: *")
+        stats = self.sync(fingerprint=True)
+        css = stats.fingerprints["/index.css"]
+        self.assertRegex(css, r"^/index\.[0-9a-f]{10}\.css$")
+        self.assertRegex(stats.fingerprints["/images/a.png"], r"^/images/a\.[0-9a-f]{10}\.png$")
+        self.assertNotIn("/robots.txt", stats.fingerprints)
+        self.assertEqual(self.read(os.path.join(self.docs, css[1:])), "body {}")
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "robots.txt")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+    def test_changed_asset_replaces_its_old_copy(self):
+        old = self.sync(fingerprint=True).fingerprints["/index.css"]
+        self.assertEqual(self.sync(fingerprint=True).copied, [])
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        stats = self.sync(fingerprint=True)
+        new = stats.fingerprints["/index.css"]
+        self.assertNotEqual(old, new)
+        self.assertEqual(stats.copied, [os.path.join(self.docs, new[1:])])
+        self.assertEqual(stats.removed, [os.path.join(self.docs, old[1:])])
+
+    def test_turning_fingerprints_off_restores_plain_names(self):
+        old = self.sync(fingerprint=True).fingerprints["/index.css"]
+        stats = self.sync()
+        self.assertEqual(stats.fingerprints, {})
+        self.assertIn(os.path.join(self.docs, old[1:]), stats.removed)
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body {}")
+
+    def test_image_sizes_are_read_once(self):
+        path = os.path.join(self.static, "images", "b.gif")
+        with open(path, "wb") as file:
+            file.write(b"GIF89a\x03\x00\x02\x00")
+        stats = self.sync()
+        self.assertEqual(stats.image_sizes, {"/images/b.gif": (3, 2)})
+
+        manifest = BuildManifest.load(self.docs)
+        self.assertIsNone(manifest.assets[os.path.join("images", "a.png")]["image"])
+        manifest.assets[os.path.join("images", "b.gif")]["image"] = [30, 20]
+        manifest.save()
+        self.assertEqual(self.sync().image_sizes, {"/images/b.gif": (30, 20)})
+
+    def test_rewrite_stylesheet(self):
+        table = {"/fonts/a.woff2": "/fonts/a.0123456789.woff2", "/images/a.png": "/images/a.9876543210.png"}
+        text, refs = rewrite_stylesheet(
+            "@font-face { src: url('../fonts/a.woff2?v=1#x') }\n"
+            "h1 { background: url(/images/a.png), url(data:image/gif;base64,R0) }\n"
+            'p { background: url("b.png") }',
+            os.path.join("css", "index.css"), table,
+        )
+        self.assertEqual(text, "@font-face { src: url('../fonts/a.0123456789.woff2?v=1#x') }\n"
+                               "h1 { background: url(/images/a.9876543210.png), url(data:image/gif;base64,R0) }\n"
+                               'p { background: url("b.png") }')
+        self.assertEqual(refs, {"/fonts/a.woff2": "/fonts/a.0123456789.woff2",
+                                "/images/a.png": "/images/a.9876543210.png", "/css/b.png": None})
+
+    def test_stylesheets_point_at_fingerprinted_assets(self):
+        self.write(os.path.join(self.static, "fonts", "a.woff2"), "font-a")
+        self.write(os.path.join(self.static, "index.css"), "@import url(base.css);\nbody { background: url(images/a.png) }")
+        self.write(os.path.join(self.static, "base.css"), "@font-face { src: url(fonts/a.woff2) }")
+        stats = self.sync(fingerprint=True)
+        font, png = stats.fingerprints["/fonts/a.woff2"], stats.fingerprints["/images/a.png"]
+        base, css = stats.fingerprints["/base.css"], stats.fingerprints["/index.css"]
+        self.assertEqual(self.read(os.path.join(self.docs, base[1:])), f"@font-face {{ src: url(fonts/{os.path.basename(font)}) }}")
+        self.assertEqual(self.read(os.path.join(self.docs, css[1:])),
+                         f"@import url({base[1:]});\nbody {{ background: url(images/{os.path.basename(png)}) }}")
+        self.assertEqual(self.sync(fingerprint=True).copied, [])
+
+        self.write(os.path.join(self.static, "fonts", "a.woff2"), "font-b")
+        stats = self.sync(fingerprint=True)
+        self.assertNotEqual(stats.fingerprints["/base.css"], base)
+        self.assertNotEqual(stats.fingerprints["/index.css"], css)
+        self.assertEqual(stats.fingerprints["/images/a.png"], png)
+        self.assertIn(os.path.join(self.docs, css[1:]), stats.removed)
+        self.assertIn(stats.fingerprints["/base.css"][1:], self.read(os.path.join(self.docs, stats.fingerprints["/index.css"][1:])))
+
+    def test_hashes_are_cached_by_size_and_mtime(self):
+        path = os.path.join(self.static, "index.css")
+        stat = os.stat(path)
+        entry = {"hash": "cached", "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        self.assertEqual(cached_hash(path, entry), "cached")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        self.assertNotEqual(cached_hash(path, entry), "cached")
+
+
+if __name__ == '__main__':
+    unittest.main()
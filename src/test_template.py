@@ -0,0 +1,77 @@
+import io
+import unittest
+from htmlnode import LeafNode, ParentNode
+from template import compile_template, minify_html, rewrite_urls
+from url_resolver import UrlResolver
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = compile_template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": "<p>hi</p>"}),
+            "<title>Home</title><article><p>hi</p></article>",
+        )
+
+    def test_repeated_slots(self):
+        template = compile_template("<title>{{ Title }}</title><h1>{{Title}}</h1>")
+        self.assertEqual(template.render({"Title": "Home"}), "<title>Home</title><h1>Home</h1>")
+        self.assertEqual(template.slot_names, {"Title"})
+
+    def test_missing_value_keeps_placeholder(self):
+        template = compile_template("{{ Title }} {{ Footer }}")
+        self.assertEqual(template.render({"Title": "Home"}), "Home {{ Footer }}")
+
+    def test_basepath_applied_to_literals_only(self):
+        template = compile_template('<link href="/index.css"><img src="/logo.png">{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render({"Content": '<a href="/x">x</a>'}),
+            '<link href="/site/index.css"><img src="/site/logo.png"><a href="/x">x</a>',
+        )
+
+    def test_rewrite_urls(self):
+        resolver = UrlResolver("/s/")
+        self.assertEqual(rewrite_urls('<a href="/a"><img src="/b">', resolver), '<a href="/s/a"><img src="/s/b">')
+        self.assertEqual(
+            rewrite_urls('<a href="https://x.org/"><a href="b/c"><a data-href="/d">', resolver),
+            '<a href="https://x.org/"><a href="b/c"><a data-href="/d">',
+        )
+        self.assertEqual(rewrite_urls('<a href="/a">', UrlResolver("/")), '<a href="/a">')
+
+    def test_write_streams_nodes(self):
+        template = compile_template('<title>{{ Title }}</title><link href="/a.css">{{ Content }}', "/s/")
+        buffer = io.StringIO()
+        template.write(buffer, {"Title": "Home", "Content": ParentNode("p", [LeafNode("b", "hi")])})
+        self.assertEqual(buffer.getvalue(), '<title>Home</title><link href="/s/a.css"><p><b>hi</b></p>')
+
+    def test_custom_resolver(self):
+        class CdnResolver(UrlResolver):
+            def resolve(self, url):
+                return "https://cdn.example.com" + url if url.endswith(".css") else super().resolve(url)
+
+        template = compile_template('<link href="/a.css"><a href="/">home</a>', resolver=CdnResolver("/s/"))
+        self.assertEqual(template.render({}), '<link href="https://cdn.example.com/a.css"><a href="/s/">home</a>')
+
+    def test_minify_html(self):
+        html = '<html>\n  <head>\n    <meta charset="utf-8" />\n  </head>\n  <body>\n    <p>a  <b>b</b>\n    <i>c</i></p>\n  </body>\n</html>\n'
+        self.assertEqual(minify_html(html), "<html><head><meta charset=utf-8></head><body><p>a <b>b</b> <i>c</i></p></body></html>")
+
+    def test_minify_keeps_raw_text_elements(self):
+        html = '<div>\n  <pre class="x">  keep\n    this  </pre>\n  <script>if (a  <b) { x = "y" }</script>\n</div>'
+        self.assertEqual(
+            minify_html(html),
+            '<div><pre class=x>  keep\n    this  </pre><script>if (a  <b) { x = "y" }</script></div>',
+        )
+
+    def test_minified_template_writes_minified_nodes(self):
+        template = compile_template(
+            '<head>\n  <link href="/a.css" rel="stylesheet" />\n</head>\n<a href="{{ Url }}">{{ Content }}</a>\n',
+            "/s/", minify=True,
+        )
+        buffer = io.StringIO()
+        template.write(buffer, {"Url": "/x y", "Content": ParentNode("p", [LeafNode("img", "", {"src": "/i.png"})])})
+        self.assertEqual(buffer.getvalue(), '<head><link href=/s/a.css rel=stylesheet></head> <a href="/x y"><p><img src=/i.png></p></a>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
 from textnode import TextNode, TextType, text_node_to_html_node
+from url_resolver import UrlResolver
 
 
 class TestTextNode(unittest.TestCase):
@@ -52,6 +53,28 @@ class TestTextNode(unittest.TestCase):
         actual_node = TextNode("This is a text node", TextType.LINK, "https://boot.dev/")
         expected_node = TextNode("This is a text node", TextType.LINK, "https://scrimba.com/home")
         self.assertNotEqual(actual_node, expected_node)
+
+    def test_no_instance_dict(self):
+        """
+        test that text nodes use __slots__
+        """
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(repr(node), "TextNode(This is a text node, text, None)")
+
+    def test_image_with_known_size(self):
+        """
+        test that local images the resolver knows get their size and lazy loading
+        """
+        resolver = UrlResolver("/site/", {"/images/a.png": (640, 480)})
+        html_node = text_node_to_html_node(TextNode("A", TextType.IMAGE, "/images/a.png"), resolver)
+        self.assertEqual(
+            html_node.props,
+            {"src": "/site/images/a.png", "alt": "A", "width": "640", "height": "480",
+             "loading": "lazy", "decoding": "async"},
+        )
+        html_node = text_node_to_html_node(TextNode("B", TextType.IMAGE, "https://example.com/b.png"), resolver)
+        self.assertEqual(html_node.props, {"src": "https://example.com/b.png", "alt": "B"})
         
         
     class TestTextNodeToHTMLNode(unittest.TestCase):
@@ -0,0 +1,68 @@
+import unittest
+from url_resolver import FingerprintResolver, RecordingResolver, UrlResolver
+
+
+class TestUrlResolver(unittest.TestCase):
+    def test_root_relative_urls_get_the_basepath(self):
+        resolver = UrlResolver("/site/")
+        self.assertEqual(resolver.resolve("/"), "/site/")
+        self.assertEqual(resolver.resolve("/blog/tom"), "/site/blog/tom")
+
+    def test_relative_and_absolute_urls_are_unchanged(self):
+        resolver = UrlResolver("/site/")
+        for url in ("tom/", "../index.css", "#notes", "?page=2", "https://example.com/a", "//cdn.example.com/a.js",
+                    "mailto:frodo@shire.me", ""):
+            self.assertEqual(resolver.resolve(url), url)
+
+    def test_default_basepath_is_identity(self):
+        self.assertEqual(UrlResolver().resolve("/blog/"), "/blog/")
+
+    def test_equality(self):
+        self.assertEqual(UrlResolver("/a/"), UrlResolver("/a/"))
+        self.assertEqual(hash(UrlResolver("/a/")), hash(UrlResolver("/a/")))
+        self.assertNotEqual(UrlResolver("/a/"), UrlResolver("/b/"))
+
+
+class TestFingerprintResolver(unittest.TestCase):
+    TABLE = {"/index.css": "/index.0123456789.css", "/images/a.png": "/images/a.abcdef0123.png"}
+
+    def test_table_lookup_then_basepath(self):
+        resolver = FingerprintResolver("/site/", self.TABLE)
+        self.assertEqual(resolver.resolve("/index.css"), "/site/index.0123456789.css")
+        self.assertEqual(resolver.resolve("/images/a.png?v=1#top"), "/site/images/a.abcdef0123.png?v=1#top")
+        self.assertEqual(resolver.resolve("/blog/"), "/site/blog/")
+        self.assertEqual(resolver.resolve("images/a.png"), "images/a.png")
+
+    def test_table_entries_are_not_params(self):
+        resolver = FingerprintResolver("/", self.TABLE)
+        self.assertEqual(resolver.params(), {"basepath": "/"})
+        self.assertEqual(resolver, FingerprintResolver("/", {}))
+        self.assertNotEqual(resolver, UrlResolver("/"))
+
+    def test_entry(self):
+        resolver = FingerprintResolver("/site/", self.TABLE)
+        self.assertEqual(resolver.entry("/index.css?v=2"), {"url": "/index.0123456789.css"})
+        self.assertEqual(resolver.entry("/missing.css"), {})
+        for url in ("/blog/", "index.css", "//cdn.example.com/a.js", "https://example.com/index.css", "#top"):
+            self.assertIsNone(resolver.entry(url), url)
+
+    def test_recording_resolver(self):
+        resolver = RecordingResolver(FingerprintResolver("/site/", self.TABLE))
+        self.assertEqual(resolver.resolve("/index.css#x"), "/site/index.0123456789.css#x")
+        resolver.resolve("/blog/")
+        resolver.resolve("/new.js")
+        self.assertEqual(resolver.entries, {"/index.css": {"url": "/index.0123456789.css"}, "/new.js": {}})
+
+    def test_image_sizes_are_looked_up_by_source_url(self):
+        resolver = FingerprintResolver("/site/", self.TABLE, {"/images/a.png": (2, 1)})
+        self.assertEqual(resolver.image_size("/images/a.png?v=1"), (2, 1))
+        self.assertIsNone(resolver.image_size("images/a.png"))
+        self.assertIsNone(resolver.image_size("/images/b.png"))
+        self.assertEqual(resolver.params(), {"basepath": "/site/"})
+        self.assertEqual(resolver.entry("/images/a.png"), {"url": "/images/a.abcdef0123.png", "size": [2, 1]})
+        self.assertEqual(UrlResolver("/", {"/a.png": (2, 1)}).entry("/a.png?v=1"), {"size": [2, 1]})
+        self.assertEqual(UrlResolver("/", {"/a.png": (2, 1)}), UrlResolver("/", {"/a.png": (1, 2)}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+import sys
+import time
+import unittest
+from site_test_case import SiteTestCase
+from watch import InotifyWatcher, PollingWatcher, SiteWatcher
+
+
+class TestWatchers(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.write(os.path.join(self.content, "index.md"), "x")
+        self.write(self.template, "x")
+
+    def check_watcher(self, watcher):
+        try:
+            self.assertEqual(watcher.wait(timeout=0.05), set())
+            time.sleep(0.01)
+            with open(self.page, "w") as file:
+                file.write("changed")
+            self.assertEqual(watcher.wait(timeout=2), {self.page})
+            with open(os.path.join(self.root, "unrelated.txt"), "w") as file:
+                file.write("x")
+            with open(self.template, "a") as file:
+                file.write("y")
+            self.assertEqual(watcher.wait(timeout=2), {self.template})
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.content, self.template], interval=0.01))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_watcher(self):
+        self.check_watcher(InotifyWatcher([self.content, self.template]))
+
+
+class TestSiteWatcher(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.site = SiteWatcher(self.content, self.template, self.static, self.docs, "/")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.site.build()
+
+    def apply(self, *paths):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.site.apply(set(paths))
+
+    def test_content_change_rebuilds_one_page(self):
+        path = os.path.join(self.content, "blog", "index.md")
+        self.write(path, "# Blog v2")
+        self.assertEqual(self.apply(path), [path])
+        self.assertIn("Blog v2", self.read(self.docs, "blog", "index.html"))
+
+    def test_new_and_deleted_pages(self):
+        new_path = os.path.join(self.content, "new", "index.md")
+        self.write(new_path, "# New")
+        self.assertEqual(self.apply(new_path), [new_path])
+        self.assertIn("New", self.read(self.docs, "new", "index.html"))
+        os.remove(new_path)
+        self.apply(new_path)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "new")))
+        self.assertNotIn(new_path, self.site.manifest.pages)
+
+    def test_template_change_rebuilds_every_page(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.apply(self.template)), 2)
+        self.assertTrue(self.read(self.docs, "index.html").startswith("<h1>Home</h1>"))
+
+    def test_static_change_is_synced(self):
+        path = os.path.join(self.static, "index.css")
+        self.write(path, "body { color: red }")
+        os.utime(path, (1, 1))
+        self.assertEqual(self.apply(path), [])
+        self.assertEqual(self.read(self.docs, "index.css"), "body { color: red }")
+
+    def test_new_image_size_rebuilds_the_pages_showing_it(self):
+        index = os.path.join(self.content, "index.md")
+        self.write(index, "# Home\n\n![Tom](/tom.gif)")
+        self.apply(index)
+        path = os.path.join(self.static, "tom.gif")
+        with open(path, "wb") as file:
+            file.write(b"GIF89a\x03\x00\x02\x00")
+        self.assertEqual(self.apply(path), [index])
+        self.assertIn('<img src="/tom.gif" alt="Tom" width="3" height="2"', self.read(self.docs, "index.html"))
+        os.utime(path, (1, 1))
+        self.assertEqual(self.apply(path), [])
+
+        with open(os.path.join(self.static, "rivendell.gif"), "wb") as file:
+            file.write(b"GIF89a\x05\x00\x04\x00")
+        self.assertEqual(self.apply(os.path.join(self.static, "rivendell.gif")), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
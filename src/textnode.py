@@ -9,6 +9,8 @@ class TextType(Enum):
     IMAGE = "image"
     
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url = None):
         self.text = text
         self.text_type = text_type
@@ -26,7 +28,7 @@ class TextNode:
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
     
-def text_node_to_html_node(text_node):
+def text_node_to_html_node(text_node, resolver=None):
     """
     Converts a TextNode instance into a corresponding LeafNode for HTML rendering.
 
@@ -35,6 +37,7 @@ def text_node_to_html_node(text_node):
 
     Parameters:
         text_node (TextNode): An instance representing a piece of formatted text.
+        resolver (UrlResolver, optional): Resolves the URL of links and images.
 
     Returns:
         LeafNode: A leaf HTML node representing the text in HTML.
@@ -48,7 +51,8 @@ def text_node_to_html_node(text_node):
         - ITALIC:  <i>
         - CODE:    <code>
         - LINK:    <a href="...">...</a>
-        - IMAGE:   <img src="..." alt="...">
+        - IMAGE:   <img src="..." alt="...">, with width, height, loading="lazy"
+                   and decoding="async" if the resolver knows the image's size
     """
     match text_node.text_type:
         case TextType.TEXT:
@@ -60,9 +64,16 @@ def text_node_to_html_node(text_node):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            url = text_node.url if resolver is None else resolver.resolve(text_node.url)
+            return LeafNode("a", text_node.text, {"href": url})
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            if resolver is None:
+                return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            props = {"src": resolver.resolve(text_node.url), "alt": text_node.text}
+            size = resolver.image_size(text_node.url)
+            if size is not None:
+                props.update(width=str(size[0]), height=str(size[1]), loading="lazy", decoding="async")
+            return LeafNode("img", "", props)
         case _:
             raise ValueError(f"Invalid text type: {text_node.text_type}")
 
@@ -0,0 +1,154 @@
+class UrlResolver:
+    """
+    Turns the URLs written in markdown and in the template into the URLs used
+    in the built site.
+
+    Root-relative URLs ("/blog/") are prefixed with the basepath the site is
+    served from. Relative URLs ("../tom/", "#notes") already work from any
+    basepath, and absolute ones ("https://...", "//cdn...", "mailto:...") are
+    already final, so both are returned unchanged.
+
+    URLs are resolved once, where the page builds its links and where the
+    template is compiled. Subclass and override resolve() to rewrite them
+    differently.
+
+    The resolver also knows the pixel size of the site's local images, so
+    pages can give every <img> its width and height. A page depends on the
+    sizes of the images it shows, see entry().
+
+    Attributes:
+        basepath (str): URL prefix the site is served from, such as "/" or "/site/".
+        image_sizes (dict): Maps the root-relative URL of every static image
+            ("/images/tom.png") to its (width, height), from SyncStats.
+    """
+
+    def __init__(self, basepath="/", image_sizes=None):
+        self.basepath = basepath
+        self.image_sizes = image_sizes or {}
+
+    def resolve(self, url):
+        if self.basepath == "/" or not url.startswith("/") or url.startswith("//"):
+            return url
+        return self.basepath + url[1:]
+
+    def image_size(self, url):
+        """
+        Returns the (width, height) of the local image a markdown URL points
+        at, or None if it is not one. Like fingerprints, only root-relative
+        URLs are looked up.
+        """
+        return self.image_sizes.get(url[:_path_end(url)])
+
+    def entry(self, url):
+        """
+        Returns what the resolver's tables hold for the static file a URL
+        points at, or None if the URL is not looked up in them.
+
+        Only root-relative URLs that do not end in "/" can point at a static
+        file. A page records the entry of every such URL it uses, even an
+        empty one, and is rebuilt once any of them changes, rather than
+        whenever any static file does.
+
+        Returns:
+            dict: JSON-compatible, so it compares equal after a round trip
+            through the build manifest.
+        """
+        path = url[:_path_end(url)]
+        if not path.startswith("/") or path.startswith("//") or path.endswith("/"):
+            return None
+        size = self.image_sizes.get(path)
+        return {} if size is None else {"size": list(size)}
+
+    def params(self):
+        """
+        Returns the settings that decide how URLs resolve, which every page is
+        built from and recorded with in the build manifest. The tables of
+        static files are not among them, see entry().
+        """
+        return {"basepath": self.basepath}
+
+    def __eq__(self, other):
+        if not isinstance(other, UrlResolver):
+            return NotImplemented
+        return type(self) is type(other) and self.params() == other.params()
+
+    def __hash__(self):
+        return hash((type(self), tuple(sorted(self.params().items()))))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.basepath!r})"
+
+
+class FingerprintResolver(UrlResolver):
+    """
+    Resolves URLs of fingerprinted static assets to their hashed copies.
+
+    A root-relative URL found in the table ("/index.css") is replaced by its
+    fingerprinted URL ("/index.1a2b3c4d5e.css"), keeping any query string or
+    fragment, before the basepath is applied. Relative URLs are not looked up,
+    as the page they are relative to is not known here.
+
+    Attributes:
+        table (dict): The fingerprints from SyncStats.
+    """
+
+    def __init__(self, basepath="/", table=None, image_sizes=None):
+        super().__init__(basepath, image_sizes)
+        self.table = table or {}
+
+    def resolve(self, url):
+        end = _path_end(url)
+        fingerprinted = self.table.get(url[:end])
+        if fingerprinted is not None:
+            url = fingerprinted + url[end:]
+        return super().resolve(url)
+
+    def entry(self, url):
+        entry = super().entry(url)
+        if entry is not None:
+            fingerprinted = self.table.get(url[:_path_end(url)])
+            if fingerprinted is not None:
+                entry["url"] = fingerprinted
+        return entry
+
+
+class RecordingResolver:
+    """
+    Resolves URLs with another resolver and records the entry() of every URL
+    it is asked about, so the pages and blocks converted with it know which
+    table entries they depend on.
+
+    Attributes:
+        entries (dict): Maps the path of every URL with an entry to the entry.
+    """
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.entries = {}
+
+    def resolve(self, url):
+        self._record(url)
+        return self.resolver.resolve(url)
+
+    def image_size(self, url):
+        self._record(url)
+        return self.resolver.image_size(url)
+
+    def _record(self, url):
+        path = url[:_path_end(url)]
+        if path not in self.entries:
+            entry = self.resolver.entry(path)
+            if entry is not None:
+                self.entries[path] = entry
+
+
+def _path_end(url):
+    """
+    Returns where the path of url ends, before any query string or fragment.
+    """
+    end = len(url)
+    for mark in "?#":
+        index = url.find(mark)
+        if index != -1 and index < end:
+            end = index
+    return end
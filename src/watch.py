@@ -0,0 +1,343 @@
+import argparse
+import ctypes
+import ctypes.util
+import functools
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from generate_page import BuildError, find_pages, generate_pages_recursive, page_dependencies, render_page
+from main import dir_path_content, dir_path_public, dir_path_static, template_path
+from manifest import BuildManifest, remove_empty_dirs
+from static_sync import sync_static
+from template import load_template
+from url_resolver import UrlResolver
+
+
+class PollingWatcher:
+    """
+    Detects file changes by comparing (mtime, size) snapshots of the watched paths.
+
+    Used where inotify is not available.
+    """
+
+    def __init__(self, paths, interval=0.2):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root in self.paths:
+            if os.path.isfile(root):
+                stat = os.stat(root)
+                snapshot[root] = (stat.st_mtime_ns, stat.st_size)
+                continue
+            for dir_path, _, filenames in os.walk(root):
+                for filename in filenames:
+                    path = os.path.join(dir_path, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """
+        Blocks until something changed or timeout seconds passed.
+
+        Returns:
+            set of str: Absolute paths that were created, modified or deleted.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Detects file changes with Linux inotify, through ctypes.
+
+    Every directory under the watched paths gets a watch; single files are
+    watched through their parent directory and filtered by name.
+    """
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, paths, settle=0.01):
+        self.settle = settle
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        self._roots = []
+        self._files = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isfile(path):
+                self._files.add(path)
+                self._add_watch(os.path.dirname(path))
+            else:
+                self._roots.append(path)
+                self._add_tree(path)
+
+    def _add_watch(self, dir_path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dir_path}")
+        self._dirs[wd] = dir_path
+
+    def _add_tree(self, root):
+        for dir_path, _, _ in os.walk(root):
+            self._add_watch(dir_path)
+
+    def _is_watched(self, path):
+        return path in self._files or any(path == root or path.startswith(root + os.sep) for root in self._roots)
+
+    def _read_events(self):
+        changed = set()
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if wd not in self._dirs:
+                continue
+            path = os.path.join(self._dirs[wd], name)
+            if not self._is_watched(path):
+                continue
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                self._add_tree(path)
+                for dir_path, _, filenames in os.walk(path):
+                    changed.update(os.path.join(dir_path, filename) for filename in filenames)
+            changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """
+        Blocks until something changed or timeout seconds passed.
+
+        After the first event, keeps collecting for `settle` seconds so that an
+        editor's save (write, rename, chmod) is reported as a single change.
+
+        Returns:
+            set of str: Absolute paths that were created, modified or deleted.
+        """
+        changed = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        while ready:
+            changed |= self._read_events()
+            ready, _, _ = select.select([self._fd], [], [], self.settle)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(paths, poll=False):
+    """
+    Returns an InotifyWatcher where the platform supports it, else a PollingWatcher.
+    """
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(paths)
+
+
+class SiteWatcher:
+    """
+    Keeps the compiled template, the page index and the build manifest in
+    memory, and rebuilds only what a set of changed files affects.
+    """
+
+    def __init__(self, content_dir, template_path, static_dir, dest_dir, basepath):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.resolver = UrlResolver(basepath)
+        self.manifest = BuildManifest.load(dest_dir)
+        self.template = None
+        self.pages = {}
+
+    def build(self):
+        """
+        Brings the output up to date with an incremental build and warms the caches.
+        """
+        self._sync_static()
+        try:
+            generate_pages_recursive(
+                self.content_dir, self.template_path, self.dest_dir, self.basepath, self.manifest, resolver=self.resolver
+            )
+        except BuildError as error:
+            self._report(error.failures)
+        self.manifest.prune()
+        self.manifest.save()
+        self.template = load_template(self.template_path, resolver=self.resolver)
+        self.pages = dict(find_pages(self.content_dir, self.dest_dir))
+
+    def _sync_static(self):
+        """
+        Syncs the static files and switches to a resolver with the new image
+        sizes. Returns whether any image was added, removed or resized.
+        """
+        stats = sync_static(self.static_dir, self.dest_dir, self.manifest)
+        print(f"Static files: {stats}")
+        if stats.image_sizes == self.resolver.image_sizes:
+            return False
+        self.resolver = UrlResolver(self.basepath, stats.image_sizes)
+        return True
+
+    def _report(self, failures):
+        for from_path, message in failures:
+            print(f"Failed to generate {from_path}: {message}", file=sys.stderr)
+
+    def _content_path(self, path):
+        return os.path.join(self.content_dir, os.path.relpath(path, os.path.abspath(self.content_dir)))
+
+    def _generate(self, from_path, dest_path):
+        dependencies = page_dependencies(from_path, self.template_path)
+        for path in dependencies:
+            self.manifest.file_hash(path)
+        rendered = render_page(from_path, self.template, dest_path, self.resolver)
+        self.manifest.record(from_path, dest_path, dependencies, self.resolver.params(), rendered["meta"], rendered["urls"])
+
+    def _remove(self, from_path):
+        dest_path = self.pages.pop(from_path)
+        self.manifest.pages.pop(from_path, None)
+        if os.path.isfile(dest_path):
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), self.dest_dir)
+
+    def apply(self, changed):
+        """
+        Rebuilds the outputs affected by a set of changed absolute paths.
+
+        Returns:
+            list of str: The source paths of the pages that were regenerated.
+        """
+        content_root = os.path.abspath(self.content_dir) + os.sep
+        static_root = os.path.abspath(self.static_dir) + os.sep
+        template_changed = os.path.abspath(self.template_path) in changed
+
+        resized = False
+        if any(path.startswith(static_root) for path in changed):
+            resized = self._sync_static()
+
+        dirty = set()
+        if template_changed:
+            self.manifest.invalidate(self.template_path)
+        if template_changed or resized:
+            self.template = load_template(self.template_path, resolver=self.resolver)
+        if resized:
+            # Only the pages showing an image that was added, removed or resized.
+            dirty.update(self.manifest.url_dependents(self.resolver))
+        if template_changed:
+            # Pages that failed last time have no entry and are retried too.
+            dirty.update(self.manifest.dependents([self.template_path]))
+            dirty.update(self.pages.keys() - self.manifest.pages.keys())
+        for path in changed:
+            if not path.startswith(content_root):
+                continue
+            from_path = self._content_path(path)
+            self.manifest.invalidate(from_path)
+            if os.path.isfile(path):
+                dirty.add(from_path)
+            elif not os.path.exists(path):
+                # A deleted file, or a deleted directory and every page under it.
+                for known in [p for p in self.pages if p == from_path or p.startswith(from_path + os.sep)]:
+                    self._remove(known)
+
+        failures = []
+        regenerated = []
+        for from_path in sorted(dirty):
+            if not os.path.isfile(from_path):
+                continue
+            dest_path = self.pages.get(from_path)
+            if dest_path is None:
+                rel_path = os.path.relpath(from_path, self.content_dir)
+                dest_path = os.path.splitext(os.path.join(self.dest_dir, rel_path))[0] + ".html"
+                self.pages[from_path] = dest_path
+            try:
+                self._generate(from_path, dest_path)
+            except Exception as error:
+                failures.append((from_path, f"{type(error).__name__}: {error}"))
+            else:
+                regenerated.append(from_path)
+
+        self._report(failures)
+        self.manifest.save()
+        return regenerated
+
+
+def serve(dest_dir, port):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=dest_dir)
+    server = ThreadingHTTPServer(("", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving {dest_dir} on http://localhost:{port}/")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the site whenever content, static files or the template change")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served from")
+    parser.add_argument("--port", type=int, help="also serve the output directory on this port")
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using inotify")
+    args = parser.parse_args(argv)
+
+    site = SiteWatcher(dir_path_content, template_path, dir_path_static, dir_path_public, args.basepath)
+    site.build()
+    if args.port:
+        serve(dir_path_public, args.port)
+
+    watcher = make_watcher([dir_path_content, dir_path_static, template_path], args.poll)
+    print(f"Watching for changes ({type(watcher).__name__})...")
+    try:
+        while True:
+            changed = watcher.wait()
+            if not changed:
+                continue
+            start = time.perf_counter()
+            regenerated = site.apply(changed)
+            print(f"Rebuilt {len(regenerated)} page(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()